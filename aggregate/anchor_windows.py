@@ -0,0 +1,88 @@
+# aggregate/anchor_windows.py
+# Python 3.6.8 compatible
+#
+# AnchorWindowIndex: which notes fall in each extractor's window around the
+# patient's recon anchor.
+#
+# The pipeline used to parse every note's date and its patient's anchor date
+# row by row, then test each extractor's window (BMI: -45..+14 days, smoking:
+# on or before the anchor, ...) per note. The index parses each distinct
+# date string once, keeps every patient's notes sorted by day offset from
+# the anchor, and answers a window with two bisects per patient.
+#
+# Offsets are whole calendar days, note date minus anchor date, as in
+# days_between(). Notes with no anchor or no parseable date have no offset
+# and are in no window.
+
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Dict, Optional, Sequence, Set, Tuple
+
+from ingest.csv_utils import clean_cell, parse_date_safe
+
+# (first day, last day) relative to the anchor; None leaves that end open
+Window = Tuple[Optional[int], Optional[int]]
+
+
+class AnchorWindowIndex:
+    """
+    windows = AnchorWindowIndex(mrns, note_dates, recon_anchor_map,
+                                {"bmi": (-45, 14), "smoking": (None, 0)})
+    if pos in windows.positions("bmi"):
+        dd = windows.offset(pos)
+    recon_dt = windows.anchor(mrn)
+    """
+
+    def __init__(self, mrns: Sequence[str], note_dates: Sequence[str], anchors: Dict[str, dict],
+                 windows: Dict[str, Window], anchor_key: str = "recon_date"):
+        self.windows = windows
+        self._anchor_map = anchors
+        self._anchor_key = anchor_key
+        self._anchors = {}  # type: Dict[str, Optional[datetime]]
+        self._dates = {}  # type: Dict[str, Optional[datetime]]
+        self._offsets = []
+        by_mrn = {}
+        for pos, (mrn, note_date) in enumerate(zip(mrns, note_dates)):
+            mrn = clean_cell(mrn)
+            recon_dt = self.anchor(mrn)
+            note_dt = self._parse(note_date) if recon_dt is not None else None
+            if note_dt is None:
+                self._offsets.append(None)
+                continue
+            dd = (note_dt.date() - recon_dt.date()).days
+            self._offsets.append(dd)
+            by_mrn.setdefault(mrn, []).append((dd, pos))
+        self._sorted = []
+        for pairs in by_mrn.values():
+            pairs.sort()
+            self._sorted.append(([dd for dd, _ in pairs], [pos for _, pos in pairs]))
+        self._positions = {}  # type: Dict[str, Set[int]]
+
+    def _parse(self, s) -> Optional[datetime]:
+        s = clean_cell(s)
+        if s not in self._dates:
+            self._dates[s] = parse_date_safe(s)
+        return self._dates[s]
+
+    def anchor(self, mrn: str) -> Optional[datetime]:
+        """mrn's parsed anchor date, or None."""
+        if mrn not in self._anchors:
+            anchor = self._anchor_map.get(mrn)
+            self._anchors[mrn] = self._parse((anchor or {}).get(self._anchor_key, ""))
+        return self._anchors[mrn]
+
+    def offset(self, pos: int) -> Optional[int]:
+        """Days from the anchor to note pos, or None."""
+        return self._offsets[pos]
+
+    def positions(self, name: str) -> Set[int]:
+        """Positions of the notes inside window name."""
+        if name not in self._positions:
+            lo, hi = self.windows[name]
+            hits = set()  # type: Set[int]
+            for offsets, positions in self._sorted:
+                start = 0 if lo is None else bisect_left(offsets, lo)
+                end = len(offsets) if hi is None else bisect_right(offsets, hi)
+                hits.update(positions[start:end])
+            self._positions[name] = hits
+        return self._positions[name]
@@ -0,0 +1,77 @@
+# aggregate/master_frame.py
+# Python 3.6.8 compatible
+#
+# MasterFrame: MRN-indexed reads and buffered writes over the patient master
+# DataFrame.
+#
+# The pipeline scripts used to address a patient's row with
+#     mask = master["MRN"].astype(str).str.strip() == mrn
+# which rebuilds and compares the whole MRN column on every call, so a pass
+# over notes or patients costs O(rows x patients). MasterFrame maps each
+# stripped MRN to its row positions once. set() only records the value,
+# get() reads recorded values first, and flush() writes each touched
+# column back with a single positional assignment.
+#
+# Semantics are those of the mask idiom: set() writes every row with that
+# MRN, get() reads the first one (.loc[mask, col].iloc[0]).
+
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+
+class MasterFrame:
+    """
+    frame = MasterFrame(master, "MRN")
+    if mrn in frame:
+        frame.set(mrn, "BMI", 31.2)
+        lat = frame.get(mrn, "Recon_Laterality")
+    master = frame.flush()
+    """
+
+    def __init__(self, master: pd.DataFrame, key: str):
+        self.frame = master
+        self.key = key
+        # row order, duplicates included, as the old mask loops iterated
+        self.keys = master[key].astype(str).str.strip().tolist()
+        self._rows = {}
+        for pos, mrn in enumerate(self.keys):
+            self._rows.setdefault(mrn, []).append(pos)
+        self._pending = {}
+
+    def __contains__(self, mrn: str) -> bool:
+        return mrn in self._rows
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def get(self, mrn: str, col: str) -> Any:
+        """Value of col in mrn's first row, including unflushed writes."""
+        pos = self._rows[mrn][0]
+        pending = self._pending.get(col)
+        if pending is not None and pos in pending:
+            return pending[pos]
+        return self.frame[col].iat[pos]
+
+    def set(self, mrn: str, col: str, value: Any) -> None:
+        """Record value for col in every row of mrn (written on flush())."""
+        if col not in self.frame.columns:
+            raise KeyError("Master has no column {0!r}".format(col))
+        pending = self._pending.setdefault(col, {})
+        for pos in self._rows.get(mrn, ()):
+            pending[pos] = value
+
+    def flush(self) -> pd.DataFrame:
+        """Write the recorded values, one assignment per column."""
+        for col, pending in self._pending.items():
+            if not pending:
+                continue
+            positions = sorted(pending)
+            # an object array, so mixed values are not coerced to one type
+            values = np.empty(len(positions), dtype=object)
+            for i, pos in enumerate(positions):
+                values[i] = pending[pos]
+            self.frame.iloc[positions, self.frame.columns.get_loc(col)] = values
+        self._pending = {}
+        return self.frame
@@ -17,6 +17,7 @@ from glob import glob
 from tqdm import tqdm
 
 from transformers import AutoTokenizer, AutoModelForSequenceClassification, pipeline
+from ingest.csv_utils import read_csv_robust
 
 # ==============================
 # CONFIG (hardcoded, no args)
@@ -58,23 +59,6 @@ THRESHOLD = 0.50        # you can change later if desired
 # HELPERS (borrowed style from your build script)
 # ==============================
 
-def read_csv_robust(path: str) -> pd.DataFrame:
-    common_kwargs = dict(dtype=str, engine="python")
-    try:
-        return pd.read_csv(path, **common_kwargs, on_bad_lines="skip")
-    except TypeError:
-        try:
-            return pd.read_csv(path, **common_kwargs, error_bad_lines=False, warn_bad_lines=True)
-        except UnicodeDecodeError:
-            return pd.read_csv(path, **common_kwargs, encoding="latin-1",
-                               error_bad_lines=False, warn_bad_lines=True)
-    except UnicodeDecodeError:
-        try:
-            return pd.read_csv(path, **common_kwargs, encoding="latin-1", on_bad_lines="skip")
-        except TypeError:
-            return pd.read_csv(path, **common_kwargs, encoding="latin-1",
-                               error_bad_lines=False, warn_bad_lines=True)
-
 def clean_cols(df: pd.DataFrame) -> pd.DataFrame:
     df.columns = [str(c).strip().replace("\ufeff", "") for c in df.columns]
     return df
@@ -29,6 +29,7 @@ Python 3.6.8 compatible.
 import os
 import random
 import pandas as pd
+from ingest.csv_utils import read_csv_robust
 
 BASE_DIR = "/home/apokol/Breast_Restore"
 
@@ -49,44 +50,6 @@ NEGATIVES_N = 15
 RANDOM_SEED = 42
 
 
-def read_csv_robust(path):
-    common_kwargs = dict(dtype=str, engine="python")
-    try:
-        return pd.read_csv(path, **common_kwargs, on_bad_lines="skip")
-    except TypeError:
-        try:
-            return pd.read_csv(
-                path,
-                **common_kwargs,
-                error_bad_lines=False,
-                warn_bad_lines=True
-            )
-        except UnicodeDecodeError:
-            return pd.read_csv(
-                path,
-                **common_kwargs,
-                encoding="latin-1",
-                error_bad_lines=False,
-                warn_bad_lines=True
-            )
-    except UnicodeDecodeError:
-        try:
-            return pd.read_csv(
-                path,
-                **common_kwargs,
-                encoding="latin-1",
-                on_bad_lines="skip"
-            )
-        except TypeError:
-            return pd.read_csv(
-                path,
-                **common_kwargs,
-                encoding="latin-1",
-                error_bad_lines=False,
-                warn_bad_lines=True
-            )
-
-
 def clean_cols(df):
     df.columns = [str(c).strip().replace("\ufeff", "") for c in df.columns]
     return df
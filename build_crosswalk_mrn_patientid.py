@@ -18,6 +18,7 @@ from __future__ import print_function
 import os
 import re
 import pandas as pd
+from ingest.csv_utils import read_csv_robust
 
 # ----------------------------
 # HARD-CODED PATHS (edit if needed)
@@ -47,13 +48,6 @@ def _safe_str(x):
 def normalize_colname(c):
     return re.sub(r"\s+", "_", _safe_str(c).strip()).upper()
 
-def read_csv_robust(path):
-    # Py3.6/Pandas older: avoid read_csv(errors=...)
-    try:
-        return pd.read_csv(path, dtype=object, engine="python", encoding="utf-8")
-    except Exception:
-        return pd.read_csv(path, dtype=object, engine="python", encoding="latin1")
-
 def detect_col(columns, want_norm_names):
     norm_map = {c: normalize_colname(c) for c in columns}
     for want in want_norm_names:
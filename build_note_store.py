@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+build_note_store.py
+Python 3.6.8 compatible
+
+PURPOSE:
+    Rebuild every HPI11526 note (Clinic / Inpatient / Operation Notes CSVs,
+    one row per NOTE_ID + LINE) ONCE and write the result to a columnar
+    note store shared by the pipeline scripts:
+
+        MRN, ENCRYPTED_PAT_ID, NOTE_ID, NOTE_TYPE, NOTE_DATE,
+        SOURCE_FILE, NOTE_TEXT
+
+    Scripts load it through ingest.note_store.load_notes(), which rebuilds
+    the store automatically when the source CSVs change. Run this script
+    directly to (re)build it up front.
+
+OUTPUTS:
+    _outputs/note_store.parquet
+    _outputs/note_store.parquet.manifest.json
+"""
+
+import argparse
+import time
+
+from ingest.csv_utils import find_files
+from ingest.note_store import build_note_store, store_is_current
+
+# ============================================================
+# CONFIG
+# ============================================================
+BASE_DIR = "/home/apokol/Breast_Restore"
+
+NOTE_STORE = "{0}/_outputs/note_store.parquet".format(BASE_DIR)
+
+NOTE_GLOBS = [
+    "{0}/**/HPI11526*Clinic Notes.csv".format(BASE_DIR),
+    "{0}/**/HPI11526*Inpatient Notes.csv".format(BASE_DIR),
+    "{0}/**/HPI11526*Operation Notes.csv".format(BASE_DIR),
+    "{0}/**/HPI11526*clinic notes.csv".format(BASE_DIR),
+    "{0}/**/HPI11526*inpatient notes.csv".format(BASE_DIR),
+    "{0}/**/HPI11526*operation notes.csv".format(BASE_DIR),
+]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Build the shared columnar note store.")
+    ap.add_argument("--out", default=NOTE_STORE, help="Store path (default: %(default)s)")
+    ap.add_argument("--force", action="store_true", help="Rebuild even if the store is current.")
+    args = ap.parse_args()
+
+    note_files = find_files(NOTE_GLOBS)
+    if not note_files:
+        raise FileNotFoundError("No HPI11526 Notes CSVs found.")
+
+    print("Note CSVs: {0}".format(len(note_files)))
+    for fp in note_files:
+        print("  {0}".format(fp))
+
+    if not args.force and store_is_current(args.out, note_files):
+        print("Store is current: {0} (use --force to rebuild)".format(args.out))
+        return
+
+    t0 = time.time()
+    notes_df = build_note_store(note_files, args.out)
+    print("Wrote {0} notes for {1} MRNs to {2} in {3:.1f}s".format(
+        len(notes_df), notes_df["MRN"].nunique(), args.out, time.time() - t0))
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,7 @@ import os
 import re
 import pandas as pd
 from glob import glob
+from ingest.csv_utils import read_csv_robust
 
 # ==============================
 # CONFIG
@@ -129,23 +130,6 @@ PROCVERB_REGEX = [re.compile(p, re.IGNORECASE) for p in PROCEDURE_VERB_CUES]
 # HELPERS
 # ==============================
 
-def read_csv_robust(path: str) -> pd.DataFrame:
-    common_kwargs = dict(dtype=str, engine="python")
-    try:
-        return pd.read_csv(path, **common_kwargs, on_bad_lines="skip")
-    except TypeError:
-        try:
-            return pd.read_csv(path, **common_kwargs, error_bad_lines=False, warn_bad_lines=True)
-        except UnicodeDecodeError:
-            return pd.read_csv(path, **common_kwargs, encoding="latin-1",
-                               error_bad_lines=False, warn_bad_lines=True)
-    except UnicodeDecodeError:
-        try:
-            return pd.read_csv(path, **common_kwargs, encoding="latin-1", on_bad_lines="skip")
-        except TypeError:
-            return pd.read_csv(path, **common_kwargs, encoding="latin-1",
-                               error_bad_lines=False, warn_bad_lines=True)
-
 def clean_cols(df: pd.DataFrame) -> pd.DataFrame:
     df.columns = [str(c).strip().replace("\ufeff", "") for c in df.columns]
     return df
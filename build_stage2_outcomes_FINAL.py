@@ -15,18 +15,14 @@ from __future__ import print_function
 import os, glob, re
 from datetime import datetime, timedelta
 import pandas as pd
+from ingest.csv_utils import read_csv_robust as _read_csv_robust
 
 # -------------------------
 # Robust IO / normalization
 # -------------------------
 
 def read_csv_robust(path, **kwargs):
-    for enc in ["utf-8", "utf-8-sig", "cp1252", "latin1"]:
-        try:
-            return pd.read_csv(path, encoding=enc, **kwargs)
-        except UnicodeDecodeError:
-            continue
-    raise IOError("Failed to read CSV with common encodings: {}".format(path))
+    return _read_csv_robust(path, encodings=("utf-8", "cp1252", "latin-1"), **kwargs)
 
 def normalize_cols(df):
     df.columns = [str(c).replace(u"\xa0", " ").strip() for c in df.columns]
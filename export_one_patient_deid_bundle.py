@@ -7,6 +7,11 @@
 #   - direct --patient_id (ENCRYPTED_PAT_ID)
 #   - OR --mrn (will resolve MRN -> ENCRYPTED_PAT_ID via a crosswalk CSV)
 #   - OR pick an exemplar from validation_merged.csv using --outcome + --case_type (FP/FN/TP/TN)
+#
+# Note and encounter rows are read through a per-file ENCRYPTED_PAT_ID byte-offset
+# index (ingest/row_index.py, "<csv>.rowindex.npz" next to each CSV), so only the
+# patient's rows are parsed. The index is built on first use and whenever a CSV
+# changes. --no_index, --pick_random and --max_rows_per_file scan the full files.
 
 from __future__ import print_function
 import os
@@ -15,6 +20,8 @@ import argparse
 import random
 import glob
 import pandas as pd
+from ingest.csv_utils import read_csv_robust
+from ingest.row_index import load_row_index
 
 
 # ----------------------------
@@ -168,22 +175,18 @@ def ensure_out_dir(p):
     if not os.path.exists(p):
         os.makedirs(p)
 
-def read_csv_robust(path):
-    try:
-        return pd.read_csv(path, dtype=object, engine="python", encoding="utf-8")
-    except Exception:
-        return pd.read_csv(path, dtype=object, engine="python", encoding="latin1")
-
 def normalize_note_type(x):
     t = _safe_str(x).strip()
     t = re.sub(r"\s+", " ", t)
     return t if t else "UNKNOWN_NOTE_TYPE"
 
-def try_parse_datetime(series):
+def try_parse_datetime(series, check_coverage=True):
+    # check_coverage rejects columns that are mostly not dates; it only makes
+    # sense on a whole file, not on one patient's rows
     try:
         parsed = pd.to_datetime(series, errors="coerce", infer_datetime_format=True)
         non_null = parsed.notnull().sum()
-        if non_null < max(3, int(0.05 * len(parsed))):
+        if check_coverage and non_null < max(3, int(0.05 * len(parsed))):
             return None
         return parsed
     except Exception:
@@ -220,7 +223,7 @@ def resolve_patient_id_from_mrn(mrn, crosswalk_path, mrn_col_override=None, pid_
     if pid_col is None:
         raise RuntimeError("Could not detect ENCRYPTED_PAT_ID column in crosswalk: {}".format(crosswalk_path))
 
-    mrn = _safe_str(100036884).strip()
+    mrn = _safe_str(mrn).strip()
     if not mrn:
         raise RuntimeError("MRN is empty.")
 
@@ -292,6 +295,22 @@ def load_stage2_anchor_dt(root, patient_id):
     return None, "NONE", ""
 
 
+# ----------------------------
+# Patient rows: indexed or full scan
+# ----------------------------
+def read_patient_frame(path, patient_id, use_index, index_dir=None):
+    """
+    (df, row_ids): rows of `path` to loop over and their row numbers in the
+    full file. With use_index only the patient's rows are read.
+    """
+    if use_index:
+        idx = load_row_index(path, key_col=detect_pid_col, index_dir=index_dir)
+        df = idx.read_rows(patient_id)
+        return df.reset_index(drop=True), df.index.tolist()
+    df = read_csv_robust(path)
+    return df, list(range(len(df)))
+
+
 # ----------------------------
 # Validation exemplar picker
 # ----------------------------
@@ -556,6 +575,8 @@ def main():
     ap.add_argument("--pick_random", action="store_true", help="Pick a random patient with >= --min_notes (from notes only).")
     ap.add_argument("--min_notes", type=int, default=10, help="Used with --pick_random.")
     ap.add_argument("--max_rows_per_file", type=int, default=None, help="Optional: cap rows per file for fast tests.")
+    ap.add_argument("--no_index", action="store_true", help="Scan full CSVs instead of the per-patient row index.")
+    ap.add_argument("--index_dir", default=None, help="Optional: where to keep row indexes (default: next to each CSV).")
     args = ap.parse_args()
 
     root = os.path.abspath(".")
@@ -609,6 +630,8 @@ def main():
     else:
         patient_id = DEFAULT_PATIENT_ID
 
+    use_index = not (args.no_index or args.pick_random or args.max_rows_per_file is not None)
+
     # ---------
     # NOTES: Collect per-note rows for the patient
     # ---------
@@ -617,7 +640,7 @@ def main():
         if not os.path.exists(path):
             raise RuntimeError("Input file not found: {}".format(path))
 
-        df = read_csv_robust(path)
+        df, row_ids = read_patient_frame(path, patient_id, use_index, args.index_dir)
 
         pid_col = detect_pid_col(df.columns)
         note_type_col = detect_note_type_col(df.columns)
@@ -636,7 +659,7 @@ def main():
 
         dt_parsed_series = None
         if dt_col is not None:
-            dt_parsed_series = try_parse_datetime(df[dt_col].astype(str))
+            dt_parsed_series = try_parse_datetime(df[dt_col].astype(str), check_coverage=not use_index)
 
         n_rows = len(df)
         if args.max_rows_per_file is not None:
@@ -668,7 +691,7 @@ def main():
                 "note_text_deid": text_deid,
                 "dt_raw": dt_raw,
                 "dt_parsed": dt_parsed,
-                "row_idx": i
+                "row_idx": row_ids[i]
             })
 
     if not all_note_rows:
@@ -713,7 +736,7 @@ def main():
         if not os.path.exists(path):
             raise RuntimeError("Encounter file not found: {}".format(path))
 
-        df = read_csv_robust(path)
+        df, row_ids = read_patient_frame(path, patient_id, use_index, args.index_dir)
         pid_col = detect_pid_col(df.columns)
         if pid_col is None:
             raise RuntimeError("Could not detect ENCRYPTED_PAT_ID in encounter file: {}".format(path))
@@ -721,7 +744,7 @@ def main():
         date_cols = detect_encounter_date_cols(df.columns)
         parsed_cols = {}
         for dc in date_cols:
-            parsed_cols[dc] = try_parse_datetime(df[dc].astype(str))
+            parsed_cols[dc] = try_parse_datetime(df[dc].astype(str), check_coverage=not use_index)
 
         n_rows = len(df)
         if args.max_rows_per_file is not None:
@@ -753,7 +776,7 @@ def main():
                 "BEST_EVENT_DT_PARSED": best_dt,
                 "ANCHOR_SOURCE_COL": best_source if best_source else "",
                 "SOURCE_FILE": os.path.basename(path),
-                "ROW_IDX": i
+                "ROW_IDX": row_ids[i]
             }
 
             for want in [
@@ -1,40 +1,52 @@
 # extractors/__init__.py
-from typing import List
+from typing import List, Optional
 
 from models import SectionedNote, Candidate
 
-from .bmi import extract_bmi
-from .smoking import extract_smoking
-from .comorbidity_module import extract_comorbidities
-from .procedures import extract_reconstruction, extract_lymph_node_mgmt
-from .pbs import extract_pbs
-from .mastectomy import extract_mastectomy
-from .age import extract_age
-from .cancer_treatment import extract_cancer_treatment
-from .complications import extract_complication_outcomes
-
-
-
-def extract_all(sec: SectionedNote) -> List[Candidate]:
-    """
-    Run all extractors and return a flat list of candidates.
-    """
-    cands = []  # type: List[Candidate]
-
+from .bmi import extract_bmi, BMI_TRIGGERS
+from .smoking import extract_smoking, SMOKING_TRIGGERS
+from .comorbidity_module import extract_comorbidities, COMORBIDITY_TRIGGERS
+from .procedures import (
+    extract_reconstruction,
+    extract_lymph_node_mgmt,
+    RECONSTRUCTION_TRIGGERS,
+    LYMPH_NODE_TRIGGERS,
+)
+from .pbs import extract_pbs, PBS_TRIGGERS
+from .mastectomy import extract_mastectomy, MASTECTOMY_TRIGGERS
+from .age import extract_age, AGE_TRIGGERS
+from .cancer_treatment import extract_cancer_treatment, CANCER_TREATMENT_TRIGGERS
+from .complications import extract_complication_outcomes, COMPLICATION_TRIGGERS
+from .dispatch import ExtractorDispatcher
+
+
+# (name, extractor, triggers), in output order
+EXTRACTORS = [
     # Tier 1
-    cands.extend(extract_bmi(sec))
-    cands.extend(extract_smoking(sec))
-    cands.extend(extract_comorbidities(sec))
-    cands.extend(extract_reconstruction(sec))
-    cands.extend(extract_lymph_node_mgmt(sec))
+    ("bmi", extract_bmi, BMI_TRIGGERS),
+    ("smoking", extract_smoking, SMOKING_TRIGGERS),
+    ("comorbidities", extract_comorbidities, COMORBIDITY_TRIGGERS),
+    ("reconstruction", extract_reconstruction, RECONSTRUCTION_TRIGGERS),
+    ("lymph_node_mgmt", extract_lymph_node_mgmt, LYMPH_NODE_TRIGGERS),
 
     # Tier 1.5 – shared demographic variable
-    cands.extend(extract_age(sec))
+    ("age", extract_age, AGE_TRIGGERS),
 
     # Tier 2
-    cands.extend(extract_pbs(sec))
-    cands.extend(extract_mastectomy(sec))
-    cands.extend(extract_cancer_treatment(sec))
-    cands.extend(extract_stage1_outcomes(sec))
+    ("pbs", extract_pbs, PBS_TRIGGERS),
+    ("mastectomy", extract_mastectomy, MASTECTOMY_TRIGGERS),
+    ("cancer_treatment", extract_cancer_treatment, CANCER_TREATMENT_TRIGGERS),
+    ("complication_outcomes", extract_complication_outcomes, COMPLICATION_TRIGGERS),
+]
 
-    return cands
+DISPATCHER = ExtractorDispatcher(EXTRACTORS)
+
+
+def extract_all(sec: SectionedNote, dispatcher: Optional[ExtractorDispatcher] = None) -> List[Candidate]:
+    """
+    Run all extractors and return a flat list of candidates.
+
+    Extractors whose triggers do not occur in the note are skipped (they
+    would return nothing); DISPATCHER.summary() reports how often.
+    """
+    return (dispatcher or DISPATCHER).run(sec)
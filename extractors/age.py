@@ -18,6 +18,9 @@ HISTORY_FALSE_POS = re.compile(
     re.IGNORECASE,
 )
 
+# Dispatch triggers (see extractors/dispatch.py): no age pattern, no candidate
+AGE_TRIGGERS = [rx.pattern for rx in AGE_PATTERNS]
+
 PERSON_CUES = re.compile(r"\b(female|male|woman|man|patient|pt)\b", re.IGNORECASE)
 
 # Prefer these sections if present
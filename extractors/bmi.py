@@ -1,7 +1,11 @@
 # extractors/bmi.py
 
 import re
+from bisect import bisect_left
 from models import Candidate
+from .pattern_set import PatternSet
+from .cue_index import cue_index
+from .utils import window_bounds
 
 # ----------------------------------------------
 # BMI extractor
@@ -124,6 +128,10 @@ CONDITIONAL_FALSE_POS = re.compile(
     re.IGNORECASE
 )
 
+# the per-hit window checks above, answered from the section's positions
+THRESHOLD_FALSE_POS_SET = PatternSet([THRESHOLD_FALSE_POS.pattern])
+CONDITIONAL_FALSE_POS_SET = PatternSet([CONDITIONAL_FALSE_POS.pattern])
+
 # -----------------------
 # Height / Weight fallback patterns
 # -----------------------
@@ -174,6 +182,49 @@ WEIGHT_LB_PATTERNS = [
     re.compile(r"\bweight\s*(?:is|=|:)?\s*(\d{2,3}(?:\.\d+)?)\s*(?:lb|lbs|pound|pounds)\b", re.IGNORECASE),
 ]
 
+# -----------------------
+# Fused matcher
+# Every BMI / height / weight pattern in one PatternSet: a single ordered
+# scan per section tells which of them occur, and only those are run with
+# finditer (in list order, so candidates come out exactly as per-pattern
+# scanning gave them).
+# -----------------------
+MEASUREMENT_GROUPS = [
+    ("bmi", BMI_PATTERNS),
+    ("height_m", HEIGHT_M_PATTERNS),
+    ("height_cm", HEIGHT_CM_PATTERNS),
+    ("height_ft_in", HEIGHT_FT_IN_PATTERNS),
+    ("weight_kg", WEIGHT_KG_PATTERNS),
+    ("weight_lb", WEIGHT_LB_PATTERNS),
+]
+
+MEASUREMENT_SET = PatternSet(
+    [rx.pattern for _, patterns in MEASUREMENT_GROUPS for rx in patterns]
+)
+
+
+def _present_patterns(text):
+    """{group: [compiled patterns of that group occurring in text]}"""
+    found = set(MEASUREMENT_SET.matching(text))
+    present = {}
+    i = 0
+    for group, patterns in MEASUREMENT_GROUPS:
+        present[group] = [rx for j, rx in enumerate(patterns) if i + j in found]
+        i += len(patterns)
+    return present
+
+# -----------------------
+# Dispatch triggers (see extractors/dispatch.py)
+# Explicit BMI needs "BMI" / "body mass index"; the height + weight
+# fallback needs a weight ("Wt" / "weight").
+# -----------------------
+BMI_TRIGGERS = [
+    r"\bBMI",
+    r"\bbody\s+mass\s+index",
+    r"\bWt",
+    r"\bweight",
+]
+
 PREFERRED_SECTIONS = set([
     "FULL",
     "OPERATIVE NOTE",
@@ -284,10 +335,12 @@ def _candidate_sort_key(c):
     explicit_bonus = 0 if source_kind == "measured" else 1
     return (explicit_bonus, -conf, -len(evid))
 
-def _find_all_height_candidates(text):
+def _find_all_height_candidates(text, present=None):
+    if present is None:
+        present = _present_patterns(text)
     vals_m = []
 
-    for rx in HEIGHT_M_PATTERNS:
+    for rx in present["height_m"]:
         for m in rx.finditer(text):
             try:
                 h_m = float(m.group(1))
@@ -296,7 +349,7 @@ def _find_all_height_candidates(text):
             if h_m >= 1.0 and h_m <= 2.5:
                 vals_m.append((h_m, m.start(), m.end()))
 
-    for rx in HEIGHT_CM_PATTERNS:
+    for rx in present["height_cm"]:
         for m in rx.finditer(text):
             try:
                 h_cm = float(m.group(1))
@@ -305,7 +358,7 @@ def _find_all_height_candidates(text):
             if h_cm >= 100 and h_cm <= 250:
                 vals_m.append((h_cm / 100.0, m.start(), m.end()))
 
-    for rx in HEIGHT_FT_IN_PATTERNS:
+    for rx in present["height_ft_in"]:
         for m in rx.finditer(text):
             try:
                 ft = float(m.group(1))
@@ -318,10 +371,12 @@ def _find_all_height_candidates(text):
 
     return vals_m
 
-def _find_all_weight_candidates(text):
+def _find_all_weight_candidates(text, present=None):
+    if present is None:
+        present = _present_patterns(text)
     vals_kg = []
 
-    for rx in WEIGHT_KG_PATTERNS:
+    for rx in present["weight_kg"]:
         for m in rx.finditer(text):
             try:
                 w_kg = float(m.group(1))
@@ -330,7 +385,7 @@ def _find_all_weight_candidates(text):
             if w_kg >= 25 and w_kg <= 350:
                 vals_kg.append((w_kg, m.start(), m.end()))
 
-    for rx in WEIGHT_LB_PATTERNS:
+    for rx in present["weight_lb"]:
         for m in rx.finditer(text):
             try:
                 w_lb = float(m.group(1))
@@ -344,25 +399,32 @@ def _find_all_weight_candidates(text):
 def _pair_height_weight(height_candidates, weight_candidates):
     """
     Pair nearest height and weight mentions in same note section.
+    On equal distance the weight listed first wins.
     """
+    # first-listed weight per start offset, offsets sorted for bisect
+    first_at = {}
+    for i, w in enumerate(weight_candidates):
+        first_at.setdefault(w[1], (i, w))
+    starts = sorted(first_at)
+
     pairs = []
     for h_val, h_start, h_end in height_candidates:
+        k = bisect_left(starts, h_start)
         best = None
-        best_dist = None
-        for w_val, w_start, w_end in weight_candidates:
-            dist = abs(h_start - w_start)
-            if best is None or dist < best_dist:
-                best = (w_val, w_start, w_end)
-                best_dist = dist
+        for w_start in starts[max(0, k - 1):k + 1]:
+            i, w = first_at[w_start]
+            key = (abs(h_start - w_start), i)
+            if best is None or key < best[0]:
+                best = (key, w)
         if best is not None:
-            pairs.append((h_val, h_start, h_end, best[0], best[1], best[2], best_dist))
+            (best_dist, _), (w_val, w_start, w_end) = best
+            pairs.append((h_val, h_start, h_end, w_val, w_start, w_end, best_dist))
     return pairs
 
-def _has_explicit_bmi_in_text(text):
-    for rx in BMI_PATTERNS:
-        if rx.search(text):
-            return True
-    return False
+def _has_explicit_bmi_in_text(text, present=None):
+    if present is None:
+        present = _present_patterns(text)
+    return bool(present["bmi"])
 
 def extract_bmi(note):
     """
@@ -380,9 +442,8 @@ def extract_bmi(note):
     explicit_found_anywhere = False
     section_order = _section_order(note)
 
-    # -----------------------
-    # Pass 1: explicit BMI
-    # -----------------------
+    # normalized text and the patterns occurring in it, per section
+    scanned = []
     for section in section_order:
         raw_text = note.sections.get(section, "") or ""
         if not raw_text:
@@ -392,7 +453,13 @@ def extract_bmi(note):
         if not text:
             continue
 
-        for rx in BMI_PATTERNS:
+        scanned.append((section, text, _present_patterns(text)))
+
+    # -----------------------
+    # Pass 1: explicit BMI
+    # -----------------------
+    for section, text, present in scanned:
+        for rx in present["bmi"]:
             for m in rx.finditer(text):
                 raw_val = m.group(1)
 
@@ -406,11 +473,12 @@ def extract_bmi(note):
 
                 ctx = window_around(text, m.start(), m.end(), 160)
                 ctx_low = ctx.lower()
+                a, b = window_bounds(text, m.start(), m.end(), 160)
 
-                if THRESHOLD_FALSE_POS.search(ctx):
+                if cue_index(text).any_in(THRESHOLD_FALSE_POS_SET, a, b):
                     continue
 
-                if CONDITIONAL_FALSE_POS.search(ctx):
+                if cue_index(text).any_in(CONDITIONAL_FALSE_POS_SET, a, b):
                     allow_measured = (
                         ("bmi is " in ctx_low) or
                         ("bmi was " in ctx_low) or
@@ -461,22 +529,16 @@ def extract_bmi(note):
     # Pass 2: compute from height + weight fallback
     # Only if NO explicit BMI found anywhere in note
     # -----------------------
-    for section in section_order:
-        raw_text = note.sections.get(section, "") or ""
-        if not raw_text:
+    for section, text, present in scanned:
+        if _has_explicit_bmi_in_text(text, present):
             continue
 
-        text = _normalize_text(raw_text)
-        if not text:
+        weight_candidates = _find_all_weight_candidates(text, present)
+        if not weight_candidates:
             continue
 
-        if _has_explicit_bmi_in_text(text):
-            continue
-
-        height_candidates = _find_all_height_candidates(text)
-        weight_candidates = _find_all_weight_candidates(text)
-
-        if not height_candidates or not weight_candidates:
+        height_candidates = _find_all_height_candidates(text, present)
+        if not height_candidates:
             continue
 
         pairs = _pair_height_weight(height_candidates, weight_candidates)
@@ -498,8 +560,9 @@ def extract_bmi(note):
             start = min(h_start, w_start)
             end = max(h_end, w_end)
             ctx = window_around(text, start, end, 180)
+            a, b = window_bounds(text, start, end, 180)
 
-            if THRESHOLD_FALSE_POS.search(ctx):
+            if cue_index(text).any_in(THRESHOLD_FALSE_POS_SET, a, b):
                 continue
 
             key = "{0}|{1}|{2}|{3}|{4}|computed".format(
@@ -2,8 +2,12 @@
 # Python 3.6.8 compatible
 
 import re
+from bisect import bisect_left
+from functools import lru_cache
 from models import Candidate, SectionedNote
 from .utils import window_around
+from .pattern_set import PatternSet
+from .cue_index import cue_index
 
 
 SUPPRESS_SECTIONS = {
@@ -193,6 +197,21 @@ PERFORMED_RX = re.compile(
 )
 
 SENT_SPLIT_RX = re.compile(r"(?<=[\.\?\!\;])\s+|\n+")
+CHUNK_SPLIT_RX = re.compile(r"[,:;]|\band\b|\bwith\b", re.IGNORECASE)
+
+# searched over lowered text, so no IGNORECASE
+DIRECT_TO_IMPLANT_RX = re.compile(r"\bdirect[- ]to[- ]implant\b")
+GLUTEAL_ABBREV_RX = re.compile(r"\bsgap\b|\bigap\b")
+FLAP_RANK_RX = re.compile(r"\b(diep|tram|siea|latissimus|sgap|igap|gap\s+flap|gluteal artery perforator)\b")
+EXPANDER_RANK_RX = re.compile(r"\b(expander|implant exchange|expander exchange|tissue expander)\b")
+
+# "(left|lt).{0,120}(cancer|...)" without the backtracking span: a side
+# word, then a cancer term starting at most SIDE_CANCER_SPAN characters
+# after it on the same line (see _side_then_cancer)
+SIDE_LEFT_RX = re.compile(r"left|lt")
+SIDE_RIGHT_RX = re.compile(r"right|rt")
+SIDE_CANCER_TERM_RX = re.compile(r"(?=cancer|carcinoma|dcis|lcis|idc|ilc|malignan|invasive|recurrent)")
+SIDE_CANCER_SPAN = 120
 
 
 def _is_operation_note(note_type):
@@ -243,15 +262,78 @@ def _window(text, start, end, width=160):
     return text[lo:hi]
 
 
-def _split_sentences(text):
-    if not text:
-        return []
-    parts = SENT_SPLIT_RX.split(text)
-    return [p.strip() for p in parts if p and p.strip()]
+def _stripped_spans(text, rx, start, end):
+    # offsets of the non-blank, stripped pieces of rx.split(text[start:end])
+    spans = []
+    at = start
+    for m in rx.finditer(text, start, end):
+        _add_stripped_span(text, at, m.start(), spans)
+        at = m.end()
+    _add_stripped_span(text, at, end, spans)
+    return spans
+
+
+def _add_stripped_span(text, start, end, spans):
+    piece = text[start:end]
+    stripped = piece.strip()
+    if stripped:
+        lo = start + len(piece) - len(piece.lstrip())
+        spans.append((lo, lo + len(stripped)))
+
+
+class _TextAnalysis:
+    """
+    One text as the indication and recon-type helpers read it: lowered
+    once, with its sentences and each sentence's chunks split on first use.
+
+    sentences() gives the stripped, non-blank pieces of SENT_SPLIT_RX.split,
+    or the whole text if there are none; chunks(i) splits sentence i the
+    same way on CHUNK_SPLIT_RX, or keeps it whole. Both are lists of
+    (piece, lowered piece) pairs.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.low = text.lower()
+        # str.lower() maps a few characters to two, and capital sigma by
+        # context; slices of self.low are then not the lowered slices
+        self._aligned = len(self.low) == len(text) and "\u03a3" not in text
+        self._sentence_spans = None
+        self._sentences = None
+        self._chunks = {}
+
+    def _pieces(self, spans):
+        if self._aligned:
+            return [(self.text[a:b], self.low[a:b]) for a, b in spans]
+        return [(self.text[a:b], self.text[a:b].lower()) for a, b in spans]
+
+    def sentences(self):
+        if self._sentences is None:
+            spans = _stripped_spans(self.text, SENT_SPLIT_RX, 0, len(self.text)) if self.text else []
+            self._sentence_spans = spans or [(0, len(self.text))]
+            self._sentences = self._pieces(self._sentence_spans)
+        return self._sentences
+
+    def chunks(self, i):
+        out = self._chunks.get(i)
+        if out is None:
+            self.sentences()
+            start, end = self._sentence_spans[i]
+            # a stripped sentence sits between non-word characters, so \b
+            # at its edges reads the same in the whole text
+            spans = _stripped_spans(self.text, CHUNK_SPLIT_RX, start, end)
+            out = self._pieces(spans or [(start, end)])
+            self._chunks[i] = out
+        return out
+
+
+@lru_cache(maxsize=64)
+def _analysis(text):
+    return _TextAnalysis(text)
 
 
 def _infer_laterality(text):
-    low = (text or "").lower()
+    low = _analysis(text).low if text else ""
     if BILAT_RX.search(low):
         return "BILATERAL"
     has_left = bool(LEFT_RX.search(low))
@@ -265,16 +347,6 @@ def _infer_laterality(text):
     return None
 
 
-def _chunk_sentence(text):
-    parts = re.split(r"[,:;]|\band\b|\bwith\b", text, flags=re.IGNORECASE)
-    out = []
-    for p in parts:
-        s = p.strip()
-        if s:
-            out.append(s)
-    return out if out else [text]
-
-
 def _contains_side(text, side):
     if side == "LEFT":
         return bool(LEFT_RX.search(text)) or bool(BILAT_RX.search(text))
@@ -311,40 +383,37 @@ def _is_operative_section(section):
     return False
 
 
-def _local_negated(text, start=None, end=None, width=80):
+# the mention-window checks below search these over the lowered section;
+# its cue positions are indexed once (see cue_index.py)
+NEGATION_SET = PatternSet([NEGATION_RX.pattern])
+PLANNED_SET = PatternSet([PLANNED_RX.pattern])
+HISTORY_ONLY_SET = PatternSet([HISTORY_ONLY_RX.pattern])
+
+
+def _cue_near(cues, text, start, end, width, after):
     if text is None:
         return False
-    low = text.lower()
     if start is None or end is None:
-        return bool(NEGATION_RX.search(low))
+        return cues.has_any(text.lower())
     lo = max(0, start - width)
-    hi = min(len(low), end + 20)
-    ctx = low[lo:hi]
-    return bool(NEGATION_RX.search(ctx))
+    hi = min(len(text), end + after)
+    idx = cue_index(text, lower=True)
+    if idx is None:
+        low = text.lower()
+        return cues.has_any(low[lo:min(len(low), end + after)])
+    return idx.any_in(cues, lo, hi)
+
+
+def _local_negated(text, start=None, end=None, width=80):
+    return _cue_near(NEGATION_SET, text, start, end, width, 20)
 
 
 def _local_planned(text, start=None, end=None, width=80):
-    if text is None:
-        return False
-    low = text.lower()
-    if start is None or end is None:
-        return bool(PLANNED_RX.search(low))
-    lo = max(0, start - width)
-    hi = min(len(low), end + 40)
-    ctx = low[lo:hi]
-    return bool(PLANNED_RX.search(ctx))
+    return _cue_near(PLANNED_SET, text, start, end, width, 40)
 
 
 def _history_only_context(text, start=None, end=None, width=80):
-    if text is None:
-        return False
-    low = text.lower()
-    if start is None or end is None:
-        return bool(HISTORY_ONLY_RX.search(low))
-    lo = max(0, start - width)
-    hi = min(len(low), end + 40)
-    ctx = low[lo:hi]
-    return bool(HISTORY_ONLY_RX.search(ctx))
+    return _cue_near(HISTORY_ONLY_SET, text, start, end, width, 40)
 
 
 def _looks_negated_or_planned(ctx, op_note):
@@ -356,8 +425,7 @@ def _looks_negated_or_planned(ctx, op_note):
     return False
 
 
-def _indication_vote(sentence, chunk, side):
-    low = chunk.lower()
+def _indication_vote(chunk, low, side):
     if not _contains_side(chunk, side):
         return None
 
@@ -374,26 +442,31 @@ def _indication_vote(sentence, chunk, side):
     return None
 
 
+def _side_then_cancer(low, side_rx):
+    terms = [m.start() for m in SIDE_CANCER_TERM_RX.finditer(low)]
+    if not terms:
+        return False
+    for m in side_rx.finditer(low):
+        # side words cannot overlap, so finditer sees every one
+        i = bisect_left(terms, m.end())
+        if i < len(terms) and terms[i] - m.end() <= SIDE_CANCER_SPAN and "\n" not in low[m.end():terms[i]]:
+            return True
+    return False
+
+
 def _infer_indications_local(text, lat):
-    low = (text or "").lower()
+    doc = _analysis(text)
+    low = doc.low
     left_votes = []
     right_votes = []
 
-    sentences = _split_sentences(text)
-    if not sentences:
-        sentences = [text]
-
-    for sent in sentences:
-        sent_low = sent.lower()
+    for i, (sent, sent_low) in enumerate(doc.sentences()):
         if not MASTECTOMY_RX.search(sent_low) and not CANCER_RX.search(sent_low) and not PROPHYLAXIS_RX.search(sent_low):
             continue
-        chunks = _chunk_sentence(sent)
-
-        for chunk in chunks:
-            chunk_low = chunk.lower()
 
-            left_vote = _indication_vote(sent, chunk, "LEFT")
-            right_vote = _indication_vote(sent, chunk, "RIGHT")
+        for chunk, chunk_low in doc.chunks(i):
+            left_vote = _indication_vote(chunk, chunk_low, "LEFT")
+            right_vote = _indication_vote(chunk, chunk_low, "RIGHT")
 
             if left_vote is not None:
                 left_votes.append(left_vote)
@@ -401,8 +474,8 @@ def _infer_indications_local(text, lat):
                 right_votes.append(right_vote)
 
             if "contralateral prophylactic" in chunk_low:
-                left_cancer = bool(re.search(r"(left|lt).{0,120}(cancer|carcinoma|dcis|lcis|idc|ilc|malignan|invasive|recurrent)", sent_low))
-                right_cancer = bool(re.search(r"(right|rt).{0,120}(cancer|carcinoma|dcis|lcis|idc|ilc|malignan|invasive|recurrent)", sent_low))
+                left_cancer = _side_then_cancer(sent_low, SIDE_LEFT_RX)
+                right_cancer = _side_then_cancer(sent_low, SIDE_RIGHT_RX)
 
                 if left_cancer and not right_cancer:
                     left_votes.append("Therapeutic")
@@ -436,8 +509,9 @@ def _infer_indications_local(text, lat):
     return _resolve(left_votes), _resolve(right_votes)
 
 
-def _infer_recon_type_and_class(text):
-    low = (text or "").lower()
+def _infer_recon_type_and_class(text, low=None):
+    if low is None:
+        low = (text or "").lower()
 
     flap_types_found = []
     if "diep" in low:
@@ -446,7 +520,7 @@ def _infer_recon_type_and_class(text):
         flap_types_found.append("TRAM")
     if "siea" in low:
         flap_types_found.append("SIEA")
-    if ("gluteal artery perforator" in low or "gap flap" in low or re.search(r"\bsgap\b", low) or re.search(r"\bigap\b", low)):
+    if ("gluteal artery perforator" in low or "gap flap" in low or GLUTEAL_ABBREV_RX.search(low)):
         flap_types_found.append("gluteal artery perforator flap")
     if "latissimus" in low:
         flap_types_found.append("latissimus dorsi")
@@ -458,7 +532,7 @@ def _infer_recon_type_and_class(text):
         ("mixed flaps" in low)
     )
 
-    has_direct_to_implant = bool(re.search(r"\bdirect[- ]to[- ]implant\b", low))
+    has_direct_to_implant = bool(DIRECT_TO_IMPLANT_RX.search(low))
     has_expander = (
         ("tissue expander" in low) or
         ("expander" in low) or
@@ -509,14 +583,10 @@ def _infer_recon_type_and_class(text):
 
 
 def _best_local_recon_type_and_class(text):
-    sentences = _split_sentences(text)
-    if not sentences:
-        sentences = [text]
-
+    doc = _analysis(text)
     ranked_hits = []
 
-    for sent in sentences:
-        sent_low = sent.lower()
+    for sent, sent_low in doc.sentences():
         if not RECON_RX.search(sent_low):
             continue
 
@@ -525,16 +595,16 @@ def _best_local_recon_type_and_class(text):
         if _local_planned(sent_low) and not MASTECTOMY_RX.search(sent_low):
             continue
 
-        rtype, rclass = _infer_recon_type_and_class(sent)
+        rtype, rclass = _infer_recon_type_and_class(sent, sent_low)
         if rtype is None and rclass is None:
             continue
 
         rank = 5
-        if re.search(r"\bdirect[- ]to[- ]implant\b", sent_low):
+        if DIRECT_TO_IMPLANT_RX.search(sent_low):
             rank = 1
-        elif re.search(r"\b(diep|tram|siea|latissimus|sgap|igap|gap\s+flap|gluteal artery perforator)\b", sent_low):
+        elif FLAP_RANK_RX.search(sent_low):
             rank = 1
-        elif re.search(r"\b(expander|implant exchange|expander exchange|tissue expander)\b", sent_low):
+        elif EXPANDER_RANK_RX.search(sent_low):
             rank = 2
         elif "reconstruction" in sent_low:
             rank = 3
@@ -542,10 +612,10 @@ def _best_local_recon_type_and_class(text):
         ranked_hits.append((rank, sent, rtype, rclass))
 
     if not ranked_hits:
-        return _infer_recon_type_and_class(text)
+        return _infer_recon_type_and_class(text, doc.low)
 
-    ranked_hits = sorted(ranked_hits, key=lambda x: x[0])
-    _, _, rtype, rclass = ranked_hits[0]
+    # first of the best rank, as a stable sort would give
+    _, _, rtype, rclass = min(ranked_hits, key=lambda x: x[0])
     return rtype, rclass
 
 
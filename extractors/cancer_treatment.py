@@ -3,14 +3,17 @@ import re
 from typing import List
 
 from models import Candidate, SectionedNote
-from config import NEGATION_CUES, PLANNED_CUES, PERFORMED_CUES
 from config import (
     TREATMENT_CONSIDERATION_EXCLUDE,
     TREATMENT_NA_EXCLUDE,
     RADIATION_CONTEXT_EXCLUDE,
     NON_BREAST_CANCER_CUES,
 )
-from .utils import window_around, classify_status, find_first, should_skip_block, has_any
+from .pattern_set import PatternSet
+from .utils import (
+    window_around, classify_status, find_first, should_skip_block,
+    NEGATION_CUE_SET, PLANNED_CUE_SET, PERFORMED_CUE_SET,
+)
 
 RADIATION_POS = [
     r"\bradiation\b",
@@ -45,6 +48,9 @@ ENDOCRINE_EXCLUDE = [
     r"\baromasin\b",
 ]
 
+# Dispatch triggers (see extractors/dispatch.py)
+CANCER_TREATMENT_TRIGGERS = RADIATION_POS + CHEMO_POS
+
 # extra high-FP phrases to block (very common in onc templates)
 HARD_BLOCK_CUES = [
     r"\bcandidate\b.*\bchemo\b",
@@ -55,8 +61,20 @@ HARD_BLOCK_CUES = [
     r"\bto\s+start\b.*\bchemo\b",
 ]
 
+# The lists above and in config.py, fused once (see extractors/pattern_set.py).
+# Flags follow the original calls: has_any()/find_first() were
+# case-insensitive, the bare re.search() loops over `low` were not.
+RADIATION_POS_SET = PatternSet(RADIATION_POS)
+CHEMO_POS_SET = PatternSet(CHEMO_POS)
+ENDOCRINE_EXCLUDE_SET = PatternSet(ENDOCRINE_EXCLUDE, 0)
+HARD_BLOCK_CUE_SET = PatternSet(HARD_BLOCK_CUES, 0)
+TREATMENT_NA_SET = PatternSet(TREATMENT_NA_EXCLUDE)
+TREATMENT_CONSIDERATION_SET = PatternSet(TREATMENT_CONSIDERATION_EXCLUDE)
+RADIATION_CONTEXT_SET = PatternSet(RADIATION_CONTEXT_EXCLUDE)
+NON_BREAST_CANCER_SET = PatternSet(NON_BREAST_CANCER_CUES)
+
 
-def _extract_flag(field: str, pos_patterns: List[str], note: SectionedNote) -> List[Candidate]:
+def _extract_flag(field: str, pos_patterns: PatternSet, note: SectionedNote) -> List[Candidate]:
     cands: List[Candidate] = []
 
     for section, text in note.sections.items():
@@ -74,27 +92,27 @@ def _extract_flag(field: str, pos_patterns: List[str], note: SectionedNote) -> L
         low = evid.lower()
 
         # n/a / none templates
-        if has_any(TREATMENT_NA_EXCLUDE, low):
+        if TREATMENT_NA_SET.has_any(low):
             continue
 
         # consideration/planning
-        if has_any(TREATMENT_CONSIDERATION_EXCLUDE, low):
+        if TREATMENT_CONSIDERATION_SET.has_any(low):
             continue
-        if any(re.search(p, low) for p in HARD_BLOCK_CUES):
+        if HARD_BLOCK_CUE_SET.has_any(low):
             continue
 
         # radiation context excludes
         if field == "Radiation":
-            if has_any(RADIATION_CONTEXT_EXCLUDE, low):
+            if RADIATION_CONTEXT_SET.has_any(low):
                 continue
 
         # endocrine-only should not count as chemo
         if field == "Chemo":
-            if any(re.search(p, low) for p in ENDOCRINE_EXCLUDE):
+            if ENDOCRINE_EXCLUDE_SET.has_any(low):
                 if not re.search(r"\bchemo\b|\bchemotherapy\b", low):
                     continue
 
-        status = classify_status(text, m.start(), m.end(), PERFORMED_CUES, PLANNED_CUES, NEGATION_CUES)
+        status = classify_status(text, m.start(), m.end(), PERFORMED_CUE_SET, PLANNED_CUE_SET, NEGATION_CUE_SET)
         if status in {"planned", "denied"}:
             continue
         if status == "performed":
@@ -113,7 +131,7 @@ def _extract_flag(field: str, pos_patterns: List[str], note: SectionedNote) -> L
         ))
 
         # QA: possible non-breast context
-        if has_any(NON_BREAST_CANCER_CUES, low):
+        if NON_BREAST_CANCER_SET.has_any(low):
             cands.append(Candidate(
                 field=field + "_NonBreastContext",
                 value=True,
@@ -131,6 +149,6 @@ def _extract_flag(field: str, pos_patterns: List[str], note: SectionedNote) -> L
 
 def extract_cancer_treatment(note: SectionedNote) -> List[Candidate]:
     cands: List[Candidate] = []
-    cands += _extract_flag("Radiation", RADIATION_POS, note)
-    cands += _extract_flag("Chemo", CHEMO_POS, note)
+    cands += _extract_flag("Radiation", RADIATION_POS_SET, note)
+    cands += _extract_flag("Chemo", CHEMO_POS_SET, note)
     return cands
@@ -5,6 +5,7 @@ import re
 from typing import List
 
 from models import Candidate, SectionedNote
+from .pattern_set import PatternSet, pattern_set
 from .utils import window_around
 
 # ---------------------------------
@@ -185,6 +186,16 @@ DM_MED_STRONG = [
     r"\bmetformin\b",
 ]
 
+# The lists above, fused once (see extractors/pattern_set.py)
+CONCEPT_SETS = {
+    field: {"pos": PatternSet(cfg["pos"]), "exclude": PatternSet(cfg["exclude"])}
+    for field, cfg in CONCEPTS.items()
+}
+DM_MED_STRONG_SET = PatternSet(DM_MED_STRONG)
+
+# Dispatch triggers (see extractors/dispatch.py)
+COMORBIDITY_TRIGGERS = [p for cfg in CONCEPTS.values() for p in cfg["pos"]] + DM_MED_STRONG
+
 # ---------------------------------
 # Helpers
 # ---------------------------------
@@ -228,19 +239,11 @@ def _family_context(evid):
     return bool(FAMILY_RX.search(evid))
 
 def _has_any(patterns, text):
-    for p in patterns:
-        if re.search(p, text, re.IGNORECASE):
-            return True
-    return False
+    return pattern_set(patterns).has_any(text)
 
 def _find_first(patterns, text):
-    best = None
-    for p in patterns:
-        m = re.search(p, text, re.IGNORECASE)
-        if m:
-            if best is None or m.start() < best.start():
-                best = m
-    return best
+    # earliest match of any pattern; ties go to the first listed
+    return pattern_set(patterns).search(text)
 
 def _status_from_context(evid):
     low = evid.lower()
@@ -263,7 +266,7 @@ def _concept_confidence(section, base):
 # ---------------------------------
 
 def _extract_concept(field, note):
-    cfg = CONCEPTS[field]
+    cfg = CONCEPT_SETS[field]
     cands = []
 
     for section, text in _iter_sections(note):
@@ -277,7 +280,7 @@ def _extract_concept(field, note):
         if _family_context(low):
             continue
 
-        if cfg.get("exclude") and _has_any(cfg["exclude"], low):
+        if len(cfg["exclude"]) and _has_any(cfg["exclude"], low):
             continue
 
         if field == "VenousThromboembolism" and VTE_PROPHYLAXIS_RX.search(low):
@@ -312,7 +315,7 @@ def _extract_diabetes_med_inference(note):
     cands = []
 
     for section, text in _iter_sections(note):
-        m = _find_first(DM_MED_STRONG, text)
+        m = _find_first(DM_MED_STRONG_SET, text)
         if not m:
             continue
 
@@ -321,7 +324,7 @@ def _extract_diabetes_med_inference(note):
 
         if _family_context(low):
             continue
-        if _has_any(CONCEPTS["Diabetes"]["exclude"], low):
+        if _has_any(CONCEPT_SETS["Diabetes"]["exclude"], low):
             continue
         if _is_negated(low):
             continue
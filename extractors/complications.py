@@ -5,6 +5,7 @@ import re
 from typing import List
 
 from models import Candidate, SectionedNote
+from .pattern_set import PatternSet, pattern_set
 from .utils import window_around
 
 
@@ -268,6 +269,19 @@ REVISION_POS = [
 ]
 
 
+# The lists above, fused once (see extractors/pattern_set.py)
+MINOR_COMP_SET = PatternSet(MINOR_COMP_POS)
+REOP_PROCEDURE_SET = PatternSet(REOP_PROCEDURE_POS)
+REHOSP_SET = PatternSet(REHOSP_POS)
+FAILURE_REMOVAL_SET = PatternSet(FAILURE_REMOVAL_POS)
+REVISION_SET = PatternSet(REVISION_POS)
+
+# Dispatch triggers (see extractors/dispatch.py)
+COMPLICATION_TRIGGERS = (
+    MINOR_COMP_POS + REOP_PROCEDURE_POS + REHOSP_POS + FAILURE_REMOVAL_POS + REVISION_POS
+)
+
+
 # --------------------------------------------------
 # Helpers
 # --------------------------------------------------
@@ -293,13 +307,8 @@ def _iter_sections(note):
 
 
 def _find_first(patterns, text):
-    best = None
-    for p in patterns:
-        m = re.search(p, text, re.IGNORECASE)
-        if m:
-            if best is None or m.start() < best.start():
-                best = m
-    return best
+    # earliest match of any pattern; ties go to the first listed
+    return pattern_set(patterns).search(text)
 
 
 def _is_negated(evid):
@@ -376,7 +385,7 @@ def _extract_minor_comp(note):
     cands = []  # type: List[Candidate]
 
     for section, text in _iter_sections(note):
-        m = _find_first(MINOR_COMP_POS, text)
+        m = _find_first(MINOR_COMP_SET, text)
         if not m:
             continue
 
@@ -420,7 +429,7 @@ def _extract_reoperation(note):
     cands = []  # type: List[Candidate]
 
     for section, text in _iter_sections(note):
-        m = _find_first(REOP_PROCEDURE_POS, text)
+        m = _find_first(REOP_PROCEDURE_SET, text)
         if not m:
             continue
 
@@ -461,7 +470,7 @@ def _extract_rehospitalization(note):
     cands = []  # type: List[Candidate]
 
     for section, text in _iter_sections(note):
-        m = _find_first(REHOSP_POS, text)
+        m = _find_first(REHOSP_SET, text)
         if not m:
             continue
 
@@ -493,7 +502,7 @@ def _extract_failure(note):
     cands = []  # type: List[Candidate]
 
     for section, text in _iter_sections(note):
-        m = _find_first(FAILURE_REMOVAL_POS, text)
+        m = _find_first(FAILURE_REMOVAL_SET, text)
         if not m:
             continue
 
@@ -531,7 +540,7 @@ def _extract_revision(note):
     cands = []  # type: List[Candidate]
 
     for section, text in _iter_sections(note):
-        m = _find_first(REVISION_POS, text)
+        m = _find_first(REVISION_SET, text)
         if not m:
             continue
 
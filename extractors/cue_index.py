@@ -0,0 +1,151 @@
+# extractors/cue_index.py
+# Python 3.6.8 compatible
+#
+# Per-note cue positions for window status checks.
+#
+# classify_status() and the pbs / breast_cancer_recon negation helpers cut
+# a window around every mention and re-run their cue regexes over it. A
+# CueIndex instead scans the note once per cue set, keeps the sorted match
+# positions, and answers "does any cue match in text[lo:hi]" with a bisect.
+#
+# Answers are exactly cues.has_any(text[lo:hi]). A match that lies strictly
+# inside the window reads the same characters (and \b neighbours) in the
+# window as in the note, so the recorded positions settle it. Only the two
+# window edges behave differently: a word cut at the edge ("not" out of
+# "notable") can match in the window but not in the note. Those are
+# re-checked on the window itself: an anchored match at lo, and a search
+# over the last few characters before hi, as many as the widest cue spans.
+#
+# That needs a bounded cue width, counting a run of whitespace or of digits
+# as one character ("status\s+post", "BMI\s*>\s*\d+"); sets with other
+# unbounded repeats, lookarounds or anchors are not indexed and fall back to
+# searching the window.
+
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+
+from .pattern_set import PatternSet
+
+# a whitespace or digit run counts as one unit of cue width
+_RUN_REPEAT_RX = re.compile(r"(?<!\\)(\\s|\\d| )[+*]\??")
+_UNINDEXABLE_RX = re.compile(r"\(\?[=!<]|(?<!\\)[$]|\\[AZ]|(?<![\\\[])\^")
+# the chars a whitespace or digit run has beyond its first
+_RUN_EXTRA_RX = re.compile(r"(?<=\s)\s|(?<=\d)\d")
+_RUN_PAIR_RX = re.compile(r"\s\s|\d\d")
+
+
+def _cue_width(pattern: str, flags: int) -> Optional[int]:
+    """Max width of one cue with runs as one char, or None if unbounded."""
+    if _UNINDEXABLE_RX.search(pattern):
+        return None
+    collapsed = _RUN_REPEAT_RX.sub(lambda m: "\\s" if m.group(1) == " " else m.group(1), pattern)
+    lo, hi = sre_parse.parse(collapsed, flags).getwidth()
+    if lo == 0 or hi >= sre_parse.MAXREPEAT:
+        return None
+    return hi
+
+
+_WIDTHS = {}
+
+
+def cue_set_width(cues: PatternSet) -> Optional[int]:
+    """Widest cue of the set, or None if the set cannot be indexed."""
+    if cues not in _WIDTHS:
+        widths = [_cue_width(p, cues.flags) for p in cues.patterns]
+        _WIDTHS[cues] = None if (not widths or None in widths) else max(widths)
+    return _WIDTHS[cues]
+
+
+class CueIndex:
+    """
+    idx = CueIndex(text)
+    idx.any_in(NEGATION_CUE_SET, lo, hi)   # == NEGATION_CUE_SET.has_any(text[lo:hi])
+
+    Cue positions are found on first use of each PatternSet.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self._positions = {}
+        self._runs = _RUN_PAIR_RX.search(text) is not None
+
+    def positions(self, cues: PatternSet) -> Tuple[List[int], List[int]]:
+        """(starts, ends): every position a cue matches at, with its match end."""
+        pos = self._positions.get(cues)
+        if pos is None:
+            starts = []  # type: List[int]
+            ends = []  # type: List[int]
+            at = 0
+            while True:
+                m = cues.any_match(self.text, at)
+                if m is None:
+                    break
+                starts.append(m.start())
+                ends.append(m.end())
+                at = m.start() + 1
+            pos = (starts, ends)
+            self._positions[cues] = pos
+        return pos
+
+    def _tail_start(self, lo: int, hi: int, width: int) -> int:
+        # left of this, nothing of at most `width` units can reach hi
+        need = width + 1
+        start = hi - need
+        if self._runs:
+            while start > lo:
+                extra = len(_RUN_EXTRA_RX.findall(self.text, start, hi))
+                wider = hi - need - extra
+                if wider >= start:
+                    break
+                start = wider
+        return max(start, lo)
+
+    def any_in(self, cues: PatternSet, lo: int, hi: int) -> bool:
+        """True if any cue of the set matches in text[lo:hi]."""
+        width = cue_set_width(cues)
+        tail = lo if width is None else self._tail_start(lo, hi, width)
+        if tail <= lo + 1:
+            return cues.has_any(self.text[lo:hi])
+
+        starts, ends = self.positions(cues)
+        i = bisect_right(starts, lo)
+        while i < len(starts) and starts[i] < tail:
+            if ends[i] < hi:
+                return True
+            i += 1
+
+        if cues.any_match_at_start(self.text[lo:hi]) is not None:
+            return True
+        return cues.any_match(self.text, tail, hi) is not None
+
+
+def _position_preserving_lower(text: str) -> Optional[str]:
+    # str.lower() maps a few characters to two, and capital sigma by context
+    low = text.lower()
+    if len(low) != len(text) or "\u03a3" in text:
+        return None
+    return low
+
+
+@lru_cache(maxsize=64)
+def cue_index(text: str, lower: bool = False, newlines: bool = True) -> Optional[CueIndex]:
+    """
+    CueIndex over text as the window checks see it: lowercased if `lower`,
+    with newlines turned into spaces (window_around) unless `newlines`.
+    None when lowercasing would shift character positions; callers then
+    search their windows directly.
+    """
+    if not newlines:
+        text = text.replace("\n", " ")
+    if lower:
+        text = _position_preserving_lower(text)
+        if text is None:
+            return None
+    return CueIndex(text)
@@ -0,0 +1,106 @@
+# extractors/dispatch.py
+# Python 3.6.8 compatible
+#
+# Trigger-keyword dispatch for extract_all().
+#
+# An extractor can only emit a candidate for a note in which one of its own
+# patterns matches, so each extractor module declares that vocabulary as a
+# *_TRIGGERS list of regexes (case-insensitive, searched over the section
+# texts). A trigger list must be necessary, not sufficient: every note the
+# extractor would return candidates for has to match one of them.
+#
+# ExtractorDispatcher compiles all trigger lists into one alternation, one
+# named group per extractor, and scans each note once to find which
+# extractors fire; only those are called. Skipped extractors are counted so
+# summary() can report skip rates.
+
+import re
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+
+from models import Candidate, SectionedNote
+
+# (name, extractor, trigger regexes or None to run on every note)
+ExtractorSpec = Tuple[str, Callable[[SectionedNote], List[Candidate]], Optional[Sequence[str]]]
+
+
+def trigger_text(note: SectionedNote) -> str:
+    """The text triggers are searched in: every section, one per line."""
+    return "\n".join(v or "" for v in note.sections.values())
+
+
+class ExtractorDispatcher:
+    """
+    dispatcher = ExtractorDispatcher([("bmi", extract_bmi, BMI_TRIGGERS), ...])
+    cands = dispatcher.run(note)
+    print(dispatcher.summary())
+
+    Candidates come back in spec order, exactly as if every extractor had
+    been called.
+    """
+
+    def __init__(self, specs: Iterable[ExtractorSpec]):
+        self.specs = list(specs)
+        names = [name for name, _, _ in self.specs]
+        if len(set(names)) != len(names):
+            raise ValueError("Duplicate extractor names: {0}".format(names))
+        for name in names:
+            if not name.isidentifier():
+                raise ValueError("Extractor name {0!r} is not a valid regex group name".format(name))
+
+        self._triggers = {}  # type: Dict[str, str]
+        for name, _, triggers in self.specs:
+            if triggers is not None:
+                self._triggers[name] = "|".join("(?:{0})".format(t) for t in triggers)
+        self._scanners = {}  # type: Dict[FrozenSet[str], object]
+
+        self.notes = 0
+        self.runs = dict.fromkeys(names, 0)  # type: Dict[str, int]
+        self.skips = dict.fromkeys(names, 0)  # type: Dict[str, int]
+
+    def _scanner(self, names: FrozenSet[str]):
+        rx = self._scanners.get(names)
+        if rx is None:
+            # spec order, so the pattern (and its compiled form) is stable
+            alts = ["(?P<{0}>{1})".format(name, self._triggers[name])
+                    for name, _, _ in self.specs if name in names]
+            rx = re.compile("|".join(alts), re.IGNORECASE)
+            self._scanners[names] = rx
+        return rx
+
+    def triggered(self, text: str) -> Set[str]:
+        """Names of the extractors whose triggers occur in text."""
+        fired = set(name for name, _, triggers in self.specs if triggers is None)
+        pending = frozenset(self._triggers)
+        pos = 0
+        while pending:
+            m = self._scanner(pending).search(text, pos)
+            if m is None:
+                break
+            fired.add(m.lastgroup)
+            pending = pending - {m.lastgroup}
+            # another extractor's trigger may match at the same position
+            pos = m.start()
+        return fired
+
+    def run(self, note: SectionedNote) -> List[Candidate]:
+        fired = self.triggered(trigger_text(note))
+        self.notes += 1
+        cands = []  # type: List[Candidate]
+        for name, fn, _ in self.specs:
+            if name in fired:
+                self.runs[name] += 1
+                cands.extend(fn(note))
+            else:
+                self.skips[name] += 1
+        return cands
+
+    def skip_rates(self) -> Dict[str, float]:
+        return {name: (self.skips[name] / float(self.notes) if self.notes else 0.0)
+                for name, _, _ in self.specs}
+
+    def summary(self) -> str:
+        rates = self.skip_rates()
+        return "notes={0}; skipped: {1}".format(
+            self.notes,
+            ", ".join("{0} {1:.1%}".format(name, rates[name]) for name, _, _ in self.specs),
+        )
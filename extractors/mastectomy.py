@@ -3,11 +3,14 @@ import re
 from typing import List
 
 from models import Candidate, SectionedNote
-from config import NEGATION_CUES, PLANNED_CUES, PERFORMED_CUES
-from .utils import window_around, classify_status
+from .pattern_set import PatternSet
+from .utils import window_around, classify_status, NEGATION_CUE_SET, PLANNED_CUE_SET, PERFORMED_CUE_SET
 
 MASTECTOMY_RX = re.compile(r"\bmastectomy\b", re.IGNORECASE)
 
+# Dispatch triggers (see extractors/dispatch.py)
+MASTECTOMY_TRIGGERS = [MASTECTOMY_RX.pattern]
+
 MASTECTOMY_TYPE_PATTERNS = [
     (r"\bnipple[- ]sparing\b", "nipple-sparing"),
     (r"\bskin[- ]sparing\b", "skin-sparing"),
@@ -16,6 +19,7 @@ MASTECTOMY_TYPE_PATTERNS = [
     (r"\bmodified\s+radical\b|\bMRM\b", "modified radical"),
     (r"\bradical\s+mastectomy\b", "radical"),
 ]
+MASTECTOMY_TYPE_SET = PatternSet([pat for pat, _ in MASTECTOMY_TYPE_PATTERNS])
 
 # High-FP template phrases
 TEMPLATE_EXCLUDES = [
@@ -24,6 +28,7 @@ TEMPLATE_EXCLUDES = [
     r"\bscheduled for\b",
     r"\bdiscussed\b.*\bmastectomy\b",
 ]
+TEMPLATE_EXCLUDE_SET = PatternSet(TEMPLATE_EXCLUDES, 0)
 
 # Context cues that indicate it actually happened
 PERFORMED_CONTEXT = re.compile(r"\b(performed|underwent|completed|status post|s/p)\b", re.IGNORECASE)
@@ -45,10 +50,8 @@ def _infer_laterality(ctx: str):
 
 
 def _infer_type(ctx: str):
-    for pat, label in MASTECTOMY_TYPE_PATTERNS:
-        if re.search(pat, ctx, re.IGNORECASE):
-            return label
-    return None
+    i = MASTECTOMY_TYPE_SET.index_in_order(ctx)
+    return None if i is None else MASTECTOMY_TYPE_PATTERNS[i][1]
 
 
 def extract_mastectomy(note: SectionedNote) -> List[Candidate]:
@@ -63,12 +66,12 @@ def extract_mastectomy(note: SectionedNote) -> List[Candidate]:
             low = ctx.lower()
 
             # exclude template/plan-y contexts
-            if any(re.search(p, low) for p in TEMPLATE_EXCLUDES):
+            if TEMPLATE_EXCLUDE_SET.has_any(low):
                 # allow if op note OR explicit performed cue in same window
                 if not (str(note.note_type).lower() in {"op note", "operation notes", "brief op notes"} or PERFORMED_CONTEXT.search(ctx)):
                     continue
 
-            status = classify_status(text, m.start(), m.end(), PERFORMED_CUES, PLANNED_CUES, NEGATION_CUES)
+            status = classify_status(text, m.start(), m.end(), PERFORMED_CUE_SET, PLANNED_CUE_SET, NEGATION_CUE_SET)
 
             # op-note default: if not denied/planned, treat as performed
             if str(note.note_type).lower() in {"op note", "operation notes", "brief op notes"} and status not in {"denied", "planned"}:
@@ -0,0 +1,168 @@
+# extractors/pattern_set.py
+# Python 3.6.8 compatible
+#
+# PatternSet: a list of regex strings (the config.py cue lists, an
+# extractor's *_POS lists, ...) compiled once into a single alternation, so
+# "does any of them match", "which one matches first" and "which ones
+# match" each take one scan of the text instead of one re.search() per
+# pattern.
+#
+# The alternation is non-capturing (capturing groups make re's matcher
+# several times slower); which pattern matched is settled afterwards by
+# trying the candidates at the match position only. Matches returned are
+# those of the individual pattern, so m.start()/m.end()/m.group(n) are
+# exactly what re.search(pattern, text, flags) would give.
+#
+# The lists stay the source of truth; a PatternSet is built from them at
+# import time (or on first use through pattern_set()).
+
+import re
+from typing import Iterable, List, Optional, Tuple, Union
+
+# search_in_order() only ever needs a prefix of the list (len(patterns)
+# alternations); matching() can need any subset, so the per-set cache of
+# compiled alternations is bounded
+_MAX_ALTERNATIONS = 256
+
+
+class PatternSet:
+    """
+    ps = PatternSet(TREATMENT_NA_EXCLUDE)
+    ps.has_any(text)           # any(re.search(p, text, re.I) for p in ...)
+    ps.search(text)            # leftmost match of any pattern (ties: list order)
+    ps.search_in_order(text)   # match of the first listed pattern that matches
+    ps.index_in_order(text)    # ...and its index
+    ps.matching(text)          # indices of every pattern that matches
+    """
+
+    def __init__(self, patterns: Iterable[str], flags: int = re.IGNORECASE):
+        self.patterns = tuple(patterns)
+        self.flags = flags
+        self._compiled = [re.compile(p, flags) for p in self.patterns]
+        self._all = tuple(range(len(self.patterns)))
+        self._alternations = {}
+        self._any = self._fused(self._all)
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def __repr__(self):
+        return "PatternSet({0} patterns)".format(len(self.patterns))
+
+    def _fused(self, indices: Tuple[int, ...]):
+        # indices ascending: list order decides ties at one position
+        rx = self._alternations.get(indices)
+        if rx is None:
+            if len(self._alternations) >= _MAX_ALTERNATIONS:
+                self._alternations.clear()
+            alts = ["(?:{0})".format(self.patterns[i]) for i in indices]
+            rx = re.compile("|".join(alts) if alts else "(?!)", self.flags)
+            self._alternations[indices] = rx
+        return rx
+
+    def _which(self, indices: Tuple[int, ...], text: str, pos: int) -> int:
+        # the alternative the fused regex took at pos: the first listed one
+        # that matches there
+        for i in indices:
+            if self._compiled[i].match(text, pos):
+                return i
+        raise AssertionError("no pattern of {0!r} matches at {1}".format(self, pos))
+
+    def _match_at(self, i: int, text: str, pos: int):
+        # the pattern's own match (own group numbering) at its leftmost start
+        return self._compiled[i].match(text, pos)
+
+    def _scan(self, text: str, indices: Tuple[int, ...], prefix_only: bool = False):
+        """
+        Yield (index, start) for patterns in indices that occur in text, each
+        at its leftmost start, in order of position. Every search resumes at
+        the previous match start without the patterns already found, so a
+        pattern hidden under an earlier alternative at the same position is
+        still seen. With prefix_only, only patterns listed before the last
+        one found are looked for.
+        """
+        pos = 0
+        while indices:
+            m = self._fused(indices).search(text, pos)
+            if m is None:
+                return
+            pos = m.start()
+            i = self._which(indices, text, pos)
+            yield i, pos
+            if prefix_only:
+                indices = tuple(j for j in indices if j < i)
+            else:
+                indices = tuple(j for j in indices if j != i)
+
+    def has_any(self, text: str) -> bool:
+        return self._any.search(text) is not None
+
+    def any_match(self, text: str, pos: int = 0, endpos: Optional[int] = None):
+        """
+        Match of the alternation (some pattern, not resolved which) at or
+        after pos, with re's pos/endpos semantics.
+        """
+        if endpos is None:
+            return self._any.search(text, pos)
+        return self._any.search(text, pos, endpos)
+
+    def any_match_at_start(self, text: str):
+        """Match of the alternation anchored at the start of text."""
+        return self._any.match(text)
+
+    def search(self, text: str):
+        m = self._any.search(text)
+        if m is None:
+            return None
+        return self._match_at(self._which(self._all, text, m.start()), text, m.start())
+
+    def _first_listed(self, text: str) -> Optional[Tuple[int, int]]:
+        best = None  # type: Optional[Tuple[int, int]]
+        for i, start in self._scan(text, self._all, prefix_only=True):
+            best = (i, start)
+        return best
+
+    def search_in_order(self, text: str):
+        best = self._first_listed(text)
+        if best is None:
+            return None
+        return self._match_at(best[0], text, best[1])
+
+    def index_in_order(self, text: str) -> Optional[int]:
+        best = self._first_listed(text)
+        return None if best is None else best[0]
+
+    def matching(self, text: str) -> List[int]:
+        # the full alternation stops at every position some pattern matches
+        # at; the ones not yet found are tried there. (Re-fusing the ones
+        # left, as _scan() does, would compile a new alternation for nearly
+        # every text once the set is large.)
+        found = []  # type: List[int]
+        pending = list(self._all)
+        pos = 0
+        while pending:
+            m = self._any.search(text, pos)
+            if m is None:
+                break
+            pos = m.start()
+            hit = [i for i in pending if self._compiled[i].match(text, pos)]
+            if hit:
+                found.extend(hit)
+                pending = [i for i in pending if i not in hit]
+            pos += 1
+        return sorted(found)
+
+
+_SETS = {}
+
+
+def pattern_set(patterns: Union[PatternSet, Iterable[str]], flags: int = re.IGNORECASE) -> PatternSet:
+    """patterns as a PatternSet; lists are compiled once per (list, flags)."""
+    if isinstance(patterns, PatternSet):
+        return patterns
+    key = (tuple(patterns), flags)
+    ps = _SETS.get(key)
+    if ps is None:
+        ps = PatternSet(key[0], flags)
+        _SETS[key] = ps
+    return ps
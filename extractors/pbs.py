@@ -1,7 +1,9 @@
 import re
 from typing import List
 from models import Candidate, SectionedNote
-from .utils import window_around
+from .utils import window_around, window_bounds
+from .pattern_set import PatternSet
+from .cue_index import cue_index
 
 
 SUPPRESS_SECTIONS = {
@@ -31,6 +33,9 @@ STRONG_HISTORY_PATTERNS = [
     re.compile(r"\bpast\s+surgical\s+history\b", re.I),
 ]
 
+NEGATE_SET = PatternSet([rx.pattern for rx in NEGATE_PATTERNS])
+STRONG_HISTORY_SET = PatternSet([rx.pattern for rx in STRONG_HISTORY_PATTERNS])
+
 
 # --------------------------------
 # Lumpectomy-specific refinements
@@ -150,6 +155,22 @@ OTHER_PATTERNS = [
 ]
 
 
+# Dispatch triggers (see extractors/dispatch.py): one word of every
+# FIELD_CONFIG pattern. Words rather than the patterns themselves because
+# _normalize_text() collapses the whitespace between them.
+PBS_TRIGGERS = [
+    r"\blumpectomy\b",
+    r"\bmastectomy\b",
+    r"\bconserving\b",
+    r"\bexcision\b",
+    r"\breduction\b",
+    r"\bmastopexy\b",
+    r"\blift\b",
+    r"\baugmentation\b",
+    r"\bbiopsy\b",
+]
+
+
 FIELD_CONFIG = [
     ("PBS_Lumpectomy", LUMP_PATTERNS, 0.95, "lumpectomy"),
     ("PBS_Breast Reduction", REDUCTION_PATTERNS, 0.90, "strict_history"),
@@ -173,14 +194,19 @@ def _has_any(patterns, text):
     return False
 
 
+def _cue_near(cues, text, start, end, window):
+    # cues.has_any(window_around(text, start, end, window)), answered from
+    # the section's cue positions
+    a, b = window_bounds(text, start, end, window)
+    return cue_index(text, newlines=False).any_in(cues, a, b)
+
+
 def _has_negation_near(text, start, end):
-    ctx = window_around(text, start, end, 200)
-    return _has_any(NEGATE_PATTERNS, ctx)
+    return _cue_near(NEGATE_SET, text, start, end, 200)
 
 
 def _strict_history_near(text, start, end):
-    ctx = window_around(text, start, end, 200)
-    return _has_any(STRONG_HISTORY_PATTERNS, ctx)
+    return _cue_near(STRONG_HISTORY_SET, text, start, end, 200)
 
 
 def _lumpectomy_planning_context(text, start, end):
@@ -2,8 +2,8 @@ import re
 from typing import List
 
 from models import Candidate, SectionedNote
-from config import NEGATION_CUES, PLANNED_CUES, PERFORMED_CUES
-from .utils import window_around, classify_status
+from .pattern_set import PatternSet
+from .utils import window_around, classify_status, NEGATION_CUE_SET, PLANNED_CUE_SET, PERFORMED_CUE_SET
 
 
 # ---------------------------------------------------------
@@ -18,6 +18,9 @@ RECON_PATTERNS = [
     (r"\btissue\s+expander\b", "tissue expander/implant"),
 ]
 
+# Dispatch triggers (see extractors/dispatch.py)
+RECONSTRUCTION_TRIGGERS = [pat for pat, _ in RECON_PATTERNS]
+
 LATERALITY_PATTERNS = [
     (r"\bbilateral\b", "bilateral"),
     (r"\bleft\b", "left"),
@@ -36,7 +39,7 @@ def extract_reconstruction(note: SectionedNote) -> List[Candidate]:
 
             status = classify_status(
                 text, m.start(), m.end(),
-                PERFORMED_CUES, PLANNED_CUES, NEGATION_CUES
+                PERFORMED_CUE_SET, PLANNED_CUE_SET, NEGATION_CUE_SET
             )
 
             # Operative note default: reconstruction mentioned = performed unless negated/planned
@@ -135,32 +138,40 @@ def extract_reconstruction(note: SectionedNote) -> List[Candidate]:
     return cands
 
 
-def extract_lymph_node_mgmt(note: SectionedNote) -> List[Candidate]:
-    cands = []  # type: List[Candidate]
+# ---------------------------------------------------------
+# Lymph node management
+# ---------------------------------------------------------
+LYMPH_NODE_PATTERNS = [
+    # SLNB variants
+    (r"\bsentinel\s+(lymph\s+)?node\b|\bsln\b|\bslnb\b|\bsln\s+biops(y|ies)\b|\bsentinel\s+node\s+biops(y|ies)\b", "SLNB"),
 
-    patterns = [
-        # SLNB variants
-        (r"\bsentinel\s+(lymph\s+)?node\b|\bsln\b|\bslnb\b|\bsln\s+biops(y|ies)\b|\bsentinel\s+node\s+biops(y|ies)\b", "SLNB"),
+    # ALND variants
+    (r"\baxillary\s+(lymph\s+node\s+)?dissection\b|\balnd\b|\baxillary\s+dissection\b", "ALND"),
 
-        # ALND variants
-        (r"\baxillary\s+(lymph\s+node\s+)?dissection\b|\balnd\b|\baxillary\s+dissection\b", "ALND"),
+    # Internal mammary
+    (r"\binternal\s+mammary\s+(lymph\s+)?node\b", "InternalMammaryLN"),
+]
 
-        # Internal mammary
-        (r"\binternal\s+mammary\s+(lymph\s+)?node\b", "InternalMammaryLN"),
-    ]
+# Dispatch triggers (see extractors/dispatch.py)
+LYMPH_NODE_TRIGGERS = [pat for pat, _ in LYMPH_NODE_PATTERNS]
 
-    # Clinical/imaging “nodes” ≠ nodal surgery
-    NON_SURGICAL_NODE_EXCLUDE = [
-        r"\bno\b.*\b(lymphadenopathy|adenopathy)\b",
-        r"\bno\b.*\baxillary\b.*\b(adenopathy|nodes?)\b",
-        r"\bnegative\b.*\baxillary\b.*\bnodes?\b",
-        r"\bpalpable\b.*\bnode\b",
-    ]
+# Clinical/imaging “nodes” ≠ nodal surgery
+NON_SURGICAL_NODE_EXCLUDE = [
+    r"\bno\b.*\b(lymphadenopathy|adenopathy)\b",
+    r"\bno\b.*\baxillary\b.*\b(adenopathy|nodes?)\b",
+    r"\bnegative\b.*\baxillary\b.*\bnodes?\b",
+    r"\bpalpable\b.*\bnode\b",
+]
+NON_SURGICAL_NODE_SET = PatternSet(NON_SURGICAL_NODE_EXCLUDE, 0)
+
+
+def extract_lymph_node_mgmt(note: SectionedNote) -> List[Candidate]:
+    cands = []  # type: List[Candidate]
 
     for section, text in note.sections.items():
         t = text.lower()
 
-        for pat, val in patterns:
+        for pat, val in LYMPH_NODE_PATTERNS:
             m = re.search(pat, t, re.IGNORECASE)
             if not m:
                 continue
@@ -169,12 +180,12 @@ def extract_lymph_node_mgmt(note: SectionedNote) -> List[Candidate]:
             evid_lower = evid.lower()
 
             # Skip non-surgical mentions (PE/imaging)
-            if any(re.search(x, evid_lower) for x in NON_SURGICAL_NODE_EXCLUDE):
+            if NON_SURGICAL_NODE_SET.has_any(evid_lower):
                 continue
 
             status = classify_status(
                 text, m.start(), m.end(),
-                PERFORMED_CUES, PLANNED_CUES, NEGATION_CUES
+                PERFORMED_CUE_SET, PLANNED_CUE_SET, NEGATION_CUE_SET
             )
 
             # Operative note default
@@ -183,7 +194,7 @@ def extract_lymph_node_mgmt(note: SectionedNote) -> List[Candidate]:
 
             # Non-op: only downgrade "performed" if there's explicit future intent
             if note.note_type not in {"op_note", "brief_op_note"} and status == "performed":
-                if any(re.search(p, evid_lower) for p in PLANNED_CUES):
+                if PLANNED_CUE_SET.has_any(evid_lower):
                     status = "planned"
                 else:
                     status = "history"
@@ -377,7 +388,7 @@ def extract_mastectomy_features(note: SectionedNote) -> List[Candidate]:
         for m in MASTECTOMY_CORE_RX.finditer(text):
             status = classify_status(
                 text, m.start(), m.end(),
-                PERFORMED_CUES, PLANNED_CUES, NEGATION_CUES
+                PERFORMED_CUE_SET, PLANNED_CUE_SET, NEGATION_CUE_SET
             )
 
             # Op note default – if mastectomy appears and not negated/planned, assume performed
@@ -0,0 +1,280 @@
+# extractors/profiler.py
+# Python 3.6.8 compatible
+#
+# Opt-in profiling of extractor calls, and optionally of the regexes they
+# search with.
+#
+# ExtractorProfiler.wrap(name, fn) returns fn itself when the profiler is
+# disabled, so a disabled profiler adds nothing per call. When enabled, the
+# wrapper records for each extractor: wall time, calls, distinct notes,
+# candidates returned and exceptions raised. Exceptions propagate unchanged.
+#
+# With regexes=True, wrapping an extractor also swaps the compiled regexes
+# of its module for timing proxies until restore() is called. These are
+# module-level re patterns, plus those inside module-level lists (directly
+# or in tuples). Regexes captured elsewhere at import time, such as
+# PatternSets or dispatch tables built from other containers, are not seen.
+# Regex time is included in the calling extractor's time.
+
+import csv
+import json
+import os
+import re
+import sys
+from functools import wraps
+from time import perf_counter
+from typing import Callable, List, Optional
+
+_PATTERN_TYPE = type(re.compile(""))
+
+
+class _Stat:
+    __slots__ = ("calls", "seconds", "candidates", "exceptions", "note_ids", "anonymous_notes")
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.candidates = 0
+        self.exceptions = 0
+        self.note_ids = set()
+        self.anonymous_notes = 0
+
+    @property
+    def notes(self) -> int:
+        return len(self.note_ids) + self.anonymous_notes
+
+
+def _add_stat(into: _Stat, st: _Stat) -> None:
+    into.calls += st.calls
+    into.seconds += st.seconds
+    into.candidates += st.candidates
+    into.exceptions += st.exceptions
+    into.note_ids.update(st.note_ids)
+    into.anonymous_notes += st.anonymous_notes
+
+
+class _TimedPattern:
+    """A compiled regex that adds the time spent in it to a _Stat."""
+
+    def __init__(self, rx, stat: _Stat):
+        self._rx = rx
+        self._stat = stat
+
+    def __getattr__(self, name):
+        # .pattern, .flags, .groups, .groupindex, ...
+        return getattr(self._rx, name)
+
+    def __repr__(self):
+        return "_TimedPattern({0!r})".format(self._rx)
+
+    def _timed(self, method, args, kwargs):
+        t0 = perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            self._stat.calls += 1
+            self._stat.seconds += perf_counter() - t0
+
+    def search(self, *args, **kwargs):
+        return self._timed(self._rx.search, args, kwargs)
+
+    def match(self, *args, **kwargs):
+        return self._timed(self._rx.match, args, kwargs)
+
+    def fullmatch(self, *args, **kwargs):
+        return self._timed(self._rx.fullmatch, args, kwargs)
+
+    def findall(self, *args, **kwargs):
+        return self._timed(self._rx.findall, args, kwargs)
+
+    def split(self, *args, **kwargs):
+        return self._timed(self._rx.split, args, kwargs)
+
+    def sub(self, *args, **kwargs):
+        return self._timed(self._rx.sub, args, kwargs)
+
+    def subn(self, *args, **kwargs):
+        return self._timed(self._rx.subn, args, kwargs)
+
+    def finditer(self, *args, **kwargs):
+        # timed per step, so the caller's loop body is not counted
+        stat = self._stat
+        stat.calls += 1
+        t0 = perf_counter()
+        it = self._rx.finditer(*args, **kwargs)
+        stat.seconds += perf_counter() - t0
+        while True:
+            t0 = perf_counter()
+            try:
+                m = next(it)
+            except StopIteration:
+                stat.seconds += perf_counter() - t0
+                return
+            stat.seconds += perf_counter() - t0
+            yield m
+
+
+class ExtractorProfiler:
+    """
+    profiler = ExtractorProfiler(enabled=True, regexes=False)
+    run_bmi = profiler.wrap("bmi", extract_bmi)   # extract_bmi if disabled
+    ...
+    print(profiler.summary())
+    profiler.save(json_path, csv_path)
+    profiler.restore()
+    """
+
+    def __init__(self, enabled: bool = False, regexes: bool = False):
+        self.enabled = enabled
+        self.regexes = enabled and regexes
+        self.extractors = {}
+        self.patterns = {}
+        self._proxies = {}
+        self._swapped = []
+        self._modules = set()
+        self._wall = None  # type: Optional[float]
+
+    def wrap(self, name: str, fn: Callable) -> Callable:
+        """fn, recorded under name when the profiler is enabled."""
+        if not self.enabled:
+            return fn
+        if self._wall is None:
+            self._wall = perf_counter()
+        if self.regexes and fn.__module__ in sys.modules:
+            self.profile_module(sys.modules[fn.__module__])
+        stat = self.extractors.setdefault(name, _Stat())
+
+        @wraps(fn)
+        def profiled(note, *args, **kwargs):
+            note_id = str(getattr(note, "note_id", "") or "")
+            if note_id:
+                stat.note_ids.add(note_id)
+            else:
+                stat.anonymous_notes += 1
+            stat.calls += 1
+            t0 = perf_counter()
+            try:
+                res = fn(note, *args, **kwargs)
+            except Exception:
+                stat.exceptions += 1
+                raise
+            finally:
+                stat.seconds += perf_counter() - t0
+            if res is not None:
+                # materialized so the count is right for generators too
+                res = list(res)
+                stat.candidates += len(res)
+            return res
+
+        return profiled
+
+    def wrap_specs(self, specs):
+        """(name, fn, triggers) specs, e.g. for ExtractorDispatcher, wrapped."""
+        return [(name, self.wrap(name, fn), triggers) for name, fn, triggers in specs]
+
+    def _proxy(self, label: str, rx) -> _TimedPattern:
+        proxy = self._proxies.get(id(rx))
+        if proxy is None:
+            stat = _Stat()
+            proxy = _TimedPattern(rx, stat)
+            self._proxies[id(rx)] = proxy
+            self.patterns[label] = (rx.pattern if isinstance(rx.pattern, str) else repr(rx.pattern), stat)
+        return proxy
+
+    def profile_module(self, module, label: Optional[str] = None) -> None:
+        """Time every regex of module (see the header) until restore()."""
+        if not self.regexes or module.__name__ in self._modules:
+            return
+        self._modules.add(module.__name__)
+        prefix = label or module.__name__.rsplit(".", 1)[-1]
+        for attr, value in list(vars(module).items()):
+            if isinstance(value, _PATTERN_TYPE):
+                self._swapped.append((module, attr, value))
+                setattr(module, attr, self._proxy("{0}.{1}".format(prefix, attr), value))
+            elif isinstance(value, list):
+                for i, item in enumerate(value):
+                    item_label = "{0}.{1}[{2}]".format(prefix, attr, i)
+                    if isinstance(item, _PATTERN_TYPE):
+                        self._swapped.append((value, i, item))
+                        value[i] = self._proxy(item_label, item)
+                    elif isinstance(item, tuple) and any(isinstance(x, _PATTERN_TYPE) for x in item):
+                        self._swapped.append((value, i, item))
+                        value[i] = tuple(self._proxy(item_label, x) if isinstance(x, _PATTERN_TYPE) else x
+                                         for x in item)
+
+    def restore(self) -> None:
+        """Put back every regex profile_module() swapped out."""
+        for target, key, original in reversed(self._swapped):
+            if isinstance(target, list):
+                target[key] = original
+            else:
+                setattr(target, key, original)
+        self._swapped = []
+        self._proxies = {}
+        self._modules = set()
+
+    def absorb(self, other: "ExtractorProfiler") -> None:
+        """Add another profiler's counts (e.g. a worker process's) to these."""
+        if not self.enabled or not other.enabled:
+            return
+        if other._wall is not None and (self._wall is None or other._wall < self._wall):
+            self._wall = other._wall
+        for name, st in other.extractors.items():
+            _add_stat(self.extractors.setdefault(name, _Stat()), st)
+        for label, (pattern, st) in other.patterns.items():
+            if label not in self.patterns:
+                self.patterns[label] = (pattern, _Stat())
+            _add_stat(self.patterns[label][1], st)
+
+    def rows(self) -> List[dict]:
+        """One row per extractor, then per regex with calls, slowest first."""
+        out = []
+        for name, st in sorted(self.extractors.items(), key=lambda kv: -kv[1].seconds):
+            out.append({
+                "KIND": "extractor", "NAME": name, "CALLS": st.calls, "NOTES": st.notes,
+                "CANDIDATES": st.candidates, "EXCEPTIONS": st.exceptions,
+                "SECONDS": round(st.seconds, 6),
+                "MEAN_MS": round(1000.0 * st.seconds / st.calls, 4) if st.calls else 0.0,
+                "PATTERN": "",
+            })
+        for label, (pattern, st) in sorted(self.patterns.items(), key=lambda kv: -kv[1][1].seconds):
+            if not st.calls:
+                continue
+            out.append({
+                "KIND": "regex", "NAME": label, "CALLS": st.calls, "NOTES": "",
+                "CANDIDATES": "", "EXCEPTIONS": "",
+                "SECONDS": round(st.seconds, 6),
+                "MEAN_MS": round(1000.0 * st.seconds / st.calls, 4),
+                "PATTERN": pattern,
+            })
+        return out
+
+    def save(self, json_path: Optional[str], csv_path: Optional[str] = None) -> None:
+        """Write the profile as JSON and/or CSV; nothing when disabled."""
+        if not self.enabled:
+            return
+        rows = self.rows()
+        wall = perf_counter() - self._wall if self._wall is not None else 0.0
+        for path in (json_path, csv_path):
+            if path and os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+        if json_path:
+            with open(json_path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "wall_seconds_since_first_wrap": round(wall, 6),
+                    "extractors": [r for r in rows if r["KIND"] == "extractor"],
+                    "regexes": [r for r in rows if r["KIND"] == "regex"],
+                }, f, indent=2)
+        if csv_path:
+            with open(csv_path, "w", encoding="utf-8", newline="") as f:
+                w = csv.DictWriter(f, fieldnames=["KIND", "NAME", "CALLS", "NOTES", "CANDIDATES",
+                                                  "EXCEPTIONS", "SECONDS", "MEAN_MS", "PATTERN"])
+                w.writeheader()
+                w.writerows(rows)
+
+    def summary(self, top: int = 5) -> str:
+        if not self.enabled:
+            return "disabled"
+        parts = ["{0} {1:.2f}s/{2} calls".format(r["NAME"], r["SECONDS"], r["CALLS"])
+                 for r in self.rows() if r["KIND"] == "extractor"][:top]
+        return "; ".join(parts) if parts else "no extractor calls"
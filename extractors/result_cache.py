@@ -0,0 +1,154 @@
+# extractors/result_cache.py
+# Python 3.6.8 compatible
+#
+# Persistent per-note extractor results for incremental runs.
+#
+# Results are keyed by (extractor name, NOTE_HASH from ingest.note_manifest),
+# so a note whose content has not changed is never re-extracted. Each
+# extractor's results are tied to a fingerprint of the code they came from
+# (models.py, config.py, normalize/, extractors/ and the module defining the
+# extractor); editing any of them drops that extractor's cached results.
+
+import hashlib
+import inspect
+import os
+import pickle
+from glob import glob
+from typing import Callable, Dict, Iterable, List, Optional
+
+CACHE_FORMAT_VERSION = 1
+
+_REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_SHARED_SOURCES = ["models.py", "config.py", "normalize/*.py", "extractors/*.py"]
+
+
+def _shared_sources_digest() -> str:
+    h = hashlib.sha1()
+    for pattern in _SHARED_SOURCES:
+        for fp in sorted(glob(os.path.join(_REPO_DIR, pattern))):
+            h.update(os.path.relpath(fp, _REPO_DIR).encode("utf-8"))
+            with open(fp, "rb") as f:
+                h.update(f.read())
+    return h.hexdigest()
+
+
+def code_fingerprint(fn: Callable, shared_digest: Optional[str] = None) -> str:
+    """Hash of the shared extractor sources plus the file that defines fn."""
+    h = hashlib.sha1((shared_digest or _shared_sources_digest()).encode("ascii"))
+    # through functools.wraps wrappers (the profiler's) to the extractor
+    src_file = inspect.getsourcefile(inspect.unwrap(fn))
+    if src_file and os.path.exists(src_file):
+        with open(src_file, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+class ExtractorCache:
+    """
+    cache.run(name, note_hash, fn, make_note) returns fn(make_note()) as a
+    list, from the cache when that note was extracted before by the same
+    code. make_note is only called on a miss, so callers can defer building
+    the SectionedNote. Exceptions are not cached. The list and its
+    candidates are the cache's own (and get saved): copy before changing.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._shared = _shared_sources_digest()
+        self._fingerprints = {}  # type: Dict[str, str]
+        self._results = {}  # type: Dict[str, Dict[str, List]]
+        self._stored = {}  # type: Dict[str, dict]
+
+        if path and os.path.exists(path):
+            try:
+                with open(path, "rb") as f:
+                    data = pickle.load(f)
+                if data.get("format_version") == CACHE_FORMAT_VERSION:
+                    self._stored = data.get("extractors", {})
+            except Exception as e:
+                print("[result_cache] Ignoring unreadable cache {0}: {1}".format(path, e))
+
+    def _bucket(self, name: str, fn: Callable) -> Dict[str, List]:
+        bucket = self._results.get(name)
+        if bucket is None:
+            fp = code_fingerprint(fn, self._shared)
+            stored = self._stored.get(name)
+            bucket = dict(stored["results"]) if stored and stored.get("fingerprint") == fp else {}
+            self._fingerprints[name] = fp
+            self._results[name] = bucket
+        return bucket
+
+    def run(self, name: str, note_hash: str, fn: Callable, make_note: Callable) -> List:
+        bucket = self._bucket(name, fn)
+        res = bucket.get(note_hash)
+        if res is not None:
+            self.hits += 1
+            return res
+        self.misses += 1
+        res = list(fn(make_note()))
+        bucket[note_hash] = res
+        return res
+
+    def shard(self, note_hashes: Iterable[str]) -> "ExtractorCache":
+        """
+        An in-memory cache holding only these notes' results, for a worker
+        process; hand it back to absorb() when the worker is done.
+        """
+        part = ExtractorCache(None)
+        part._shared = self._shared
+        for name in set(self._stored) | set(self._results):
+            if name in self._results:
+                fp, bucket = self._fingerprints[name], self._results[name]
+            else:
+                fp, bucket = self._stored[name]["fingerprint"], self._stored[name]["results"]
+            part._stored[name] = {
+                "fingerprint": fp,
+                "results": {h: bucket[h] for h in note_hashes if h in bucket},
+            }
+        return part
+
+    def absorb(self, part: "ExtractorCache") -> None:
+        """Merge the results and counts of a shard() back in."""
+        self.hits += part.hits
+        self.misses += part.misses
+        for name, bucket in part._results.items():
+            fp = part._fingerprints[name]
+            if self._fingerprints.get(name) != fp:
+                stored = self._stored.get(name)
+                self._results[name] = dict(stored["results"]) if stored and stored.get("fingerprint") == fp else {}
+                self._fingerprints[name] = fp
+            self._results[name].update(bucket)
+
+    def save(self, keep_hashes: Optional[Iterable[str]] = None) -> None:
+        """
+        Write the cache. With keep_hashes, results for notes no longer in
+        the corpus are dropped so the file does not grow without bound.
+        """
+        if not self.path:
+            return
+        keep = set(keep_hashes) if keep_hashes is not None else None
+        out = {}
+        for name in set(self._stored) | set(self._results):
+            if name in self._results:
+                fp, bucket = self._fingerprints[name], self._results[name]
+            else:
+                # not run this time: carry the stored results over as-is
+                fp, bucket = self._stored[name]["fingerprint"], self._stored[name]["results"]
+            if keep is not None:
+                bucket = {h: r for h, r in bucket.items() if h in keep}
+            out[name] = {"fingerprint": fp, "results": bucket}
+
+        out_dir = os.path.dirname(self.path)
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump({"format_version": CACHE_FORMAT_VERSION, "extractors": out}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+
+    def summary(self) -> str:
+        return "hits={0} misses={1}".format(self.hits, self.misses)
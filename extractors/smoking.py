@@ -1,5 +1,6 @@
 # extractors/smoking.py
 import re
+from collections import namedtuple
 from datetime import datetime
 from typing import List
 
@@ -167,6 +168,18 @@ STRUCTURED_BLOCK_START_PATTERN = re.compile(
     re.IGNORECASE
 )
 
+# Dispatch triggers (see extractors/dispatch.py). Every pattern above
+# contains one of these words; they are matched as substrings so that
+# "nonsmoker", "cigs" etc. count, and "former user" allows the checkbox
+# characters _normalize_text() turns into spaces.
+SMOKING_TRIGGERS = [
+    r"smok",
+    r"tobacco",
+    r"cig",
+    r"quit",
+    r"former[\s" + "".join(CHECKBOX_CHARS) + r"]+user",
+]
+
 PREFERRED_SECTIONS = {
     "SOCIAL HISTORY",
     "HISTORY",
@@ -324,238 +337,295 @@ def _is_smokeless_only_never(cand):
     return True
 
 
-def _find_best(patterns, text, note, section, value, confidence, suppress_family=True, status="present"):
-    out = []
-    for rx in patterns:
-        for m in rx.finditer(text):
-            if suppress_family and _is_family_history_context(text, m.start(), m.end()):
-                continue
-            if value == "Current" and _is_questionnaire_false_current_context(text, m.start(), m.end()):
-                continue
-            out.append(_candidate(note, section, value, text, m.start(), m.end(), confidence, status=status))
-    return out
+# ----------------------------------------------
+# Clue handlers
+# Each turns one typed clue (see scan_clues) into zero or more candidates.
+# ----------------------------------------------
 
+PRESENT_CLUES = {
+    # kind: (value, confidence, status)
+    "current": ("Current", 0.99, "present_current"),
+    "former": ("Former", 0.96, "present_former"),
+    "never": ("Never", 0.93, "present_never"),
+    "screening_never": ("Never", 0.70, "screening_never"),
+}
 
-def _find_recent_quit_context_candidates(text, note, section):
-    out = []
-    for m in RECENT_QUIT_CONTEXT_PATTERN.finditer(text):
-        if _is_family_history_context(text, m.start(), m.end()):
-            continue
-        out.append(_candidate(note, section, "Current", text, m.start(), m.end(), 0.97, status="recent_quit_current"))
-    return out
 
+def _present_candidates(kind, m, text, note, section, note_dt):
+    value, confidence, status = PRESENT_CLUES[kind]
+    if _is_family_history_context(text, m.start(), m.end()):
+        return []
+    if value == "Current" and _is_questionnaire_false_current_context(text, m.start(), m.end()):
+        return []
+    return [_candidate(note, section, value, text, m.start(), m.end(), confidence, status=status)]
 
-def _find_quit_time_candidates(text, note, section):
-    out = []
-    for m in QUIT_TIME_PATTERN.finditer(text):
-        if _is_family_history_context(text, m.start(), m.end()):
-            continue
-        if _is_questionnaire_quit_context(text, m.start(), m.end()):
-            continue
 
-        number = float(m.group(3))
-        unit = m.group(4).lower()
+def _recent_quit_context_candidates(kind, m, text, note, section, note_dt):
+    if _is_family_history_context(text, m.start(), m.end()):
+        return []
+    return [_candidate(note, section, "Current", text, m.start(), m.end(), 0.97, status="recent_quit_current")]
 
-        if unit.startswith("day"):
-            value = "Current" if number <= 90 else "Former"
-        elif unit.startswith("week"):
-            value = "Current" if number <= 12 else "Former"
-        elif unit.startswith("month"):
-            value = "Current" if number <= 3 else "Former"
-        else:
-            value = "Former"
-
-        status = "recent_quit_current" if value == "Current" else "quit_supported_former"
-        conf = 0.98 if value == "Current" else 0.97
-        out.append(_candidate(note, section, value, text, m.start(), m.end(), conf, status=status))
-    return out
-
-
-def _find_quit_years_ago_candidates(text, note, section):
-    out = []
-    for rx in [QUIT_YEARS_AGO_PATTERN, QUIT_MONTHS_AGO_PATTERN, QUIT_WEEKS_AGO_PATTERN, QUIT_DAYS_AGO_PATTERN]:
-        for m in rx.finditer(text):
-            if _is_family_history_context(text, m.start(), m.end()):
-                continue
-            if _is_questionnaire_quit_context(text, m.start(), m.end()):
-                continue
-
-            if rx == QUIT_YEARS_AGO_PATTERN:
-                value = "Former"
-            elif rx == QUIT_MONTHS_AGO_PATTERN:
-                months = float(m.group(1))
-                value = "Current" if months <= 3.0 else "Former"
-            elif rx == QUIT_WEEKS_AGO_PATTERN:
-                weeks = float(m.group(1))
-                value = "Current" if weeks <= 12.0 else "Former"
-            else:
-                days = float(m.group(1))
-                value = "Current" if days <= 90.0 else "Former"
-
-            status = "recent_quit_current" if value == "Current" else "quit_supported_former"
-            conf = 0.98 if value == "Current" else 0.98
-            out.append(_candidate(note, section, value, text, m.start(), m.end(), conf, status=status))
-    return out
-
-
-def _find_years_since_quit_candidates(text, note, section):
-    out = []
-    for m in YEARS_SINCE_QUITTING_PATTERN.finditer(text):
-        if _is_family_history_context(text, m.start(), m.end()):
-            continue
 
-        yrs = float(m.group(1))
-        value = "Current" if yrs < 0.25 else "Former"
-        status = "recent_quit_current" if value == "Current" else "quit_supported_former"
-        conf = 0.98 if value == "Current" else 0.97
-        out.append(_candidate(note, section, value, text, m.start(), m.end(), conf, status=status))
-    return out
+def _quit_time_candidates(kind, m, text, note, section, note_dt):
+    if _is_family_history_context(text, m.start(), m.end()):
+        return []
+    if _is_questionnaire_quit_context(text, m.start(), m.end()):
+        return []
 
+    number = float(m.group(3))
+    unit = m.group(4).lower()
 
-def _find_quit_date_candidates(text, note, section):
-    out = []
-    note_dt = _parse_date_safe(getattr(note, "note_date", ""))
+    if unit.startswith("day"):
+        value = "Current" if number <= 90 else "Former"
+    elif unit.startswith("week"):
+        value = "Current" if number <= 12 else "Former"
+    elif unit.startswith("month"):
+        value = "Current" if number <= 3 else "Former"
+    else:
+        value = "Former"
 
-    for m in QUIT_DATE_PATTERN.finditer(text):
-        if _is_family_history_context(text, m.start(), m.end()):
-            continue
+    status = "recent_quit_current" if value == "Current" else "quit_supported_former"
+    conf = 0.98 if value == "Current" else 0.97
+    return [_candidate(note, section, value, text, m.start(), m.end(), conf, status=status)]
 
-        quit_dt = _parse_quit_date(m.group(1))
-        if note_dt is not None and quit_dt is not None:
-            dd = _days_between(note_dt, quit_dt)
-            if dd is not None and dd >= 0 and dd <= 90:
-                out.append(_candidate(note, section, "Current", text, m.start(), m.end(), 0.99, status="recent_quit_current"))
-            elif dd is not None and dd > 90:
-                out.append(_candidate(note, section, "Former", text, m.start(), m.end(), 0.98, status="quit_supported_former"))
-            else:
-                out.append(_candidate(note, section, "Former", text, m.start(), m.end(), 0.96, status="quit_supported_former"))
-        else:
-            out.append(_candidate(note, section, "Former", text, m.start(), m.end(), 0.95, status="quit_supported_former"))
-    return out
 
+def _quit_ago_candidates(kind, m, text, note, section, note_dt):
+    if _is_family_history_context(text, m.start(), m.end()):
+        return []
+    if _is_questionnaire_quit_context(text, m.start(), m.end()):
+        return []
 
-def _find_last_attempt_candidates(text, note, section):
-    out = []
-    note_dt = _parse_date_safe(getattr(note, "note_date", ""))
+    if kind == "quit_years_ago":
+        value = "Former"
+    elif kind == "quit_months_ago":
+        months = float(m.group(1))
+        value = "Current" if months <= 3.0 else "Former"
+    elif kind == "quit_weeks_ago":
+        weeks = float(m.group(1))
+        value = "Current" if weeks <= 12.0 else "Former"
+    else:
+        days = float(m.group(1))
+        value = "Current" if days <= 90.0 else "Former"
+
+    status = "recent_quit_current" if value == "Current" else "quit_supported_former"
+    conf = 0.98 if value == "Current" else 0.98
+    return [_candidate(note, section, value, text, m.start(), m.end(), conf, status=status)]
+
+
+def _years_since_quit_candidates(kind, m, text, note, section, note_dt):
+    if _is_family_history_context(text, m.start(), m.end()):
+        return []
+
+    yrs = float(m.group(1))
+    value = "Current" if yrs < 0.25 else "Former"
+    status = "recent_quit_current" if value == "Current" else "quit_supported_former"
+    conf = 0.98 if value == "Current" else 0.97
+    return [_candidate(note, section, value, text, m.start(), m.end(), conf, status=status)]
+
+
+# kind: Former confidence when quit > 90 days before the note / quit date
+# not before the note
+DATED_QUIT_FORMER_CONF = {
+    "quit_date": (0.98, 0.96),
+    "last_attempt": (0.97, 0.95),
+}
 
-    for m in LAST_ATTEMPT_PATTERN.finditer(text):
-        if _is_family_history_context(text, m.start(), m.end()):
-            continue
 
-        quit_dt = _parse_quit_date(m.group(1))
-        if note_dt is not None and quit_dt is not None:
-            dd = _days_between(note_dt, quit_dt)
-            if dd is not None and dd >= 0 and dd <= 90:
-                out.append(_candidate(note, section, "Current", text, m.start(), m.end(), 0.99, status="recent_quit_current"))
-            elif dd is not None and dd > 90:
-                out.append(_candidate(note, section, "Former", text, m.start(), m.end(), 0.97, status="quit_supported_former"))
-            else:
-                out.append(_candidate(note, section, "Former", text, m.start(), m.end(), 0.95, status="quit_supported_former"))
+def _dated_quit_candidates(kind, m, text, note, section, note_dt):
+    if _is_family_history_context(text, m.start(), m.end()):
+        return []
+
+    older_conf, undated_conf = DATED_QUIT_FORMER_CONF[kind]
+    quit_dt = _parse_quit_date(m.group(1))
+    if note_dt is not None and quit_dt is not None:
+        dd = _days_between(note_dt, quit_dt)
+        if dd is not None and dd >= 0 and dd <= 90:
+            return [_candidate(note, section, "Current", text, m.start(), m.end(), 0.99, status="recent_quit_current")]
+        elif dd is not None and dd > 90:
+            return [_candidate(note, section, "Former", text, m.start(), m.end(), older_conf, status="quit_supported_former")]
         else:
-            out.append(_candidate(note, section, "Former", text, m.start(), m.end(), 0.95, status="quit_supported_former"))
-    return out
+            return [_candidate(note, section, "Former", text, m.start(), m.end(), undated_conf, status="quit_supported_former")]
+    return [_candidate(note, section, "Former", text, m.start(), m.end(), 0.95, status="quit_supported_former")]
 
 
-def _find_generic_quit_candidates(text, note, section):
-    out = []
-    for m in GENERIC_QUIT_PATTERN.finditer(text):
-        if _is_family_history_context(text, m.start(), m.end()):
-            continue
-        if _is_questionnaire_quit_context(text, m.start(), m.end()):
-            continue
-        out.append(_candidate(note, section, "Former", text, m.start(), m.end(), 0.86, status="generic_quit_former"))
-    return out
+def _generic_quit_candidates(kind, m, text, note, section, note_dt):
+    if _is_family_history_context(text, m.start(), m.end()):
+        return []
+    if _is_questionnaire_quit_context(text, m.start(), m.end()):
+        return []
+    return [_candidate(note, section, "Former", text, m.start(), m.end(), 0.86, status="generic_quit_former")]
 
 
-def _find_structured_block_candidates(text, note, section):
+STRUCTURED_CURRENT_RX = re.compile(
+    r"\bsmoking status\s*[:\-]?\s*(current every day smoker|current some day smoker|current smoker|current|light tobacco smoker)\b",
+    re.IGNORECASE
+)
+STRUCTURED_FORMER_RX = re.compile(
+    r"\bsmoking status\s*[:\-]?\s*(former smoker|former)\b|\bhistory smoking status\s*[:\-]?\s*former(?:\s+smoker)?\b",
+    re.IGNORECASE
+)
+STRUCTURED_NEVER_STATUS_RX = re.compile(
+    r"\bsmoking status\s*[:\-]?\s*(never smoker|never)\b",
+    re.IGNORECASE
+)
+STRUCTURED_SMOKELESS_NEVER_RX = re.compile(
+    r"\bsmokeless tobacco\s*[:\-]?\s*never used\b",
+    re.IGNORECASE
+)
+STRUCTURED_PASSIVE_SMOKE_RX = re.compile(
+    r"\bpassive smoke exposure\s*[:\-]?\s*never smoker\b",
+    re.IGNORECASE
+)
+STRUCTURED_COMMENT_CURRENT_RX = re.compile(
+    r"\bcomment\s*[:\-]?\s*(?:states?\s+)?(?:she|he|pt|patient)\s+smokes\b|\bsmokes\s+every\s+once\s+in\s+a\s+while\s+currently\b",
+    re.IGNORECASE
+)
+STRUCTURED_NEVER_RX = re.compile(
+    r"\b(does not smoke|doesn't smoke|does not smoke or use nicotine|denies tobacco use|denies use of tobacco products|never smoked|never smoker|nonsmoker|non[- ]smoker)\b",
+    re.IGNORECASE
+)
+
+
+def _structured_block_candidates(kind, m, text, note, section, note_dt):
     candidates = []
 
-    current_rx = re.compile(
-        r"\bsmoking status\s*[:\-]?\s*(current every day smoker|current some day smoker|current smoker|current|light tobacco smoker)\b",
-        re.IGNORECASE
-    )
-    former_rx = re.compile(
-        r"\bsmoking status\s*[:\-]?\s*(former smoker|former)\b|\bhistory smoking status\s*[:\-]?\s*former(?:\s+smoker)?\b",
-        re.IGNORECASE
-    )
-    never_rx = re.compile(
-        r"\bsmoking status\s*[:\-]?\s*(never smoker|never)\b",
-        re.IGNORECASE
-    )
-    smokeless_never_rx = re.compile(
-        r"\bsmokeless tobacco\s*[:\-]?\s*never used\b",
-        re.IGNORECASE
-    )
-    passive_smoke_rx = re.compile(
-        r"\bpassive smoke exposure\s*[:\-]?\s*never smoker\b",
-        re.IGNORECASE
-    )
-    comment_current_rx = re.compile(
-        r"\bcomment\s*[:\-]?\s*(?:states?\s+)?(?:she|he|pt|patient)\s+smokes\b|\bsmokes\s+every\s+once\s+in\s+a\s+while\s+currently\b",
-        re.IGNORECASE
-    )
-    structured_never_rx = re.compile(
-        r"\b(does not smoke|doesn't smoke|does not smoke or use nicotine|denies tobacco use|denies use of tobacco products|never smoked|never smoker|nonsmoker|non[- ]smoker)\b",
-        re.IGNORECASE
-    )
+    s = m.start()
+    e = min(len(text), m.end() + 320)
+    chunk = text[s:e]
+
+    if _is_family_history_context(text, s, e):
+        return candidates
+
+    m2 = STRUCTURED_CURRENT_RX.search(chunk)
+    if m2 is not None:
+        start = s + m2.start()
+        end = s + m2.end()
+        if not _is_questionnaire_false_current_context(text, start, end):
+            candidates.append(_candidate(note, section, "Current", text, start, end, 0.997, status="structured_current"))
+
+    m2 = STRUCTURED_FORMER_RX.search(chunk)
+    if m2 is not None:
+        start = s + m2.start()
+        end = s + m2.end()
+        chunk_low = chunk.lower()
+        if ("quit date" in chunk_low) or ("years since quitting" in chunk_low) or ("last attempt to quit" in chunk_low) or ("quit " in chunk_low) or ("stopped smoking" in chunk_low):
+            candidates.append(_candidate(note, section, "Former", text, start, end, 0.998, status="structured_former_supported"))
+        else:
+            candidates.append(_candidate(note, section, "Former", text, start, end, 0.993, status="structured_former"))
+
+    m2 = STRUCTURED_NEVER_STATUS_RX.search(chunk)
+    if m2 is not None:
+        start = s + m2.start()
+        end = s + m2.end()
+        candidates.append(_candidate(note, section, "Never", text, start, end, 0.994, status="structured_never"))
+
+    m2 = STRUCTURED_PASSIVE_SMOKE_RX.search(chunk)
+    if m2 is not None:
+        start = s + m2.start()
+        end = s + m2.end()
+        candidates.append(_candidate(note, section, "Never", text, start, end, 0.992, status="structured_never"))
+
+    m2 = STRUCTURED_COMMENT_CURRENT_RX.search(chunk)
+    if m2 is not None:
+        start = s + m2.start()
+        end = s + m2.end()
+        candidates.append(_candidate(note, section, "Current", text, start, end, 0.996, status="structured_current"))
+
+    m2 = STRUCTURED_NEVER_RX.search(chunk)
+    if m2 is not None:
+        start = s + m2.start()
+        end = s + m2.end()
+        candidates.append(_candidate(note, section, "Never", text, start, end, 0.987, status="narrative_never"))
+
+    # keep smokeless-only signal as a low-priority helper only;
+    # later ranking will never let it stand alone as Never smoker
+    m2 = STRUCTURED_SMOKELESS_NEVER_RX.search(chunk)
+    if m2 is not None:
+        start = s + m2.start()
+        end = s + m2.end()
+        candidates.append(_candidate(note, section, "Never", text, start, end, 0.900, status="smokeless_only_never"))
 
-    for m in STRUCTURED_BLOCK_START_PATTERN.finditer(text):
-        s = m.start()
-        e = min(len(text), m.end() + 320)
-        chunk = text[s:e]
+    return candidates
 
-        if _is_family_history_context(text, s, e):
-            continue
 
-        m2 = current_rx.search(chunk)
-        if m2 is not None:
-            start = s + m2.start()
-            end = s + m2.end()
-            if not _is_questionnaire_false_current_context(text, start, end):
-                candidates.append(_candidate(note, section, "Current", text, start, end, 0.997, status="structured_current"))
-
-        m2 = former_rx.search(chunk)
-        if m2 is not None:
-            start = s + m2.start()
-            end = s + m2.end()
-            if ("quit date" in chunk.lower()) or ("years since quitting" in chunk.lower()) or ("last attempt to quit" in chunk.lower()) or ("quit " in chunk.lower()) or ("stopped smoking" in chunk.lower()):
-                candidates.append(_candidate(note, section, "Former", text, start, end, 0.998, status="structured_former_supported"))
-            else:
-                candidates.append(_candidate(note, section, "Former", text, start, end, 0.993, status="structured_former"))
-
-        m2 = never_rx.search(chunk)
-        if m2 is not None:
-            start = s + m2.start()
-            end = s + m2.end()
-            candidates.append(_candidate(note, section, "Never", text, start, end, 0.994, status="structured_never"))
-
-        m2 = passive_smoke_rx.search(chunk)
-        if m2 is not None:
-            start = s + m2.start()
-            end = s + m2.end()
-            candidates.append(_candidate(note, section, "Never", text, start, end, 0.992, status="structured_never"))
-
-        m2 = comment_current_rx.search(chunk)
-        if m2 is not None:
-            start = s + m2.start()
-            end = s + m2.end()
-            candidates.append(_candidate(note, section, "Current", text, start, end, 0.996, status="structured_current"))
-
-        m2 = structured_never_rx.search(chunk)
-        if m2 is not None:
-            start = s + m2.start()
-            end = s + m2.end()
-            candidates.append(_candidate(note, section, "Never", text, start, end, 0.987, status="narrative_never"))
-
-        # keep smokeless-only signal as a low-priority helper only;
-        # later ranking will never let it stand alone as Never smoker
-        m2 = smokeless_never_rx.search(chunk)
-        if m2 is not None:
-            start = s + m2.start()
-            end = s + m2.end()
-            candidates.append(_candidate(note, section, "Never", text, start, end, 0.900, status="smokeless_only_never"))
+# ----------------------------------------------
+# Clue scanner
+# Every smoking pattern, typed, in the order their candidates are emitted
+# (the order decides ties in _smoking_priority). Each kind lists keywords
+# one of which any of its matches contains (for structured blocks: any of
+# the sub-patterns searched in the block); a section is searched once per
+# keyword, and only kinds with a keyword present are run with finditer.
+# ----------------------------------------------
 
-    return candidates
+SmokingClue = namedtuple("SmokingClue", ["kind", "match"])
+
+CLUE_KEYWORDS = ["smok", "tobacco", "cig", "quit", "former user"]
+CLUE_KEYWORD_RXS = [(kw, re.compile(re.escape(kw), re.IGNORECASE)) for kw in CLUE_KEYWORDS]
+NON_ASCII_RX = re.compile(r"[^\x00-\x7f]")
+
+SMOKE_WORDS = frozenset(["smok", "tobacco"])
+QUIT_WORDS = frozenset(["quit"])
+
+CLUE_PATTERNS = (
+    [("structured_block", STRUCTURED_BLOCK_START_PATTERN, SMOKE_WORDS)] +
+    [("current", rx, frozenset(["smok", "tobacco", "cig"])) for rx in CURRENT_PATTERNS] +
+    [
+        ("recent_quit", RECENT_QUIT_CONTEXT_PATTERN, QUIT_WORDS),
+        ("quit_years_ago", QUIT_YEARS_AGO_PATTERN, SMOKE_WORDS),
+        ("quit_months_ago", QUIT_MONTHS_AGO_PATTERN, SMOKE_WORDS),
+        ("quit_weeks_ago", QUIT_WEEKS_AGO_PATTERN, SMOKE_WORDS),
+        ("quit_days_ago", QUIT_DAYS_AGO_PATTERN, SMOKE_WORDS),
+        ("quit_time", QUIT_TIME_PATTERN, SMOKE_WORDS),
+        ("years_since_quit", YEARS_SINCE_QUITTING_PATTERN, QUIT_WORDS),
+        ("quit_date", QUIT_DATE_PATTERN, QUIT_WORDS),
+        ("last_attempt", LAST_ATTEMPT_PATTERN, QUIT_WORDS),
+    ] +
+    [("former", rx, frozenset(["smok", "tobacco", "former user"])) for rx in FORMER_PATTERNS] +
+    [("never", rx, SMOKE_WORDS) for rx in NEVER_PATTERNS] +
+    [("generic_quit", GENERIC_QUIT_PATTERN, SMOKE_WORDS)] +
+    [("screening_never", rx, SMOKE_WORDS) for rx in SCREENING_NEVER_PATTERNS]
+)
+
+CLUE_HANDLERS = {
+    "structured_block": _structured_block_candidates,
+    "current": _present_candidates,
+    "recent_quit": _recent_quit_context_candidates,
+    "quit_years_ago": _quit_ago_candidates,
+    "quit_months_ago": _quit_ago_candidates,
+    "quit_weeks_ago": _quit_ago_candidates,
+    "quit_days_ago": _quit_ago_candidates,
+    "quit_time": _quit_time_candidates,
+    "years_since_quit": _years_since_quit_candidates,
+    "quit_date": _dated_quit_candidates,
+    "last_attempt": _dated_quit_candidates,
+    "former": _present_candidates,
+    "never": _present_candidates,
+    "generic_quit": _generic_quit_candidates,
+    "screening_never": _present_candidates,
+}
+
+
+def _clue_keywords(text):
+    low = text.lower()
+    present = set(kw for kw in CLUE_KEYWORDS if kw in low)
+    if len(present) < len(CLUE_KEYWORDS) and NON_ASCII_RX.search(text):
+        # IGNORECASE also folds a few non-ASCII letters (long s, Kelvin
+        # sign) onto ASCII ones
+        present.update(kw for kw, rx in CLUE_KEYWORD_RXS if rx.search(text))
+    return present
+
+
+def scan_clues(text):
+    """Typed smoking clues in a normalized section text, in emission order."""
+    present = _clue_keywords(text)
+    clues = []
+    if not present:
+        return clues
+    for kind, rx, keywords in CLUE_PATTERNS:
+        if present & keywords:
+            for m in rx.finditer(text):
+                clues.append(SmokingClue(kind, m))
+    return clues
 
 
 def _smoking_priority(c):
@@ -613,6 +683,7 @@ def extract_smoking(note: SectionedNote) -> List[Candidate]:
             section_order.append(s)
 
     all_candidates = []
+    note_dt = _parse_date_safe(getattr(note, "note_date", ""))
 
     for section in section_order:
         raw_text = note.sections.get(section, "") or ""
@@ -621,22 +692,13 @@ def extract_smoking(note: SectionedNote) -> List[Candidate]:
 
         text = _normalize_text(raw_text)
 
-        all_candidates.extend(_find_structured_block_candidates(text, note, section))
-
-        all_candidates.extend(_find_best(CURRENT_PATTERNS, text, note, section, "Current", 0.99, suppress_family=True, status="present_current"))
-        all_candidates.extend(_find_recent_quit_context_candidates(text, note, section))
-        all_candidates.extend(_find_quit_years_ago_candidates(text, note, section))
-        all_candidates.extend(_find_quit_time_candidates(text, note, section))
-        all_candidates.extend(_find_years_since_quit_candidates(text, note, section))
-        all_candidates.extend(_find_quit_date_candidates(text, note, section))
-        all_candidates.extend(_find_last_attempt_candidates(text, note, section))
-        all_candidates.extend(_find_best(FORMER_PATTERNS, text, note, section, "Former", 0.96, suppress_family=True, status="present_former"))
-        all_candidates.extend(_find_best(NEVER_PATTERNS, text, note, section, "Never", 0.93, suppress_family=True, status="present_never"))
-        all_candidates.extend(_find_generic_quit_candidates(text, note, section))
-        all_candidates.extend(_find_best(SCREENING_NEVER_PATTERNS, text, note, section, "Never", 0.70, suppress_family=True, status="screening_never"))
+        for clue in scan_clues(text):
+            handler = CLUE_HANDLERS[clue.kind]
+            all_candidates.extend(handler(clue.kind, clue.match, text, note, section, note_dt))
 
     if not all_candidates:
         return []
 
-    best = sorted(all_candidates, key=_smoking_priority)[0]
+    # first of the best, as a stable sort would give
+    best = min(all_candidates, key=_smoking_priority)
     return [best]
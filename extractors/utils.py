@@ -1,23 +1,33 @@
 import re
-from typing import Optional, List
+from typing import Optional, List, Tuple, Union
 
+from config import NEGATION_CUES, PLANNED_CUES, PERFORMED_CUES
+from .pattern_set import PatternSet, pattern_set
+from .cue_index import cue_index
 
-def find_first(patterns: List[str], text: str, flags=re.IGNORECASE) -> Optional[object]:
+# config.py status cue lists, fused once. classify_status() matches them
+# case-sensitively against the lowered context, hence flags=0.
+NEGATION_CUE_SET = pattern_set(NEGATION_CUES, 0)
+PLANNED_CUE_SET = pattern_set(PLANNED_CUES, 0)
+PERFORMED_CUE_SET = pattern_set(PERFORMED_CUES, 0)
+
+# classify_status() hard stop for templated negations
+NONE_NEGATION_SET = PatternSet([r"\(\s*none\s*\)|\b(none|no|denies|denied|negative)\b"], 0)
+
+
+def find_first(patterns: Union[List[str], PatternSet], text: str, flags=re.IGNORECASE) -> Optional[object]:
     """
-    Return the first regex Match found for any pattern in `patterns`,
-    or None if nothing matches. Type is `object` for Python 3.6
-    compatibility (we avoid using re.Match in type hints).
+    Return the regex Match of the first pattern in `patterns` (list
+    order) that matches anywhere in the text, or None if nothing matches.
+    Type is `object` for Python 3.6 compatibility (we avoid using
+    re.Match in type hints).
     """
-    for pat in patterns:
-        m = re.search(pat, text, flags)
-        if m:
-            return m
-    return None
+    return pattern_set(patterns, flags).search_in_order(text)
 
 
-def has_any(patterns: List[str], text: str, flags=re.IGNORECASE) -> bool:
+def has_any(patterns: Union[List[str], PatternSet], text: str, flags=re.IGNORECASE) -> bool:
     """True if any of the patterns matches the text."""
-    return find_first(patterns, text, flags) is not None
+    return pattern_set(patterns, flags).has_any(text)
 
 
 def window_around(text: str, start: int, end: int, window: int = 80) -> str:
@@ -30,6 +40,17 @@ def window_around(text: str, start: int, end: int, window: int = 80) -> str:
     return text[a:b].replace("\n", " ").strip()
 
 
+def window_bounds(text: str, start: int, end: int, window: int = 80) -> Tuple[int, int]:
+    """(a, b) such that window_around(...) == text[a:b].replace("\n", " ")."""
+    a = max(0, start - window)
+    b = min(len(text), end + window)
+    while a < b and text[a].isspace():
+        a += 1
+    while b > a and text[b - 1].isspace():
+        b -= 1
+    return a, b
+
+
 def classify_status(text: str, start: int, end: int,
                     performed_cues, planned_cues, negation_cues) -> str:
     """
@@ -39,19 +60,28 @@ def classify_status(text: str, start: int, end: int,
     - Many templated EHR fields express absence as "(None)" / "None" / "No".
       Treat these as explicit negation even if config NEGATION_CUES misses them.
     """
-    ctx = window_around(text, start, end, window=120).lower()
-
-    # Hard-stop for common templated negations
-    none_negation_re = r"\(\s*none\s*\)|\b(none|no|denies|denied|negative)\b"
-    if re.search(none_negation_re, ctx):
-        return "denied"
-
-    if any(re.search(p, ctx) for p in negation_cues):
-        return "denied"
-    if any(re.search(p, ctx) for p in planned_cues):
-        return "planned"
-    if any(re.search(p, ctx) for p in performed_cues):
-        return "performed"
+    # cue lists (or PatternSets) are matched case-sensitively against the
+    # lowered context; the note's cue positions are indexed once and shared
+    # by all of its mentions
+    cues = [
+        (NONE_NEGATION_SET, "denied"),  # hard stop for templated negations
+        (pattern_set(negation_cues, 0), "denied"),
+        (pattern_set(planned_cues, 0), "planned"),
+        (pattern_set(performed_cues, 0), "performed"),
+    ]
+
+    idx = cue_index(text, lower=True, newlines=False)
+    if idx is None:
+        ctx = window_around(text, start, end, window=120).lower()
+        for cue_set, status in cues:
+            if cue_set.has_any(ctx):
+                return status
+        return "history"
+
+    a, b = window_bounds(text, start, end, window=120)
+    for cue_set, status in cues:
+        if idx.any_in(cue_set, a, b):
+            return status
     return "history"
 
 
@@ -1,8 +1,16 @@
 #!/usr/bin/env python3
 
+import os
 import sys
 import pandas as pd
 
+from export_one_patient_deid_bundle import (
+    DEFAULT_DEID_INPUTS,
+    DEFAULT_OUT_DIR,
+    detect_pid_col,
+)
+from ingest.row_index import load_row_index
+
 # === EDIT PATH IF NEEDED ===
 CROSSWALK_PATH = "CROSSWALK/CROSSWALK__MRN_to_patient_id__vNEW.csv"
 
@@ -25,3 +33,16 @@ patient_id = match.iloc[0]["patient_id"]
 
 print(f"MRN: {mrn_input}")
 print(f"Encrypted patient_id: {patient_id}")
+
+# Where this patient's DE-ID note rows are (row index lookup, no full scan)
+for path in DEFAULT_DEID_INPUTS:
+    if not os.path.exists(path):
+        continue
+    idx = load_row_index(path, key_col=detect_pid_col)
+    print(f"  {os.path.basename(path)}: {idx.count(patient_id)} note rows")
+
+bundle_dir = os.path.join(DEFAULT_OUT_DIR, patient_id)
+if os.path.isdir(bundle_dir):
+    print(f"Bundle: {bundle_dir}")
+else:
+    print(f"No bundle yet; export with: python export_one_patient_deid_bundle.py --patient_id {patient_id}")
@@ -73,6 +73,11 @@ NOTE_GLOBS = [
     "{0}/**/HPI11526*operation notes.csv".format(BASE_DIR),
 ]
 
+NOTE_STORE = "{0}/_outputs/note_store.parquet".format(BASE_DIR)
+
+from ingest.csv_utils import find_files, read_csv_robust  # noqa: E402
+from ingest.note_store import load_notes  # noqa: E402
+
 # ============================================================
 # Radiation patterns
 # ============================================================
@@ -182,24 +187,6 @@ def has_rad_before_only(text):
 # Utilities
 # ============================================================
 
-def read_csv_robust(path):
-    common_kwargs = dict(dtype=str, engine="python")
-    try:
-        return pd.read_csv(path, **common_kwargs, on_bad_lines="skip")
-    except TypeError:
-        try:
-            return pd.read_csv(path, **common_kwargs, error_bad_lines=False, warn_bad_lines=True)
-        except UnicodeDecodeError:
-            return pd.read_csv(path, **common_kwargs, encoding="latin-1",
-                               error_bad_lines=False, warn_bad_lines=True)
-    except UnicodeDecodeError:
-        try:
-            return pd.read_csv(path, **common_kwargs, encoding="latin-1", on_bad_lines="skip")
-        except TypeError:
-            return pd.read_csv(path, **common_kwargs, encoding="latin-1",
-                               error_bad_lines=False, warn_bad_lines=True)
-
-
 def clean_cols(df):
     df.columns = [str(c).strip().replace("\ufeff", "") for c in df.columns]
     return df
@@ -369,70 +356,7 @@ def load_recon_anchor_map():
 # ============================================================
 
 def load_and_reconstruct_notes():
-    note_files = []
-    for g in NOTE_GLOBS:
-        note_files.extend(glob(g, recursive=True))
-    note_files = sorted(set(note_files))
-    if not note_files:
-        raise FileNotFoundError("No note CSVs found.")
-
-    all_rows = []
-    for fp in note_files:
-        df = clean_cols(read_csv_robust(fp))
-        df = normalize_mrn(df)
-
-        text_col = pick_col(df, ["NOTE_TEXT", "NOTE TEXT", "NOTE_TEXT_FULL", "TEXT", "NOTE"])
-        id_col   = pick_col(df, ["NOTE_ID", "NOTE ID"])
-        line_col = pick_col(df, ["LINE"], required=False)
-        type_col = pick_col(df, ["NOTE_TYPE", "NOTE TYPE"], required=False)
-        date_col = pick_col(df, ["NOTE_DATE_OF_SERVICE", "NOTE DATE OF SERVICE",
-                                  "OPERATION_DATE", "ADMIT_DATE", "HOSP_ADMSN_TIME"], required=False)
-
-        df[text_col] = df[text_col].fillna("").astype(str)
-        df[id_col]   = df[id_col].fillna("").astype(str)
-        if line_col: df[line_col] = df[line_col].fillna("").astype(str)
-        if type_col: df[type_col] = df[type_col].fillna("").astype(str)
-        if date_col: df[date_col] = df[date_col].fillna("").astype(str)
-        df["_SOURCE_FILE_"] = os.path.basename(fp)
-
-        keep = [MERGE_KEY, id_col, text_col, "_SOURCE_FILE_"]
-        if line_col: keep.append(line_col)
-        if type_col: keep.append(type_col)
-        if date_col: keep.append(date_col)
-
-        tmp = df[keep].copy().rename(columns={id_col: "NOTE_ID", text_col: "NOTE_TEXT"})
-        if line_col and line_col != "LINE":      tmp = tmp.rename(columns={line_col: "LINE"})
-        if type_col and type_col != "NOTE_TYPE": tmp = tmp.rename(columns={type_col: "NOTE_TYPE"})
-        if date_col and date_col != "NOTE_DATE_OF_SERVICE":
-            tmp = tmp.rename(columns={date_col: "NOTE_DATE_OF_SERVICE"})
-        for col in ["LINE", "NOTE_TYPE", "NOTE_DATE_OF_SERVICE"]:
-            if col not in tmp.columns:
-                tmp[col] = ""
-        all_rows.append(tmp)
-
-    notes_raw = pd.concat(all_rows, ignore_index=True)
-
-    def join_note(group):
-        tmp = group.copy()
-        tmp["_LN_"] = tmp["LINE"].apply(to_int_safe)
-        tmp = tmp.sort_values("_LN_", na_position="last")
-        return "\n".join(tmp["NOTE_TEXT"].tolist()).strip()
-
-    reconstructed = []
-    for (mrn, nid), g in notes_raw.groupby([MERGE_KEY, "NOTE_ID"], dropna=False):
-        mrn = str(mrn).strip(); nid = str(nid).strip()
-        if not nid: continue
-        full_text = join_note(g)
-        if not full_text: continue
-        note_type = g["NOTE_TYPE"].astype(str).iloc[0] if g["NOTE_TYPE"].astype(str).str.strip().any() else g["_SOURCE_FILE_"].astype(str).iloc[0]
-        note_date = g["NOTE_DATE_OF_SERVICE"].astype(str).iloc[0] if g["NOTE_DATE_OF_SERVICE"].astype(str).str.strip().any() else ""
-        reconstructed.append({
-            MERGE_KEY: mrn, "NOTE_ID": nid, "NOTE_TYPE": note_type,
-            "NOTE_DATE": note_date, "SOURCE_FILE": g["_SOURCE_FILE_"].astype(str).iloc[0],
-            "NOTE_TEXT": full_text
-        })
-
-    return pd.DataFrame(reconstructed)
+    return load_notes(find_files(NOTE_GLOBS), store_path=NOTE_STORE)
 
 
 # ============================================================
@@ -1,6 +1,10 @@
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import Dict, Iterator, List, Optional, Union
+import os
+import pickle
 import re
+import tempfile
+import zlib
 
 import pandas as pd
 
@@ -24,107 +28,385 @@ DEFAULT_COLMAP: Dict[str, str] = {
 # -------------------------------------------------------------------
 # Encoding cleanup
 # -------------------------------------------------------------------
-def clean_encoding_artifacts(text: str) -> str:
-    if not text:
+# cp1252 bytes that survive the export as literal "<XX>" tokens, and what
+# they stand for. scan_encoding_artifacts.py reports against this table.
+ENCODING_ARTIFACTS: Dict[str, str] = {
+    "<95>": "-",
+    "<97>": "-",
+    "<8D>": "-",
+    "<B0>": " ",
+    "<91>": "'",
+    "<92>": "'",
+    "<93>": '"',
+    "<94>": '"',
+}
+
+# Any hex-like token, known or not
+HEX_TOKEN_RE = re.compile(r"<[0-9A-Fa-f]{2}>")
+
+# Counter keys for non-token fixes (see ArtifactNormalizer.clean)
+CR_KEY = "CR"
+BLANK_LINES_KEY = "BLANK_LINES"
+KEPT_PREFIX = "kept:"
+
+
+class ArtifactNormalizer:
+    """
+    Encoding cleanup driven by an artifact table.
+
+    Every fix is guarded by a C-level substring check, so a note only pays
+    for the artifacts it actually contains: table tokens are replaced only
+    when present (most notes have none), CR/CRLF is converted only when a
+    CR is present, and 3+ newline runs are collapsed in one pass instead of
+    a str.replace loop that rescans the text until it converges.
+
+    clean(text, counts) also tallies what it did into `counts`:
+      "<95>", ...       table tokens replaced
+      "kept:<XX>"       hex tokens not in the table (left as-is)
+      "CR"              CR / CRLF line endings converted to LF
+      "BLANK_LINES"     runs of 3+ newlines collapsed to one blank line
+    """
+
+    _BLANK_RUN_RE = re.compile(r"\n{3,}")
+
+    def __init__(self, table: Optional[Dict[str, str]] = None):
+        self.table = dict(ENCODING_ARTIFACTS if table is None else table)
+        self._items = list(self.table.items())
+        # shared first char of every token ("<"), checked once per text
+        leads = set(t[:1] for t in self.table)
+        self._lead = leads.pop() if len(leads) == 1 else None
+
+    def clean(self, text: str, counts: Optional[Dict[str, int]] = None) -> str:
+        if not text:
+            return text
+
+        if self._lead is None or self._lead in text:
+            for bad, good in self._items:
+                if bad in text:
+                    if counts is not None:
+                        counts[bad] = counts.get(bad, 0) + text.count(bad)
+                    text = text.replace(bad, good)
+
+        if counts is not None and "<" in text:
+            for tok in HEX_TOKEN_RE.findall(text):
+                key = KEPT_PREFIX + tok
+                counts[key] = counts.get(key, 0) + 1
+
+        if "\r" in text:
+            if counts is not None:
+                counts[CR_KEY] = counts.get(CR_KEY, 0) + text.count("\r")
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+
+        if "\n\n\n" in text:
+            if "\n\n\n\n" in text:
+                text, n = self._BLANK_RUN_RE.subn("\n\n", text)
+            else:
+                # every run is exactly 3 newlines: plain replace is enough
+                n = text.count("\n\n\n")
+                text = text.replace("\n\n\n", "\n\n")
+            if counts is not None:
+                counts[BLANK_LINES_KEY] = counts.get(BLANK_LINES_KEY, 0) + n
+
         return text
 
-    replacements = {
-        "<95>": "-",
-        "<97>": "-",
-        "<8D>": "-",
-        "<B0>": " ",
-        "<91>": "'",
-        "<92>": "'",
-        "<93>": '"',
-        "<94>": '"',
-    }
 
-    for bad, good in replacements.items():
-        text = text.replace(bad, good)
+_DEFAULT_NORMALIZER = ArtifactNormalizer()
+
 
-    text = text.replace("\r\n", "\n").replace("\r", "\n")
+def clean_encoding_artifacts(text: str, counts: Optional[Dict[str, int]] = None) -> str:
+    """
+    Replace ENCODING_ARTIFACTS tokens, normalise line endings to LF and
+    collapse 3+ newlines to a single blank line. Pass a dict as `counts`
+    to accumulate per-kind tallies (see ArtifactNormalizer).
+    """
+    return _DEFAULT_NORMALIZER.clean(text, counts)
 
-    # Collapse triple newlines to double
-    while "\n\n\n" in text:
-        text = text.replace("\n\n\n", "\n\n")
 
-    return text
+def _counts_since(before: Dict[str, int], after: Dict[str, int]) -> Dict[str, int]:
+    """What was added to a shared counts dict since the `before` snapshot."""
+    return {k: v - before.get(k, 0) for k, v in after.items() if v != before.get(k, 0)}
+
+
+def format_artifact_counts(counts: Dict[str, int]) -> str:
+    if not counts:
+        return "none"
+    return ", ".join(
+        "{}={}".format(k, v) for k, v in sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))
+    )
 
 
 # -------------------------------------------------------------------
 # Insert line breaks before/after known Breast RESTORE headings
 # (needed because many notes are "flattened" into one line)
 # -------------------------------------------------------------------
+HEADINGS: List[str] = [
+    # Clinic
+    "REASON FOR VISIT:",
+    "CHIEF COMPLAINT:",
+    "CC:",
+    "HPI:",
+    "HISTORY OF PRESENT ILLNESS:",
+    "INTERVAL HISTORY AND REVIEW OF SYSTEMS:",
+    "ROS:",
+    "REVIEW OF SYSTEMS:",
+    "Past Medical History:",
+    "PAST MEDICAL HISTORY:",
+    "Past Surgical History:",
+    "PAST SURGICAL HISTORY:",
+    "FAMILY HSTORY:",
+    "FAMILY HISTORY:",
+    "Social History:",
+    "SOCIAL HISTORY:",
+    "Physical Exam:",
+    "PHYSICAL EXAM:",
+    "PATHOLOY:",
+    "PATHOLOGY:",
+    "RADIOLOGY:",
+    "LABS:",
+    "ASSESSMENT:",
+    "ASSESSMENT AND PLAN:",
+    "Assessment and Plan:",
+    "ASSESSMENT/PLAN:",
+    "PLAN:",
+    "TREATMENT:",
+
+    # Inpatient
+    "S/P Procedures(s):",
+    "Subjective:",
+    "Interval History:",
+    "Objective:",
+    "Diagnosis:",
+    "History:",
+    "Assessment/Plan:",
+
+    # Op notes
+    "OP NOTE:",
+    "OPERATIVE REPORT:",
+    "PREOPERATIVE DIAGNOSIS:",
+    "POSTOPERATIVE DIAGNOSIS:",
+    "PROCEDURE:",
+    "ATTENDING SURGEON:",
+    "ASSISTANT:",
+    "ANESTHESIA:",
+    "IV FLUIDS:",
+    "ESTIMATED BLOOD LOSS:",
+    "URINE OUTPUT:",
+    "MICRO SURGICAL DETAILS:",
+    "COMPLICATIONS:",
+    "CONDITION AT THE END OF THE PROCEDURE:",
+    "DISPOSITION:",
+    "INDICATIONS FOR OPERATION:",
+    "DETAILS OF OPERATION:",
+]
+
+
+def _trie_pattern(words: List[str]) -> str:
+    """
+    Regex for a set of literals, factored as a prefix trie
+    ("A(?:SSESSMENT(?::| AND PLAN:|/PLAN:)|...)") so each text position is
+    tested against a single branch per character rather than every word.
+    """
+    trie: Dict[str, dict] = {}
+    for w in words:
+        node = trie
+        for ch in w:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        alts = []
+        end = "" in node
+        for ch in sorted(k for k in node if k):
+            alts.append(re.escape(ch) + build(node[ch]))
+        if not alts:
+            return ""
+        if len(alts) == 1 and not end:
+            return alts[0]
+        body = "(?:" + "|".join(alts) + ")"
+        return body + "?" if end else body
+
+    return build(trie)
+
+
+def _heading_site_plans(headings: List[str]) -> Dict[str, tuple]:
+    """
+    Precompute, for every heading H, what the legacy one-re.sub-per-heading
+    loop leaves behind where H occurs.
+
+    Headings can be suffixes of one another ("History:" of "Past Medical
+    History:", "PROCEDURE:" of "CONDITION AT ... PROCEDURE:"). The loop
+    applies them in list order: once a shorter suffix has been split off, a
+    longer heading no longer matches, while a shorter suffix applied after
+    a longer heading splits it again. For a leftmost-longest match H this
+    yields (lead, body, times):
+
+      lead  - chars at the start of H that stay ordinary text
+      body  - "\n" + the rewritten heading text (without trailing newlines)
+      times - list positions of the headings actually applied; each one
+              leaves one trailing "\n" after the colon
+    """
+    index = {}
+    for i, h in enumerate(headings):
+        index.setdefault(h, i)
+
+    plans = {}
+    for h in index:
+        suffixes = sorted(
+            (g for g in index if h.endswith(g)), key=lambda g: index[g]
+        )
+        applied = []
+        for g in suffixes:
+            if not applied or len(g) < len(applied[-1]):
+                applied.append(g)
+
+        pieces = []
+        for outer, inner in zip(applied, applied[1:]):
+            pieces.append(outer[: len(outer) - len(inner)].rstrip())
+        pieces.append(applied[-1])
+
+        plans[h] = (
+            len(h) - len(applied[0]),
+            "\n" + "\n".join(pieces),
+            tuple(index[g] for g in applied),
+        )
+    return plans
+
+
+_HEADING_RX = re.compile(
+    _trie_pattern(sorted(set(HEADINGS), key=len, reverse=True))
+)
+_HEADING_PLANS = _heading_site_plans(HEADINGS)
+
+
 def insert_heading_newlines(text: str) -> str:
+    """
+    Put each known heading on its own line.
+
+    Equivalent to running, for every heading h in HEADINGS (in order),
+        re.sub(r"\s*" + re.escape(h), "\n" + h + "\n", text)
+    but done in one pass with a single trie-compiled matcher.
+
+    Beyond the per-site plans above, the only interaction between headings
+    is whitespace: a heading's \s* eats the whitespace before it, including
+    trailing newlines that headings applied *earlier in list order* left
+    after the previous colon, when nothing but whitespace separates them.
+    """
     if not text:
         return text
 
-    headings = [
-        # Clinic
-        "REASON FOR VISIT:",
-        "CHIEF COMPLAINT:",
-        "CC:",
-        "HPI:",
-        "HISTORY OF PRESENT ILLNESS:",
-        "INTERVAL HISTORY AND REVIEW OF SYSTEMS:",
-        "ROS:",
-        "REVIEW OF SYSTEMS:",
-        "Past Medical History:",
-        "PAST MEDICAL HISTORY:",
-        "Past Surgical History:",
-        "PAST SURGICAL HISTORY:",
-        "FAMILY HSTORY:",
-        "FAMILY HISTORY:",
-        "Social History:",
-        "SOCIAL HISTORY:",
-        "Physical Exam:",
-        "PHYSICAL EXAM:",
-        "PATHOLOY:",
-        "PATHOLOGY:",
-        "RADIOLOGY:",
-        "LABS:",
-        "ASSESSMENT:",
-        "ASSESSMENT AND PLAN:",
-        "Assessment and Plan:",
-        "ASSESSMENT/PLAN:",
-        "PLAN:",
-        "TREATMENT:",
-
-        # Inpatient
-        "S/P Procedures(s):",
-        "Subjective:",
-        "Interval History:",
-        "Objective:",
-        "Diagnosis:",
-        "History:",
-        "Assessment/Plan:",
-
-        # Op notes
-        "OP NOTE:",
-        "OPERATIVE REPORT:",
-        "PREOPERATIVE DIAGNOSIS:",
-        "POSTOPERATIVE DIAGNOSIS:",
-        "PROCEDURE:",
-        "ATTENDING SURGEON:",
-        "ASSISTANT:",
-        "ANESTHESIA:",
-        "IV FLUIDS:",
-        "ESTIMATED BLOOD LOSS:",
-        "URINE OUTPUT:",
-        "MICRO SURGICAL DETAILS:",
-        "COMPLICATIONS:",
-        "CONDITION AT THE END OF THE PROCEDURE:",
-        "DISPOSITION:",
-        "INDICATIONS FOR OPERATION:",
-        "DETAILS OF OPERATION:",
-    ]
-
-    for h in headings:
-        pattern = r"\s*" + re.escape(h)
-        replacement = "\n" + h + "\n"
-        text = re.sub(pattern, replacement, text)
-
-    return text
+    out = []
+    pos = 0
+    prev_times = None  # type: Optional[tuple]
+
+    for m in _HEADING_RX.finditer(text):
+        lead, body, times = _HEADING_PLANS[m.group(0)]
+        site = m.start() + lead
+
+        gap = text[pos:site]
+        core = gap.rstrip()
+        if prev_times is not None:
+            if core:
+                out.append("\n" * len(prev_times))
+                out.append(core)
+            else:
+                first = times[0]
+                out.append("\n" * sum(1 for t in prev_times if t >= first))
+        else:
+            out.append(core)
+
+        out.append(body)
+        prev_times = times
+        pos = m.end()
+
+    if prev_times is None:
+        return text
+
+    out.append("\n" * len(prev_times))
+    out.append(text[pos:])
+    return "".join(out)
+
+
+# -------------------------------------------------------------------
+# Build one NoteDocument from all LINE rows of a note
+# -------------------------------------------------------------------
+def _note_from_group(
+    note_id,
+    group: pd.DataFrame,
+    csv_path: Path,
+    note_source: str,
+    colmap: Dict[str, str],
+    artifact_counts: Optional[Dict[str, int]] = None,
+) -> NoteDocument:
+    first = group.iloc[0]
+
+    parts = [t for t in group[colmap["text"]].tolist() if isinstance(t, str)]
+    raw_text = "\n".join(parts).strip()
+
+    # Clean + restore structure
+    clean_text = clean_encoding_artifacts(raw_text, artifact_counts).strip()
+    clean_text = insert_heading_newlines(clean_text)
+
+    metadata = {
+        "source_path": str(csv_path),
+        "source_kind": note_source,
+    }
+
+    for key, meta_key in (
+        ("patient_id", "patient_id"),
+        ("encounter_id", "encounter_id"),
+        ("note_type", "note_type_raw"),
+        ("note_date", "note_date_raw"),
+    ):
+        col = colmap.get(key)
+        if col in group.columns:
+            metadata[meta_key] = first[col]
+
+    return NoteDocument(
+        note_id=str(note_id),
+        text=clean_text,
+        metadata=metadata,
+    )
+
+
+def _read_dtypes(colmap: Dict[str, str]) -> Dict[str, type]:
+    # NOTE_ID as text: inferred per read (or per chunk) it comes back int or
+    # float ("2" vs "2.0") depending on whether a blank id was seen
+    return {colmap["note_id"]: str}
+
+
+def _prepare_frame(df: pd.DataFrame, colmap: Dict[str, str]) -> pd.DataFrame:
+    """
+    Drop rows without a NOTE_ID, strip the ids, make LINE numeric
+    (unparseable -> NaN, sorted last) and blank out missing text.
+    """
+    note_id_col = colmap["note_id"]
+    line_col = colmap["line"]
+
+    if line_col not in df.columns:
+        raise ValueError("Expected line column '{}' missing".format(line_col))
+
+    df = df.dropna(subset=[note_id_col])
+    df = df.assign(**{
+        note_id_col: df[note_id_col].astype(str).str.strip(),
+        line_col: pd.to_numeric(df[line_col], errors="coerce"),
+        colmap["text"]: df[colmap["text"]].fillna(""),
+    })
+    return df[df[note_id_col] != ""]
+
+
+def _sort_notes(df: pd.DataFrame, colmap: Dict[str, str]) -> pd.DataFrame:
+    """Rows by (NOTE_ID, LINE), numeric NOTE_IDs in numeric order."""
+    note_id_col = colmap["note_id"]
+    order = pd.DataFrame({
+        "num": pd.to_numeric(df[note_id_col], errors="coerce").values,
+        "nid": df[note_id_col].values,
+        "line": df[colmap["line"]].values,
+    }).sort_values(["num", "nid", "line"], kind="mergesort").index
+    return df.iloc[order]
+
+
+def _note_bucket(note_id: str, n_buckets: int) -> int:
+    return zlib.crc32(note_id.encode("utf-8")) % n_buckets
 
 
 # -------------------------------------------------------------------
@@ -136,74 +418,235 @@ def load_notes_from_csv(
     note_source: str = "unknown",
     colmap: Optional[Dict[str, str]] = None,
     min_short_chars: int = 30,
+    artifact_counts: Optional[Dict[str, int]] = None,
 ) -> List[NoteDocument]:
+    """
+    Load every note in a LINE-level notes CSV.
+
+    Pass a dict as artifact_counts to accumulate the encoding fixes made
+    across all notes (see ArtifactNormalizer); it is also summarised in the
+    log line.
+    """
 
     csv_path = Path(path)
     if colmap is None:
         colmap = DEFAULT_COLMAP
 
     note_id_col = colmap["note_id"]
-    text_col = colmap["text"]
-    line_col = colmap["line"]
-    patient_col = colmap.get("patient_id")
-    enc_col = colmap.get("encounter_id")
-    type_col = colmap.get("note_type")
-    date_col = colmap.get("note_date")
 
     # Load CSV
-    df = pd.read_csv(str(csv_path), encoding="cp1252")
+    df = pd.read_csv(str(csv_path), encoding="cp1252", dtype=_read_dtypes(colmap))
 
     # Basic cleaning
-    df = df.dropna(subset=[note_id_col])
-    df[text_col] = df[text_col].fillna("")
+    df = _prepare_frame(df, colmap)
 
-    if line_col not in df.columns:
-        raise ValueError("Expected line column '{}' missing".format(line_col))
-
-    df = df.sort_values([note_id_col, line_col])
+    df = _sort_notes(df, colmap)
 
     notes: List[NoteDocument] = []
     short_count = 0
+    counts = {} if artifact_counts is None else artifact_counts
+    before = dict(counts)
 
-    for note_id, group in df.groupby(note_id_col):
-        first = group.iloc[0]
+    for note_id, group in df.groupby(note_id_col, sort=False):
+        doc = _note_from_group(note_id, group, csv_path, note_source, colmap, counts)
+        if len(doc.text) < min_short_chars:
+            short_count += 1
+        notes.append(doc)
 
-        parts = [t for t in group[text_col].tolist() if isinstance(t, str)]
-        raw_text = "\n".join(parts).strip()
+    print(
+        "[csv_notes] Loaded {} notes from {} (short < {} chars: {}; artifacts: {})".format(
+            len(notes), csv_path.name, min_short_chars, short_count,
+            format_artifact_counts(_counts_since(before, counts)),
+        )
+    )
 
-        # Clean + restore structure
-        clean_text = clean_encoding_artifacts(raw_text).strip()
-        clean_text = insert_heading_newlines(clean_text)
+    return notes
 
-        if len(clean_text) < min_short_chars:
-            short_count += 1
 
-        metadata = {
-            "source_path": str(csv_path),
-            "source_kind": note_source,
-        }
-
-        if patient_col in group.columns:
-            metadata["patient_id"] = first[patient_col]
-        if enc_col in group.columns:
-            metadata["encounter_id"] = first[enc_col]
-        if type_col in group.columns:
-            metadata["note_type_raw"] = first[type_col]
-        if date_col in group.columns:
-            metadata["note_date_raw"] = first[date_col]
-
-        notes.append(
-            NoteDocument(
-                note_id=str(note_id),
-                text=clean_text,
-                metadata=metadata,
+# -------------------------------------------------------------------
+# Streaming ingest (bounded memory)
+# -------------------------------------------------------------------
+def _read_chunks(csv_path: Path, chunksize: int, colmap: Dict[str, str], usecols=None):
+    return pd.read_csv(
+        str(csv_path), encoding="cp1252", chunksize=chunksize, usecols=usecols,
+        dtype=_read_dtypes(colmap),
+    )
+
+
+def csv_is_grouped_by_note(
+    path: Union[str, Path],
+    *,
+    colmap: Optional[Dict[str, str]] = None,
+    chunksize: int = 200000,
+) -> bool:
+    """
+    True if all LINE rows of each note are contiguous in the file.
+    Only the NOTE_ID column is read, so this pass is cheap.
+    """
+    if colmap is None:
+        colmap = DEFAULT_COLMAP
+    note_id_col = colmap["note_id"]
+
+    closed = set()
+    prev = None
+    for chunk in _read_chunks(Path(path), chunksize, colmap, usecols=[note_id_col]):
+        for nid in chunk[note_id_col].dropna().str.strip().tolist():
+            if not nid:
+                continue
+            if nid == prev:
+                continue
+            if nid in closed:
+                return False
+            if prev is not None:
+                closed.add(prev)
+            prev = nid
+    return True
+
+
+def _iter_grouped(csv_path: Path, colmap: Dict[str, str], chunksize: int):
+    """
+    Yield (note_id, rows) from a file whose notes are contiguous.
+    Rows of the last note in a chunk are carried into the next chunk.
+    """
+    note_id_col = colmap["note_id"]
+    line_col = colmap["line"]
+
+    carry = None  # type: Optional[pd.DataFrame]
+    closed = set()
+    for chunk in _read_chunks(csv_path, chunksize, colmap):
+        chunk = _prepare_frame(chunk, colmap)
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+        if chunk.empty:
+            continue
+
+        last_id = chunk[note_id_col].iloc[-1]
+        is_last = chunk[note_id_col] == last_id
+        carry = chunk[is_last]
+        ready = chunk[~is_last]
+
+        for note_id, group in ready.groupby(note_id_col, sort=False):
+            if note_id in closed:
+                raise ValueError(
+                    "{}: NOTE_ID {!r} is not contiguous; use assume_sorted=False".format(
+                        csv_path.name, note_id
+                    )
+                )
+            closed.add(note_id)
+            yield note_id, group.sort_values(line_col, kind="mergesort")
+
+    if carry is not None and not carry.empty:
+        note_id = carry[note_id_col].iloc[0]
+        if note_id in closed:
+            raise ValueError(
+                "{}: NOTE_ID {!r} is not contiguous; use assume_sorted=False".format(
+                    csv_path.name, note_id
+                )
             )
-        )
+        yield note_id, carry.sort_values(line_col, kind="mergesort")
+
+
+def _iter_spilled(
+    csv_path: Path,
+    colmap: Dict[str, str],
+    chunksize: int,
+    n_buckets: int,
+    spill_dir: Optional[str],
+):
+    """
+    Yield (note_id, rows) from an unsorted file.
+
+    Rows are hash-partitioned by NOTE_ID into n_buckets pickle files on
+    disk; each bucket is then loaded, sorted and grouped on its own, so
+    peak memory is about one bucket rather than the whole file.
+    """
+    note_id_col = colmap["note_id"]
+
+    with tempfile.TemporaryDirectory(prefix="csv_notes_spill_", dir=spill_dir) as tmp:
+        bucket_paths = [os.path.join(tmp, "bucket_{:04d}.pkl".format(i)) for i in range(n_buckets)]
+
+        for chunk in _read_chunks(csv_path, chunksize, colmap):
+            chunk = _prepare_frame(chunk, colmap)
+            if chunk.empty:
+                continue
+            keys = chunk[note_id_col].map(lambda v: _note_bucket(v, n_buckets))
+            for b, part in chunk.groupby(keys, sort=False):
+                with open(bucket_paths[b], "ab") as f:
+                    pickle.dump(part, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        for bp in bucket_paths:
+            if not os.path.exists(bp):
+                continue
+            parts = []
+            with open(bp, "rb") as f:
+                while True:
+                    try:
+                        parts.append(pickle.load(f))
+                    except EOFError:
+                        break
+            os.remove(bp)
+
+            bucket = _sort_notes(pd.concat(parts, ignore_index=True), colmap)
+            for note_id, group in bucket.groupby(note_id_col, sort=False):
+                yield note_id, group
+
+
+def iter_notes_from_csv(
+    path: Union[str, Path],
+    *,
+    note_source: str = "unknown",
+    colmap: Optional[Dict[str, str]] = None,
+    min_short_chars: int = 30,
+    chunksize: int = 50000,
+    assume_sorted: Optional[bool] = None,
+    n_buckets: int = 64,
+    spill_dir: Optional[str] = None,
+    artifact_counts: Optional[Dict[str, int]] = None,
+) -> Iterator[NoteDocument]:
+    """
+    Generator version of load_notes_from_csv.
+
+    Reads the CSV in chunks and yields each NoteDocument as soon as all of
+    its LINE rows have been seen, so downstream extraction can start before
+    ingest finishes and memory stays bounded.
+
+    assume_sorted:
+      True  -> rows of each note are contiguous (e.g. Epic exports ordered by
+               NOTE_ID, LINE); notes stream in file order.
+      False -> rows are spilled to hash buckets on disk first; notes come out
+               bucket by bucket, sorted by NOTE_ID within a bucket.
+      None  -> decided by a cheap NOTE_ID-only pre-scan.
+
+    artifact_counts: as for load_notes_from_csv.
+    """
+    csv_path = Path(path)
+    if colmap is None:
+        colmap = DEFAULT_COLMAP
+
+    if assume_sorted is None:
+        assume_sorted = csv_is_grouped_by_note(csv_path, colmap=colmap)
+
+    if assume_sorted:
+        groups = _iter_grouped(csv_path, colmap, chunksize)
+    else:
+        print("[csv_notes] {} is not grouped by {}; spilling to disk".format(
+            csv_path.name, colmap["note_id"]))
+        groups = _iter_spilled(csv_path, colmap, chunksize, n_buckets, spill_dir)
+
+    n_notes = 0
+    short_count = 0
+    counts = {} if artifact_counts is None else artifact_counts
+    before = dict(counts)
+    for note_id, group in groups:
+        doc = _note_from_group(note_id, group, csv_path, note_source, colmap, counts)
+        n_notes += 1
+        if len(doc.text) < min_short_chars:
+            short_count += 1
+        yield doc
 
     print(
-        "[csv_notes] Loaded {} notes from {} (short < {} chars: {})".format(
-            len(notes), csv_path.name, min_short_chars, short_count
+        "[csv_notes] Streamed {} notes from {} (short < {} chars: {}; artifacts: {})".format(
+            n_notes, csv_path.name, min_short_chars, short_count,
+            format_artifact_counts(_counts_since(before, counts)),
         )
     )
-
-    return notes
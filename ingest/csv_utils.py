@@ -0,0 +1,340 @@
+# ingest/csv_utils.py
+# Python 3.6.8 compatible
+#
+# Shared CSV helpers for the HPI11526 exports (previously copied into each
+# top-level script: read_csv_robust / clean_cols / normalize_mrn / pick_col).
+
+import codecs
+import contextlib
+import csv
+import io
+import os
+import re
+import warnings
+from datetime import datetime
+from glob import glob
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+from pandas.errors import ParserError, ParserWarning
+
+MERGE_KEY = "MRN"
+
+MRN_ALIASES = ["MRN", "mrn", "Patient_MRN", "PAT_MRN", "PATIENT_MRN"]
+
+
+# ============================================================
+# Robust CSV reading
+# ============================================================
+
+# Tried in order; latin-1 decodes any byte, so it is the last resort.
+DEFAULT_ENCODINGS = ("utf-8", "latin-1")
+
+SNIFF_BYTES = 1 << 20
+
+QUARANTINE_SUFFIX = ".quarantine.csv"
+
+# C engine: "expected 3 fields, saw 5"; Python engine: "Expected 3 fields in line 3, saw 5"
+_SKIP_RE = re.compile(r"Skipping line (\d+): [Ee]xpected (\d+) fields(?: in line \d+)?, saw (\d+)")
+
+# Python engine only: records the csv module gave up on, e.g. "unexpected
+# end of data" when an unterminated quote swallows the rest of the file
+_SKIP_OTHER_RE = re.compile(r"Skipping line (\d+): (?![Ee]xpected \d+ fields)")
+
+# Options that change how physical records map to DataFrame rows; with any
+# of these set, malformed rows are quarantined but never re-inserted.
+_LAYOUT_KWARGS = {
+    "header", "names", "skiprows", "skipfooter", "nrows", "usecols",
+    "index_col", "converters", "sep", "delimiter", "quotechar", "comment",
+}
+
+
+def sniff_encoding(path, encodings: Sequence[str] = DEFAULT_ENCODINGS,
+                   sample_bytes: int = SNIFF_BYTES) -> str:
+    """
+    Pick the first encoding in `encodings` that decodes the first
+    sample_bytes of the file ("utf-8-sig" when it starts with a UTF-8 BOM).
+    """
+    with open(path, "rb") as f:
+        raw = f.read(sample_bytes)
+    if raw.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    for enc in encodings:
+        try:
+            # incremental + final=False: a multi-byte char cut at the end of
+            # the sample is not an error
+            codecs.getincrementaldecoder(enc)().decode(raw, final=False)
+            return enc
+        except UnicodeDecodeError:
+            continue
+    return encodings[-1]
+
+
+def _pandas_version() -> Tuple[int, int]:
+    major, minor = pd.__version__.split(".")[:2]
+    return int(major), int(re.match(r"\d+", minor).group(0))
+
+
+def _pandas_has_on_bad_lines() -> bool:
+    # on_bad_lines replaced error_bad_lines/warn_bad_lines in pandas 1.3
+    return _pandas_version() >= (1, 3)
+
+
+def _read_skipping(path, encoding, kwargs, engine="c") -> Tuple[object, List[Tuple[int, int, int]]]:
+    """
+    pd.read_csv skipping malformed rows and returning
+    (result, [(record_no, expected_fields, seen_fields), ...]).
+    record_no is 1-based and counts the header and blank lines. Records the
+    Python engine cannot tokenise at all are reported with seen_fields 0.
+    """
+    if engine != "c":
+        kwargs = dict(kwargs, engine=engine)
+        kwargs.pop("low_memory", None)  # C-engine only
+    if _pandas_has_on_bad_lines():
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always", ParserWarning)
+            result = pd.read_csv(path, encoding=encoding, on_bad_lines="warn", **kwargs)
+        messages = []
+        for w in caught:
+            if issubclass(w.category, ParserWarning) and "Skipping line" in str(w.message):
+                messages.append(str(w.message))
+            else:
+                warnings.warn_explicit(w.message, w.category, w.filename, w.lineno)
+    else:
+        # older pandas prints skipped lines to stderr
+        buf = io.StringIO()
+        with contextlib.redirect_stderr(buf):
+            result = pd.read_csv(path, encoding=encoding, error_bad_lines=False,
+                                 warn_bad_lines=True, **kwargs)
+        messages = [buf.getvalue()]
+
+    n_fields = len(result.columns) if isinstance(result, pd.DataFrame) else 0
+    skipped = []
+    for msg in messages:
+        for m in _SKIP_RE.finditer(msg):
+            skipped.append((int(m.group(1)), int(m.group(2)), int(m.group(3))))
+        for m in _SKIP_OTHER_RE.finditer(msg):
+            skipped.append((int(m.group(1)), n_fields, 0))
+    return result, skipped
+
+
+def _fetch_records(path, encoding, wanted) -> Tuple[Dict[int, List[str]], Dict[int, int]]:
+    """
+    Re-tokenise the file with the csv module up to the last wanted record.
+    Returns ({record_no: fields}, {record_no: data rows the C parser kept
+    before it}) for the wanted records.
+    """
+    records, positions = {}, {}
+    last = max(wanted)
+    kept = 0
+    with open(path, "r", encoding=encoding, newline="") as f:
+        for i, fields in enumerate(csv.reader(f), start=1):
+            if i in wanted:
+                records[i] = fields
+                positions[i] = kept
+            elif i > 1 and fields:
+                kept += 1
+            if i >= last:
+                break
+    return records, positions
+
+
+def _write_quarantine(qpath, rows) -> None:
+    with open(qpath, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["_RECORD_", "_EXPECTED_FIELDS_", "_SEEN_FIELDS_", "_FIELDS_..."])
+        for row in rows:
+            w.writerow(row)
+
+
+def _recover_rows(df, header, rows, encoding, kwargs):
+    """
+    Parse recovered records exactly like the main read (same NA handling
+    and dtypes) and splice them back in at their original positions.
+    """
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    w.writerow(header)
+    for _, fields in rows:
+        w.writerow(fields)
+    buf.seek(0)
+    extra = pd.read_csv(buf, **kwargs)
+
+    key = pd.Series(range(len(df)), dtype="float64")
+    extra_key = pd.Series([pos - 0.5 + k * 1e-6 for k, (pos, _) in enumerate(rows)], dtype="float64")
+    out = pd.concat([df, extra], ignore_index=True)
+    order = pd.concat([key, extra_key], ignore_index=True).sort_values(kind="mergesort").index
+    return out.iloc[order].reset_index(drop=True)
+
+
+def read_csv_robust(path, encodings: Sequence[str] = DEFAULT_ENCODINGS,
+                    quarantine: bool = True, **kwargs):
+    """
+    Read a CSV export as strings with the fast C parser.
+
+    - The encoding is sniffed from a byte sample (first of `encodings`
+      that decodes it); if a later byte disproves it, the next encoding
+      in the list is tried.
+    - Malformed rows (more fields than the header) are not silently
+      dropped. Each one is re-tokenised on its own with the csv module:
+      if its surplus fields are all blank (trailing delimiters) it is
+      trimmed and kept in place, otherwise it is written with its record
+      number to a sidecar "<path>.quarantine.csv".
+    - Only when the C tokenizer cannot parse the file at all (e.g. an
+      unterminated quote) is the whole file read with the Python engine,
+      with the same recovery and quarantine rules. A record it cannot
+      tokenise (the unterminated quote and everything it swallowed) is
+      quarantined whole.
+
+    Extra kwargs go to pd.read_csv (dtype defaults to str). With
+    chunksize/iterator the C reader is returned as-is: bad rows are
+    skipped with a warning but not quarantined.
+    """
+    kwargs.setdefault("dtype", str)
+    path = str(path)
+    if "encoding" in kwargs:
+        encodings = [kwargs.pop("encoding")]
+    enc = sniff_encoding(path, encodings)
+    candidates = [enc] + [e for e in encodings if e != enc and e != "utf-8-sig"]
+
+    if kwargs.get("chunksize") or kwargs.get("iterator"):
+        if _pandas_has_on_bad_lines():
+            return pd.read_csv(path, encoding=enc, on_bad_lines="warn", **kwargs)
+        return pd.read_csv(path, encoding=enc, error_bad_lines=False, warn_bad_lines=True, **kwargs)
+
+    for i, enc in enumerate(candidates):
+        try:
+            df, skipped = _read_skipping(path, enc, kwargs)
+            return _handle_skipped(path, df, skipped, enc, kwargs, quarantine)
+        except UnicodeDecodeError:
+            if i == len(candidates) - 1:
+                raise
+        except ParserError as e:
+            print("[csv] {0}: C parser failed ({1}); reading with the Python engine".format(
+                os.path.basename(path), str(e).strip().splitlines()[-1]))
+            df, skipped = _read_skipping(path, enc, kwargs, engine="python")
+            return _handle_skipped(path, df, skipped, enc, kwargs, quarantine)
+
+
+def _handle_skipped(path, df, skipped, encoding, kwargs, quarantine):
+    if not skipped:
+        return df
+
+    name = os.path.basename(path)
+    wanted = set(r for r, _, _ in skipped)
+    records, positions = _fetch_records(path, encoding, wanted)
+
+    recoverable = (
+        isinstance(df, pd.DataFrame)
+        and not (_LAYOUT_KWARGS & set(kwargs))
+        and kwargs.get("dtype") in (str, object)
+    )
+    header = list(df.columns)
+
+    recovered, bad = [], []
+    for rec, expected, seen in sorted(skipped):
+        fields = records.get(rec)
+        if fields is None:
+            bad.append([rec, expected, seen])
+            continue
+        surplus = fields[expected:]
+        trailing_blank = seen > expected and len(fields) > expected and not any(x.strip() for x in surplus)
+        if recoverable and trailing_blank:
+            recovered.append((positions[rec], fields[:expected]))
+        else:
+            bad.append([rec, expected, len(fields)] + fields)
+
+    if recovered:
+        df = _recover_rows(df, header, recovered, encoding, kwargs)
+
+    msg = "[csv] {0}: {1} malformed row(s)".format(name, len(skipped))
+    if recovered:
+        msg += ", {0} recovered (blank trailing fields)".format(len(recovered))
+    if bad:
+        if quarantine:
+            qpath = path + QUARANTINE_SUFFIX
+            try:
+                _write_quarantine(qpath, bad)
+                msg += ", {0} quarantined to {1}".format(len(bad), qpath)
+            except OSError as e:
+                msg += ", {0} skipped (could not write quarantine file: {1})".format(len(bad), e)
+        else:
+            msg += ", {0} skipped".format(len(bad))
+    print(msg)
+    return df
+
+
+def clean_cols(df):
+    df.columns = [str(c).strip().replace("\ufeff", "") for c in df.columns]
+    return df
+
+
+def normalize_mrn(df, merge_key=MERGE_KEY):
+    for k in MRN_ALIASES:
+        if k in df.columns:
+            if k != merge_key:
+                df = df.rename(columns={k: merge_key})
+            break
+    if merge_key not in df.columns:
+        raise RuntimeError("MRN column not found. Columns: {0}".format(list(df.columns)[:40]))
+    df[merge_key] = df[merge_key].astype(str).str.strip()
+    return df
+
+
+def pick_col(df, options, required=True) -> Optional[str]:
+    for c in options:
+        if c in df.columns:
+            return c
+    if required:
+        raise RuntimeError("Required column missing. Tried={0}. Seen={1}".format(
+            options, list(df.columns)[:60]))
+    return None
+
+
+def to_int_safe(x):
+    try:
+        return int(float(str(x).strip()))
+    except Exception:
+        return None
+
+
+def clean_cell(x):
+    if x is None:
+        return ""
+    s = str(x).strip()
+    if s.lower() in {"", "nan", "none", "null", "na"}:
+        return ""
+    return s
+
+
+DATE_FORMATS = [
+    "%Y-%m-%d", "%Y-%m-%d %H:%M:%S",
+    "%m/%d/%Y", "%m/%d/%Y %H:%M", "%m/%d/%Y %H:%M:%S",
+    "%Y/%m/%d", "%d-%b-%Y", "%d-%b-%Y %H:%M:%S",
+]
+
+
+def parse_date_safe(x):
+    s = clean_cell(x)
+    if not s:
+        return None
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(s, fmt)
+        except Exception:
+            pass
+    try:
+        ts = pd.to_datetime(s, errors="coerce")
+        if pd.isna(ts):
+            return None
+        return ts.to_pydatetime()
+    except Exception:
+        return None
+
+
+def find_files(globs) -> List[str]:
+    """Expand recursive globs into a sorted, de-duplicated file list."""
+    files = []
+    for g in globs:
+        files.extend(glob(g, recursive=True))
+    return sorted(set(files))
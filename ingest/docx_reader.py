@@ -1,8 +1,12 @@
-from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List
+from typing import List, Optional, Tuple, Union
+import os
+
 from docx import Document
-from ..models import NoteDocument
+
+from models import NoteDocument
+
 
 def _table_to_text(table) -> str:
     lines = []
@@ -16,7 +20,8 @@ def _table_to_text(table) -> str:
             lines.append(" | ".join(cells))
     return "\n".join(lines)
 
-def read_docx(path: str, note_id: str | None = None) -> NoteDocument:
+
+def read_docx(path: str, note_id: Optional[str] = None, note_source: str = "docx") -> NoteDocument:
     p = Path(path)
     doc = Document(str(p))
     parts: List[str] = []
@@ -32,4 +37,80 @@ def read_docx(path: str, note_id: str | None = None) -> NoteDocument:
             parts.append("\n[TABLE]\n" + tt)
 
     text = "\n".join(parts).strip()
-    return NoteDocument(note_id=note_id or p.stem, text=text, metadata={"source_path": str(p)})
+
+    # Same keys as csv_notes; DOCX reports carry no patient/encounter columns
+    metadata = {
+        "source_path": str(p),
+        "source_kind": note_source,
+    }
+    return NoteDocument(note_id=note_id or p.stem, text=text, metadata=metadata)
+
+
+# -------------------------------------------------------------------
+# Directory ingest (process pool)
+# -------------------------------------------------------------------
+def find_docx_files(directory: Union[str, Path], recursive: bool = False) -> List[Path]:
+    """Sorted .docx paths under directory, skipping Word "~$" lock files."""
+    d = Path(directory)
+    files = d.rglob("*.docx") if recursive else d.glob("*.docx")
+    return sorted(f for f in files if f.is_file() and not f.name.startswith("~$"))
+
+
+def _read_docx_job(job: Tuple[str, str]):
+    # Runs in a worker process: never raise, so one bad file cannot
+    # take down the batch.
+    path, note_source = job
+    try:
+        return read_docx(path, note_id=Path(path).stem, note_source=note_source), None
+    except Exception as e:
+        return None, "{}: {}".format(type(e).__name__, e)
+
+
+def load_notes_from_docx_dir(
+    directory: Union[str, Path],
+    *,
+    note_source: str = "docx",
+    recursive: bool = False,
+    workers: Optional[int] = None,
+    chunksize: int = 8,
+    min_short_chars: int = 30,
+) -> List[NoteDocument]:
+    """
+    Parse every .docx under directory, one file per task in a process pool
+    (workers defaults to the CPU count; workers <= 1 parses in-process).
+
+    Notes come back in sorted path order whatever the worker count. Files
+    that fail to parse are reported and skipped.
+    """
+
+    files = find_docx_files(directory, recursive=recursive)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(files)))
+
+    jobs = [(str(f), note_source) for f in files]
+    if workers == 1:
+        results = [_read_docx_job(j) for j in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_read_docx_job, jobs, chunksize=max(1, chunksize)))
+
+    notes: List[NoteDocument] = []
+    short_count = 0
+    failed = 0
+    for f, (doc, err) in zip(files, results):
+        if doc is None:
+            failed += 1
+            print("[docx_reader] WARNING: skipped {} ({})".format(f.name, err))
+            continue
+        if len(doc.text) < min_short_chars:
+            short_count += 1
+        notes.append(doc)
+
+    print(
+        "[docx_reader] Loaded {} notes from {} (workers: {}; short < {} chars: {}; failed: {})".format(
+            len(notes), Path(directory).name, workers, min_short_chars, short_count, failed,
+        )
+    )
+
+    return notes
@@ -0,0 +1,178 @@
+# ingest/encounter_store.py
+# Python 3.6.8 compatible
+#
+# Compact, typed structured-encounter table for the HPI11526 Clinic /
+# Inpatient / Operation Encounters CSVs.
+#
+# load_structured_encounters() used to hand every column back as str, and
+# the anchor / age / recon / mastectomy builders re-parsed the same date
+# strings with parse_date_safe() one row at a time. load_encounters()
+# returns the same *_STRUCT columns, but with the low-cardinality ones as
+# categoricals and each date column parsed once (per distinct value) into a
+# datetime64 *_DT companion column. Like the note store, the result is
+# cached as Parquet next to a JSON manifest of the source files and rebuilt
+# when they change.
+#
+# Parquet needs pyarrow (or fastparquet) in the environment.
+
+import os
+
+import pandas as pd
+
+from ingest.csv_utils import (
+    MERGE_KEY,
+    clean_cols,
+    normalize_mrn,
+    parse_date_safe,
+    pick_col,
+    read_csv_robust,
+)
+from ingest.store_manifest import store_is_current as _store_is_current, write_manifest
+
+STORE_FORMAT_VERSION = 1
+
+# (output column, candidate source columns)
+_STR_COLUMNS = [
+    ("STRUCT_DATE_RAW",            ["OPERATION_DATE", "CHECKOUT_TIME", "DISCHARGE_DATE_DT"]),
+    ("RACE_STRUCT",                ["RACE", "Race"]),
+    ("ETHNICITY_STRUCT",           ["ETHNICITY", "Ethnicity"]),
+    ("AGE_AT_ENCOUNTER_STRUCT",    ["AGE_AT_ENCOUNTER", "Age_at_encounter", "AGE"]),
+    ("ADMIT_DATE_STRUCT",          ["ADMIT_DATE", "Admit_Date"]),
+    ("RECONSTRUCTION_DATE_STRUCT", ["RECONSTRUCTION_DATE", "RECONSTRUCTION DATE"]),
+    ("CPT_CODE_STRUCT",            ["CPT_CODE", "CPT CODE", "CPT"]),
+    ("PROCEDURE_STRUCT",           ["PROCEDURE", "Procedure"]),
+    ("REASON_FOR_VISIT_STRUCT",    ["REASON_FOR_VISIT", "REASON FOR VISIT"]),
+]
+
+# string column -> parsed datetime64 column
+DATE_COLUMNS = {
+    "STRUCT_DATE_RAW":            "STRUCT_DATE_DT",
+    "ADMIT_DATE_STRUCT":          "ADMIT_DATE_DT",
+    "RECONSTRUCTION_DATE_STRUCT": "RECONSTRUCTION_DATE_DT",
+}
+
+CATEGORY_COLUMNS = [
+    "STRUCT_SOURCE", "STRUCT_PRIORITY",
+    "CPT_CODE_STRUCT", "PROCEDURE_STRUCT",
+    "RACE_STRUCT", "ETHNICITY_STRUCT",
+]
+
+ENCOUNTER_COLUMNS = (
+    [MERGE_KEY, "STRUCT_SOURCE", "STRUCT_PRIORITY"]
+    + [c for c, _ in _STR_COLUMNS]
+    + list(DATE_COLUMNS.values())
+)
+
+
+# ============================================================
+# CSV -> encounter rows
+# ============================================================
+
+def encounter_source(fp):
+    """(STRUCT_SOURCE, STRUCT_PRIORITY) from the encounter file name."""
+    name = os.path.basename(fp).lower()
+    if "operation encounters" in name:
+        return "operation", 1
+    if "clinic encounters" in name:
+        return "clinic", 2
+    if "inpatient encounters" in name:
+        return "inpatient", 3
+    return "other", 9
+
+
+def read_encounter_rows(fp):
+    """One encounters CSV as canonical *_STRUCT string columns."""
+    df = clean_cols(read_csv_robust(fp))
+    df = normalize_mrn(df)
+    source, priority = encounter_source(fp)
+
+    out = pd.DataFrame()
+    out[MERGE_KEY]          = df[MERGE_KEY].astype(str).str.strip()
+    out["STRUCT_SOURCE"]    = source
+    out["STRUCT_PRIORITY"]  = priority
+    for name, options in _STR_COLUMNS:
+        col = pick_col(df, options, required=False)
+        out[name] = df[col].astype(str) if col else ""
+    return out
+
+
+def parse_date_column(values):
+    """
+    parse_date_safe() over a column as datetime64 (NaT where it gives None).
+    Each distinct string is parsed once; encounter dates repeat heavily.
+    """
+    s = pd.Series(values).astype(str)
+    parsed = {u: parse_date_safe(u) for u in pd.unique(s)}
+    return pd.to_datetime(s.map(parsed), errors="coerce")
+
+
+def compact_encounters(df):
+    """Add the *_DT columns and convert CATEGORY_COLUMNS to categoricals."""
+    df = df.reset_index(drop=True)
+    for raw_col, dt_col in DATE_COLUMNS.items():
+        df[dt_col] = parse_date_column(df[raw_col]).values
+    for c in CATEGORY_COLUMNS:
+        df[c] = df[c].astype("category")
+    return df[ENCOUNTER_COLUMNS]
+
+
+def build_encounters(struct_files):
+    frames = [read_encounter_rows(fp) for fp in sorted(set(struct_files))]
+    if not frames:
+        empty = pd.DataFrame({c: pd.Series(dtype=str) for c in ENCOUNTER_COLUMNS})
+        return compact_encounters(empty)
+    return compact_encounters(pd.concat(frames, ignore_index=True))
+
+
+# ============================================================
+# Store build / load
+# ============================================================
+
+def store_is_current(store_path, struct_files) -> bool:
+    return _store_is_current(store_path, struct_files, STORE_FORMAT_VERSION)
+
+
+def write_encounter_store(enc_df, store_path, struct_files):
+    out_dir = os.path.dirname(str(store_path))
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+
+    tmp_path = str(store_path) + ".tmp"
+    enc_df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, str(store_path))
+
+    write_manifest(
+        store_path, STORE_FORMAT_VERSION, struct_files,
+        n_rows=int(len(enc_df)),
+        columns=ENCOUNTER_COLUMNS,
+    )
+
+
+def load_encounters(struct_files, store_path=None, rebuild=False):
+    """
+    Shared typed encounter loader.
+
+    With a store_path, reads the cached table when it is current for
+    struct_files and (re)builds it otherwise.
+    """
+    if store_path is None:
+        return build_encounters(struct_files)
+
+    if not rebuild and store_is_current(store_path, struct_files):
+        print("[encounter_store] Using {0}".format(store_path))
+        return pd.read_parquet(str(store_path))
+
+    print("[encounter_store] Building {0} from {1} CSV(s)...".format(store_path, len(struct_files)))
+    enc_df = build_encounters(struct_files)
+    try:
+        write_encounter_store(enc_df, store_path, struct_files)
+    except (OSError, ImportError) as e:
+        print("[encounter_store] WARNING: could not save {0}: {1}".format(store_path, e))
+    return enc_df
+
+
+def dt_or_none(v):
+    """A *_DT cell as datetime, or None for NaT (parse_date_safe() semantics)."""
+    if v is None or pd.isna(v):
+        return None
+    return v.to_pydatetime()
@@ -0,0 +1,117 @@
+# ingest/note_manifest.py
+# Python 3.6.8 compatible
+#
+# Content-hash manifest for incremental runs.
+#
+# For every reconstructed note the manifest records (MRN, NOTE_ID,
+# SOURCE_FILE, NOTE_HASH), where NOTE_HASH covers everything an extractor
+# sees: NOTE_ID, NOTE_TYPE, NOTE_DATE and NOTE_TEXT, plus the MRN, so the
+# same note filed under two patients gets two cache entries. diff_notes()
+# compares the current notes against the manifest from the previous run, so
+# a monthly refresh can tell which notes are new or changed and reuse
+# cached results (extractors/result_cache.py) for the rest.
+
+import hashlib
+import os
+from typing import Dict
+
+import pandas as pd
+
+from ingest.csv_utils import MERGE_KEY
+
+NOTE_HASH = "NOTE_HASH"
+
+MANIFEST_COLUMNS = [MERGE_KEY, "NOTE_ID", "SOURCE_FILE", NOTE_HASH]
+
+_HASHED_COLUMNS = [MERGE_KEY, "NOTE_ID", "NOTE_TYPE", "NOTE_DATE", "NOTE_TEXT"]
+
+
+def note_content_hash(mrn, note_id, note_type, note_date, note_text) -> str:
+    payload = "\x1f".join(str(x) for x in (mrn, note_id, note_type, note_date, note_text))
+    return hashlib.sha1(payload.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def add_note_hashes(notes_df):
+    """Return notes_df with a NOTE_HASH column (reconstructed-note columns)."""
+    notes_df = notes_df.copy()
+    cols = [notes_df[c].fillna("").astype(str).tolist() for c in _HASHED_COLUMNS]
+    notes_df[NOTE_HASH] = [note_content_hash(*vals) for vals in zip(*cols)]
+    return notes_df
+
+
+def read_note_manifest(path):
+    """The saved manifest, or an empty one if there is none yet."""
+    if not os.path.exists(str(path)):
+        return pd.DataFrame(columns=MANIFEST_COLUMNS)
+    df = pd.read_csv(str(path), dtype=str, keep_default_na=False)
+    return df[MANIFEST_COLUMNS]
+
+
+def write_note_manifest(notes_df, path):
+    out_dir = os.path.dirname(str(path))
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    man = notes_df[MANIFEST_COLUMNS].sort_values([MERGE_KEY, "NOTE_ID"], kind="mergesort")
+    tmp_path = str(path) + ".tmp"
+    man.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, str(path))
+
+
+def diff_notes(notes_df, manifest_df) -> Dict[str, pd.DataFrame]:
+    """
+    Classify hashed notes against a previous manifest by (MRN, NOTE_ID):
+
+      new        not in the manifest
+      changed    in the manifest with a different NOTE_HASH
+      unchanged  same NOTE_HASH
+      removed    manifest rows with no current note
+    """
+    key = [MERGE_KEY, "NOTE_ID"]
+    prev = manifest_df[key + [NOTE_HASH]].rename(columns={NOTE_HASH: "_PREV_HASH_"})
+    merged = notes_df.merge(prev, on=key, how="left", indicator=True)
+
+    is_new = merged["_merge"].eq("left_only").values
+    same = merged[NOTE_HASH].eq(merged["_PREV_HASH_"]).values
+
+    cur_keys = notes_df[key].drop_duplicates()
+    gone = manifest_df.merge(cur_keys, on=key, how="left", indicator=True)
+
+    return {
+        "new": notes_df[is_new],
+        "changed": notes_df[~is_new & ~same],
+        "unchanged": notes_df[~is_new & same],
+        "removed": manifest_df[gone["_merge"].eq("left_only").values],
+    }
+
+
+def format_note_diff(diff) -> str:
+    return "new={0} changed={1} unchanged={2} removed={3}".format(
+        len(diff["new"]), len(diff["changed"]), len(diff["unchanged"]), len(diff["removed"]))
+
+
+def update_note_manifest(notes_df, manifest_path, update=True) -> Dict[str, pd.DataFrame]:
+    """
+    Diff hashed notes (at least the MANIFEST_COLUMNS) against the manifest
+    at manifest_path and (by default) save them as the new manifest.
+    """
+    diff = diff_notes(notes_df, read_note_manifest(manifest_path))
+    if update:
+        write_note_manifest(notes_df, manifest_path)
+    return diff
+
+
+def changed_notes(diff) -> pd.DataFrame:
+    """The new and changed notes of a diff_notes() result."""
+    return pd.concat([diff["new"], diff["changed"]])
+
+
+def load_changed_notes(notes_df, manifest_path, update=True):
+    """
+    Hash notes_df, diff it against the manifest at manifest_path and
+    (by default) save the new manifest. Returns (hashed notes, new and
+    changed notes, diff); only the second need extracting, the rest have
+    cached results.
+    """
+    notes_df = add_note_hashes(notes_df)
+    diff = update_note_manifest(notes_df, manifest_path, update)
+    return notes_df, changed_notes(diff), diff
@@ -0,0 +1,316 @@
+# ingest/note_store.py
+# Python 3.6.8 compatible
+#
+# Columnar note store for the HPI11526 note exports.
+#
+# The raw Clinic / Inpatient / Operation Notes CSVs hold one row per
+# (NOTE_ID, LINE). Every pipeline script used to re-read them and rebuild
+# each note. build_note_store() does that once and writes the rebuilt notes
+# to a Parquet file (sorted by MRN, NOTE_ID) plus a small JSON manifest of
+# the source files it was built from. load_notes() is the shared loader:
+# it reads the store when it is current and falls back to reconstruction
+# from the CSVs otherwise. iter_patient_notes() streams the store one
+# patient at a time instead.
+#
+# Parquet needs pyarrow (or fastparquet) in the environment.
+
+import os
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from ingest.csv_utils import (
+    MERGE_KEY,
+    clean_cols,
+    normalize_mrn,
+    pick_col,
+    read_csv_robust,
+    to_int_safe,
+)
+from ingest.store_manifest import store_is_current as _store_is_current, write_manifest
+
+NOTE_STORE_COLUMNS = [
+    MERGE_KEY,
+    "ENCRYPTED_PAT_ID",
+    "NOTE_ID",
+    "NOTE_TYPE",
+    "NOTE_DATE",
+    "SOURCE_FILE",
+    "NOTE_TEXT",
+]
+
+STORE_FORMAT_VERSION = 1
+
+# Notes per Parquet row group; MRN-filtered reads skip whole groups.
+ROW_GROUP_SIZE = 20000
+
+
+# ============================================================
+# CSV -> line rows
+# ============================================================
+
+def read_note_rows(fp):
+    """
+    Read one HPI11526 notes CSV into line-level rows with canonical columns:
+    MRN, ENCRYPTED_PAT_ID, NOTE_ID, NOTE_TEXT, _SOURCE_FILE_, LINE,
+    NOTE_TYPE, NOTE_DATE_OF_SERVICE (all strings).
+    """
+    df = clean_cols(read_csv_robust(fp))
+    df = normalize_mrn(df)
+
+    text_col = pick_col(df, ["NOTE_TEXT", "NOTE TEXT", "NOTE_TEXT_FULL", "TEXT", "NOTE"])
+    id_col   = pick_col(df, ["NOTE_ID", "NOTE ID"])
+    line_col = pick_col(df, ["LINE"], required=False)
+    type_col = pick_col(df, ["NOTE_TYPE", "NOTE TYPE"], required=False)
+    date_col = pick_col(df, ["NOTE_DATE_OF_SERVICE", "NOTE DATE OF SERVICE",
+                              "OPERATION_DATE", "ADMIT_DATE", "HOSP_ADMSN_TIME"],
+                        required=False)
+    pid_col  = pick_col(df, ["ENCRYPTED_PAT_ID", "ENCRYPTED PAT ID"], required=False)
+
+    out = pd.DataFrame()
+    out[MERGE_KEY]              = df[MERGE_KEY]
+    out["ENCRYPTED_PAT_ID"]     = df[pid_col].fillna("").astype(str).str.strip() if pid_col else ""
+    out["NOTE_ID"]              = df[id_col].fillna("").astype(str)
+    out["NOTE_TEXT"]            = df[text_col].fillna("").astype(str)
+    out["_SOURCE_FILE_"]        = os.path.basename(fp)
+    out["LINE"]                 = df[line_col].fillna("").astype(str) if line_col else ""
+    out["NOTE_TYPE"]            = df[type_col].fillna("").astype(str) if type_col else ""
+    out["NOTE_DATE_OF_SERVICE"] = df[date_col].fillna("").astype(str) if date_col else ""
+    return out
+
+
+def read_all_note_rows(note_files):
+    if not note_files:
+        raise FileNotFoundError("No HPI11526 Notes CSVs found.")
+    return pd.concat([read_note_rows(fp) for fp in note_files], ignore_index=True)
+
+
+# ============================================================
+# Line rows -> notes
+# ============================================================
+
+def _line_numbers(line):
+    """
+    Vectorised to_int_safe(): int(float(LINE)) as float64, NaN when unparseable.
+    Cells the fast numeric parse rejects are retried with to_int_safe itself.
+    """
+    s = line.astype(str).str.strip()
+    num = pd.to_numeric(s, errors="coerce").astype("float64")
+    num[~np.isfinite(num)] = np.nan
+    retry = num.isna() & s.ne("")
+    if retry.any():
+        num[retry] = s[retry].map(to_int_safe).astype("float64")
+    return np.trunc(num)
+
+
+def reconstruct_notes(notes_raw):
+    """
+    Rebuild one row per (MRN, NOTE_ID) from line-level rows.
+
+    Lines are ordered by their integer LINE number (unparseable last) and
+    joined with newlines. NOTE_TYPE falls back to the source file name and
+    NOTE_DATE to "" when every line of the note has it blank; both, like
+    SOURCE_FILE, come from the note's first row in input order.
+
+    One global stable sort by (MRN, NOTE_ID, LINE number, input row) and
+    one pass of contiguous joins, so cost grows ~linearly with line rows.
+    """
+    if len(notes_raw) == 0:
+        return pd.DataFrame(columns=NOTE_STORE_COLUMNS)
+
+    raw = notes_raw.reset_index(drop=True)
+    n = len(raw)
+
+    ln = _line_numbers(raw["LINE"])
+    order = pd.DataFrame({
+        "k1": raw[MERGE_KEY].astype(str).values,
+        "k2": raw["NOTE_ID"].astype(str).values,
+        "miss": ln.isna().values,
+        "ln": ln.fillna(0.0).values,
+        "row": np.arange(n),
+    }).sort_values(["k1", "k2", "miss", "ln", "row"], kind="mergesort")
+
+    k1 = order["k1"].values
+    k2 = order["k2"].values
+    new_group = np.ones(n, dtype=bool)
+    new_group[1:] = (k1[1:] != k1[:-1]) | (k2[1:] != k2[:-1])
+    starts = np.flatnonzero(new_group)
+    ends = np.append(starts[1:], n)
+
+    texts = raw["NOTE_TEXT"].astype(str).values[order["row"].values].tolist()
+    joined = ["\n".join(texts[a:b]).strip() for a, b in zip(starts, ends)]
+
+    # Group id for every input row, so "first row" fields follow input order
+    gid = np.empty(n, dtype=np.int64)
+    gid[order["row"].values] = np.cumsum(new_group) - 1
+    first_pos = pd.Series(np.arange(n)).groupby(gid, sort=True).min().values
+    first = raw[["NOTE_TYPE", "NOTE_DATE_OF_SERVICE", "_SOURCE_FILE_"]].iloc[first_pos].astype(str)
+    has_type = raw["NOTE_TYPE"].astype(str).str.strip().ne("").groupby(gid, sort=True).any().values
+    has_date = raw["NOTE_DATE_OF_SERVICE"].astype(str).str.strip().ne("").groupby(gid, sort=True).any().values
+
+    pid = raw["ENCRYPTED_PAT_ID"].astype(str)
+    pid = pid.where(pid.str.strip().ne("")).groupby(gid, sort=True).first()
+    pid = pid.reindex(range(len(starts))).fillna("").astype(str).values
+
+    out = pd.DataFrame({
+        MERGE_KEY: pd.Series(k1[starts]).astype(str).str.strip().values,
+        "ENCRYPTED_PAT_ID": pid,
+        "NOTE_ID": pd.Series(k2[starts]).astype(str).str.strip().values,
+        "NOTE_TYPE": np.where(has_type, first["NOTE_TYPE"].values, first["_SOURCE_FILE_"].values),
+        "NOTE_DATE": np.where(has_date, first["NOTE_DATE_OF_SERVICE"].values, ""),
+        "SOURCE_FILE": first["_SOURCE_FILE_"].values,
+        "NOTE_TEXT": joined,
+    }, columns=NOTE_STORE_COLUMNS)
+
+    keep = out["NOTE_ID"].ne("") & out["NOTE_TEXT"].ne("")
+    return out[keep].reset_index(drop=True)
+
+
+def load_and_reconstruct_notes(note_files):
+    """Read the note CSVs and rebuild every note (no store involved)."""
+    return reconstruct_notes(read_all_note_rows(note_files))
+
+
+# ============================================================
+# Store build / load
+# ============================================================
+
+def store_is_current(store_path, note_files) -> bool:
+    """True if the store exists and was built from exactly these source files."""
+    return _store_is_current(store_path, note_files, STORE_FORMAT_VERSION)
+
+
+def write_note_store(notes_df, store_path, note_files):
+    """Write reconstructed notes (sorted by MRN, NOTE_ID) and the manifest."""
+    notes_df = notes_df[NOTE_STORE_COLUMNS].sort_values(
+        [MERGE_KEY, "NOTE_ID"], kind="mergesort").reset_index(drop=True)
+
+    out_dir = os.path.dirname(str(store_path))
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+
+    tmp_path = str(store_path) + ".tmp"
+    notes_df.to_parquet(tmp_path, index=False, row_group_size=ROW_GROUP_SIZE)
+    os.replace(tmp_path, str(store_path))
+
+    write_manifest(
+        store_path, STORE_FORMAT_VERSION, note_files,
+        n_notes=int(len(notes_df)),
+        n_patients=int(notes_df[MERGE_KEY].nunique()),
+        columns=NOTE_STORE_COLUMNS,
+    )
+    return notes_df
+
+
+def build_note_store(note_files, store_path):
+    """Reconstruct all notes from the CSVs once and persist them."""
+    notes_df = load_and_reconstruct_notes(note_files)
+    return write_note_store(notes_df, store_path, note_files)
+
+
+def load_note_store(store_path, columns: Optional[Sequence[str]] = None,
+                    mrns: Optional[Sequence[str]] = None):
+    """
+    Read the note store.
+
+    columns: subset of NOTE_STORE_COLUMNS (default: all)
+    mrns:    only return notes for these MRNs (pushed down to Parquet)
+    """
+    cols = list(columns) if columns else list(NOTE_STORE_COLUMNS)
+    kwargs = {}
+    if mrns is not None:
+        kwargs["filters"] = [(MERGE_KEY, "in", sorted(set(str(m).strip() for m in mrns)))]
+        if MERGE_KEY not in cols:
+            cols = [MERGE_KEY] + cols
+    df = pd.read_parquet(str(store_path), columns=cols, **kwargs)
+    for c in cols:
+        df[c] = df[c].fillna("").astype(str)
+    return df.reset_index(drop=True)
+
+
+def iter_patient_notes(store_path, columns: Optional[Sequence[str]] = None,
+                       batch_size: int = 2000):
+    """
+    Yield (mrn, notes) per patient, in store order (MRN, NOTE_ID).
+
+    The store is read batch_size notes at a time, so memory holds one batch
+    plus the current patient's notes, never the whole store. Needs pyarrow.
+    """
+    import pyarrow.parquet as pq
+
+    cols = list(columns) if columns else list(NOTE_STORE_COLUMNS)
+    if MERGE_KEY not in cols:
+        cols = [MERGE_KEY] + cols
+    pf = pq.ParquetFile(str(store_path))
+
+    seen = set()
+    cur_mrn, pending = None, []
+    for batch in pf.iter_batches(batch_size=batch_size, columns=cols):
+        df = batch.to_pandas()
+        for c in cols:
+            df[c] = df[c].fillna("").astype(str)
+        keys = df[MERGE_KEY].values
+        # [start, end) runs of equal MRN within the batch
+        cuts = [0] + (np.flatnonzero(keys[1:] != keys[:-1]) + 1).tolist() + [len(keys)]
+        for start, end in zip(cuts, cuts[1:]):
+            if start == end:
+                continue
+            mrn = keys[start]
+            if mrn != cur_mrn:
+                if pending:
+                    yield cur_mrn, pd.concat(pending, ignore_index=True)
+                if mrn in seen:
+                    raise RuntimeError("Note store {0} is not sorted by {1} (rebuild it)".format(
+                        store_path, MERGE_KEY))
+                seen.add(mrn)
+                cur_mrn, pending = mrn, []
+            pending.append(df.iloc[start:end])
+    if pending:
+        yield cur_mrn, pd.concat(pending, ignore_index=True)
+
+
+def ensure_note_store(note_files, store_path, rebuild=False) -> None:
+    """
+    Make sure store_path is current for note_files without loading it (as
+    load_notes() would), for readers such as iter_patient_notes().
+    """
+    if not note_files and os.path.exists(str(store_path)):
+        print("[note_store] No note CSVs found; using existing {0}".format(store_path))
+    elif rebuild or not store_is_current(store_path, note_files):
+        print("[note_store] Building {0} from {1} CSV(s)...".format(store_path, len(note_files)))
+        build_note_store(note_files, store_path)
+    else:
+        print("[note_store] Using {0}".format(store_path))
+
+
+def load_notes(note_files, store_path=None, rebuild=False,
+               columns: Optional[Sequence[str]] = None,
+               mrns: Optional[Sequence[str]] = None):
+    """
+    Shared loader for the pipeline scripts.
+
+    With a store_path, reads the store when it is current for note_files
+    and (re)builds it otherwise. If no CSVs are visible but a store exists
+    (e.g. an analysis VM that only received the store), the store is used.
+    Without a store_path, reconstructs from the CSVs.
+    """
+    if store_path is not None and not note_files and os.path.exists(str(store_path)):
+        print("[note_store] No note CSVs found; using existing {0}".format(store_path))
+        return load_note_store(store_path, columns=columns, mrns=mrns)
+
+    if store_path is None:
+        notes_df = load_and_reconstruct_notes(note_files)
+    elif rebuild or not store_is_current(store_path, note_files):
+        print("[note_store] Building {0} from {1} CSV(s)...".format(store_path, len(note_files)))
+        notes_df = build_note_store(note_files, store_path)
+    else:
+        print("[note_store] Using {0}".format(store_path))
+        return load_note_store(store_path, columns=columns, mrns=mrns)
+
+    if mrns is not None:
+        keep = set(str(m).strip() for m in mrns)
+        notes_df = notes_df[notes_df[MERGE_KEY].isin(keep)]
+    if columns:
+        notes_df = notes_df[list(columns)]
+    return notes_df.reset_index(drop=True)
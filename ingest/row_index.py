@@ -0,0 +1,263 @@
+# ingest/row_index.py
+# Python 3.6.8 compatible
+#
+# Byte-offset row index for large per-patient CSV exports (the
+# DEID_FULLTEXT_HPI11526_* note files, the HPI11526 encounter files).
+#
+# build_row_index() scans a CSV once and records, for every data row, its
+# byte offset and length grouped by a key column (ENCRYPTED_PAT_ID). The
+# index is saved next to the CSV as "<csv>.rowindex.npz" together with the
+# source size/mtime, so it is rebuilt automatically when the file changes.
+# RowIndex.read_rows(key) then seeks straight to that patient's rows instead
+# of parsing the whole file.
+
+import csv
+import io
+import os
+from typing import Callable, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from ingest.csv_utils import sniff_encoding
+
+ROW_INDEX_SUFFIX = ".rowindex.npz"
+
+INDEX_FORMAT_VERSION = 1
+
+KeyCol = Union[str, Callable[[Sequence[str]], Optional[str]]]
+
+
+def index_path_for(csv_path, index_dir=None) -> str:
+    name = os.path.basename(str(csv_path)) + ROW_INDEX_SUFFIX
+    if index_dir:
+        return os.path.join(index_dir, name)
+    return str(csv_path) + ROW_INDEX_SUFFIX
+
+
+def _iter_records(f):
+    """
+    Yield (offset, raw_bytes) per CSV record of a binary file handle.
+    A record ends at the first newline where its double quotes balance,
+    so quoted fields with embedded newlines stay in one record.
+    """
+    offset = f.tell()
+    buf = b""
+    quotes = 0
+    start = offset
+    for line in f:
+        if not buf:
+            start = offset
+        buf += line
+        quotes += line.count(b'"')
+        offset += len(line)
+        if quotes % 2 == 0:
+            yield start, buf
+            buf = b""
+            quotes = 0
+    if buf:
+        yield start, buf
+
+
+def _parse_record(raw: bytes, encoding: str) -> List[str]:
+    text = raw.decode(encoding)
+    for fields in csv.reader(io.StringIO(text, newline="")):
+        return fields
+    return []
+
+
+class RowIndex:
+    """
+    Key -> row locations for one CSV.
+
+    keys are sorted and unique; rows of keys[i] are
+    offsets/lengths/row_nos[starts[i]:starts[i] + counts[i]]. row_nos are
+    positions in the DataFrame read_csv_robust() would return for the file.
+    """
+
+    def __init__(self, csv_path, encoding, header, key_col,
+                 keys, starts, counts, offsets, lengths, row_nos):
+        self.csv_path = str(csv_path)
+        self.encoding = encoding
+        self.header = list(header)
+        self.key_col = key_col
+        self.keys = keys
+        self.starts = starts
+        self.counts = counts
+        self.offsets = offsets
+        self.lengths = lengths
+        self.row_nos = row_nos
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _slot(self, key) -> Optional[int]:
+        key = str(key).strip()
+        i = int(np.searchsorted(self.keys, key))
+        if i < len(self.keys) and self.keys[i] == key:
+            return i
+        return None
+
+    def count(self, key) -> int:
+        i = self._slot(key)
+        return 0 if i is None else int(self.counts[i])
+
+    def key_counts(self):
+        """{key: number of rows} for every key in the file."""
+        return dict(zip(self.keys.tolist(), self.counts.tolist()))
+
+    def locate(self, key):
+        """(offsets, lengths, row_nos) arrays for key, in file order."""
+        i = self._slot(key)
+        if i is None:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty
+        s = slice(int(self.starts[i]), int(self.starts[i] + self.counts[i]))
+        return self.offsets[s], self.lengths[s], self.row_nos[s]
+
+    def read_rows(self, key) -> pd.DataFrame:
+        """
+        The rows for key as a string DataFrame indexed by row number,
+        parsed by pandas exactly like a full read_csv_robust() of the file.
+        """
+        offsets, lengths, row_nos = self.locate(key)
+        if len(offsets) == 0:
+            return pd.DataFrame(columns=self.header)
+
+        record_enc = "utf-8" if self.encoding == "utf-8-sig" else self.encoding
+        n_fields = len(self.header)
+
+        buf = io.StringIO()
+        w = csv.writer(buf)
+        w.writerow(self.header)
+        with open(self.csv_path, "rb") as f:
+            for off, ln in zip(offsets.tolist(), lengths.tolist()):
+                f.seek(off)
+                w.writerow(_parse_record(f.read(ln), record_enc)[:n_fields])
+        buf.seek(0)
+
+        df = pd.read_csv(buf, dtype=str)
+        df.index = pd.Index(row_nos.tolist())
+        return df
+
+    def save(self, index_path) -> None:
+        st = os.stat(self.csv_path)
+        tmp_path = str(index_path) + ".tmp.npz"
+        np.savez(
+            tmp_path,
+            format_version=INDEX_FORMAT_VERSION,
+            source_size=int(st.st_size),
+            source_mtime=int(st.st_mtime),
+            encoding=self.encoding,
+            header=np.array(self.header, dtype=str),
+            key_col=self.key_col,
+            keys=self.keys,
+            starts=self.starts,
+            counts=self.counts,
+            offsets=self.offsets,
+            lengths=self.lengths,
+            row_nos=self.row_nos,
+        )
+        os.replace(tmp_path, str(index_path))
+
+
+def build_row_index(csv_path, key_col: KeyCol, encoding: Optional[str] = None) -> RowIndex:
+    """
+    Scan csv_path once and index every data row by key_col (a column name,
+    or a callable picking one from the header, e.g. detect_pid_col).
+
+    Row numbers skip blank lines and rows with more fields than the header
+    that are not just trailing blanks, as read_csv_robust() does.
+    """
+    csv_path = str(csv_path)
+    if encoding is None:
+        encoding = sniff_encoding(csv_path)
+    record_enc = "utf-8" if encoding == "utf-8-sig" else encoding
+
+    keys, offsets, lengths, row_nos = [], [], [], []
+    with open(csv_path, "rb") as f:
+        records = _iter_records(f)
+        try:
+            _, raw_header = next(records)
+        except StopIteration:
+            raise RuntimeError("Empty CSV: {0}".format(csv_path))
+        header = _parse_record(raw_header, encoding)
+
+        col = key_col(header) if callable(key_col) else key_col
+        if col not in header:
+            raise RuntimeError("Key column {0!r} not found in {1}. Columns: {2}".format(
+                col, csv_path, header[:40]))
+        k = header.index(col)
+        n_fields = len(header)
+
+        row_no = 0
+        for off, raw in records:
+            if not raw.strip(b"\r\n"):
+                continue
+            fields = _parse_record(raw, record_enc)
+            if len(fields) > n_fields and any(x.strip() for x in fields[n_fields:]):
+                continue
+            key = fields[k].strip() if k < len(fields) else ""
+            if key:
+                keys.append(key)
+                offsets.append(off)
+                lengths.append(len(raw))
+                row_nos.append(row_no)
+            row_no += 1
+
+    keys = np.array(keys, dtype=str)
+    order = np.argsort(keys, kind="mergesort")
+    uniq, starts, counts = np.unique(keys[order], return_index=True, return_counts=True)
+
+    return RowIndex(
+        csv_path, encoding, header, col,
+        keys=uniq,
+        starts=starts.astype(np.int64),
+        counts=counts.astype(np.int64),
+        offsets=np.array(offsets, dtype=np.int64)[order],
+        lengths=np.array(lengths, dtype=np.int64)[order],
+        row_nos=np.array(row_nos, dtype=np.int64)[order],
+    )
+
+
+def _read_index(index_path, csv_path) -> Optional[RowIndex]:
+    """The saved index if it matches csv_path's current size/mtime, else None."""
+    if not os.path.exists(index_path):
+        return None
+    st = os.stat(csv_path)
+    with np.load(index_path) as z:
+        if int(z["format_version"]) != INDEX_FORMAT_VERSION:
+            return None
+        if int(z["source_size"]) != int(st.st_size) or int(z["source_mtime"]) != int(st.st_mtime):
+            return None
+        return RowIndex(
+            csv_path, str(z["encoding"]), z["header"].tolist(), str(z["key_col"]),
+            keys=z["keys"], starts=z["starts"], counts=z["counts"],
+            offsets=z["offsets"], lengths=z["lengths"], row_nos=z["row_nos"],
+        )
+
+
+def load_row_index(csv_path, key_col: KeyCol, index_dir=None, rebuild=False) -> RowIndex:
+    """
+    Load the row index for csv_path, building (and saving) it first when
+    it is missing, stale, or keyed on a different column.
+    """
+    csv_path = str(csv_path)
+    index_path = index_path_for(csv_path, index_dir)
+
+    if not rebuild:
+        idx = _read_index(index_path, csv_path)
+        if idx is not None:
+            want = key_col(idx.header) if callable(key_col) else key_col
+            if want == idx.key_col:
+                return idx
+
+    print("[row_index] Indexing {0} ...".format(os.path.basename(csv_path)))
+    idx = build_row_index(csv_path, key_col)
+    try:
+        if index_dir:
+            os.makedirs(index_dir, exist_ok=True)
+        idx.save(index_path)
+    except OSError as e:
+        print("[row_index] WARNING: could not save {0}: {1}".format(index_path, e))
+    return idx
@@ -0,0 +1,54 @@
+# ingest/store_manifest.py
+# Python 3.6.8 compatible
+#
+# JSON manifest written next to a cached Parquet store (note_store.py,
+# encounter_store.py). It records the store's format version and the path,
+# size and mtime of every source CSV the store was built from; the store is
+# current while both still match.
+
+import json
+import os
+from typing import Dict, List, Optional
+
+
+def manifest_path(store_path):
+    return str(store_path) + ".manifest.json"
+
+
+def source_signature(source_files) -> List[Dict[str, object]]:
+    sig = []
+    for fp in sorted(set(source_files)):
+        st = os.stat(fp)
+        sig.append({
+            "path": os.path.abspath(fp),
+            "size": int(st.st_size),
+            "mtime": int(st.st_mtime),
+        })
+    return sig
+
+
+def read_manifest(store_path) -> Optional[Dict[str, object]]:
+    mp = manifest_path(store_path)
+    if not os.path.exists(mp):
+        return None
+    with open(mp, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_manifest(store_path, format_version, source_files, **fields) -> None:
+    """Write the manifest: format_version, then fields, then the sources."""
+    man = {"format_version": format_version}
+    man.update(fields)
+    man["sources"] = source_signature(source_files)
+    with open(manifest_path(store_path), "w", encoding="utf-8") as f:
+        json.dump(man, f, indent=2)
+
+
+def store_is_current(store_path, source_files, format_version) -> bool:
+    """True if the store exists, has this format version and was built from exactly these source files."""
+    if not os.path.exists(str(store_path)):
+        return False
+    man = read_manifest(store_path)
+    if not man or man.get("format_version") != format_version:
+        return False
+    return man.get("sources") == source_signature(source_files)
@@ -6,6 +6,7 @@ from __future__ import print_function
 import os
 import re
 import pandas as pd
+from ingest.csv_utils import read_csv_robust
 
 BREAST_RESTORE_DIR = "/home/apokol/Breast_Restore"
 ENCOUNTER_DIR = "/home/apokol/my_data_Breast/HPI-11526/HPI11256"
@@ -22,13 +23,6 @@ OUT_CSV = os.path.join(OUT_DIR, "stage2_before_stage1__encounter_rows.csv")
 CPT_OF_INTEREST = set(["19357", "19364", "19380", "19350"])
 
 
-def read_csv_robust(path):
-    try:
-        return pd.read_csv(path, dtype=object, engine="python", encoding="utf-8")
-    except Exception:
-        return pd.read_csv(path, dtype=object, engine="python", encoding="latin1")
-
-
 def _safe_str(x):
     if x is None:
         return ""
@@ -24,6 +24,7 @@ import os
 import sys
 import subprocess
 import pandas as pd
+from ingest.csv_utils import read_csv_robust as _read_csv_robust
 
 
 ROOT = os.path.abspath(".")
@@ -35,12 +36,7 @@ BATCH_EXPORTER = os.path.join(ROOT, "batch_export_deid_note_bundles.py")
 
 
 def read_csv_robust(path, **kwargs):
-    for enc in ["utf-8", "utf-8-sig", "cp1252", "latin1"]:
-        try:
-            return pd.read_csv(path, encoding=enc, **kwargs)
-        except UnicodeDecodeError:
-            continue
-    raise IOError("Failed to read CSV with common encodings: {}".format(path))
+    return _read_csv_robust(path, encodings=("utf-8", "cp1252", "latin-1"), **kwargs)
 
 
 def normalize_cols(df):
@@ -24,6 +24,7 @@ import sys
 import glob
 import subprocess
 import pandas as pd
+from ingest.csv_utils import read_csv_robust as _read_csv_robust
 
 
 ROOT = os.path.abspath(".")
@@ -56,12 +57,7 @@ def find_latest_summary():
 
 
 def read_csv_robust(path, **kwargs):
-    for enc in ["utf-8", "utf-8-sig", "cp1252", "latin1"]:
-        try:
-            return pd.read_csv(path, encoding=enc, **kwargs)
-        except UnicodeDecodeError:
-            continue
-    raise IOError("Failed to read CSV with common encodings: {}".format(path))
+    return _read_csv_robust(path, encodings=("utf-8", "cp1252", "latin-1"), **kwargs)
 
 
 def normalize_cols(df):
@@ -1,5 +1,6 @@
+from collections.abc import Mapping
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 @dataclass
 class NoteDocument:
@@ -7,11 +8,57 @@ class NoteDocument:
     text: str
     metadata: Dict[str, Any] = field(default_factory=dict)
 
+class SectionSpans(Mapping):
+    """
+    Read-only {section name: section text} view over one note's text.
+
+    Each section is stored as (start, end) spans into `text`; its string is
+    the spans' slices joined with "\n" and is only built when accessed, so
+    the note text is held once. Works wherever SectionedNote.sections is
+    read as a dict (.items(), .get(), [], in, ==).
+    """
+
+    __slots__ = ("text", "spans")
+
+    def __init__(self, text: str, spans: Dict[str, List[Tuple[int, int]]]):
+        self.text = text
+        self.spans = spans
+
+    def __getitem__(self, name: str) -> str:
+        spans = self.spans[name]
+        if len(spans) == 1:
+            a, b = spans[0]
+            return self.text[a:b]
+        return "\n".join([self.text[a:b] for a, b in spans])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.spans)
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+    def __repr__(self) -> str:
+        return "SectionSpans({0!r})".format(self.spans)
+
+    def source_offset(self, name: str, pos: int) -> int:
+        """
+        Offset in the note text of character `pos` of section `name`
+        (e.g. an extractor's match.start() into note.sections[name]).
+        pos == len(section) maps to the end of the last span.
+        """
+        spans = self.spans[name]
+        for a, b in spans:
+            if pos <= b - a:
+                return a + pos
+            pos -= (b - a) + 1  # the "\n" joining this span to the next
+        raise IndexError("offset out of range for section {0!r}".format(name))
+
+
 @dataclass
 class SectionedNote:
     note_id: str
     note_type: str
-    sections: Dict[str, str]
+    sections: Dict[str, str]  # a plain dict, or SectionSpans over the note text
     note_date: Optional[str] = None
 
 @dataclass
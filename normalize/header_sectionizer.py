@@ -0,0 +1,79 @@
+# normalize/header_sectionizer.py
+# Python 3.6.8 compatible
+#
+# The "ALL CAPS HEADING:" sectionizer of the master-abstraction scripts
+# (run_full_pipeline.py, build_patient_master.py, the update_*_only.py
+# updaters and the build_master_rule_*_PATCH.py patches), which each used
+# to carry a private copy of it. A line that is only an upper-case heading
+# followed by a colon starts a new section named after it; everything
+# before the first heading is "FULL".
+#
+# Unlike normalize/sectionizer.py there is no canonical heading map, so the
+# section names are whatever the note says. Results are SectionSpans over
+# the note text (see models.py); normalize/section_cache.py memoizes and
+# persists them.
+
+import re
+from typing import Dict, List, Tuple
+
+from models import SectionSpans
+
+HEADER_RX = re.compile(r"^\s*([A-Z][A-Z0-9 /&\-]{2,60})\s*:\s*$")
+
+# update_vte_only.py / build_master_rule_COMORBIDITY_PATCH.py variant:
+# longer headings, parentheses allowed
+HEADER_RX_WIDE = re.compile(r"^\s*([A-Z][A-Z0-9 /&\-\(\)]{2,80})\s*:\s*$")
+
+
+def _strip_spans(text: str, spans: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Spans whose "\\n"-joined text equals the joined text of spans, .strip()ped."""
+    lo, hi = 0, len(spans)
+    while lo < hi and not text[spans[lo][0]:spans[lo][1]].strip():
+        lo += 1
+    while hi > lo and not text[spans[hi - 1][0]:spans[hi - 1][1]].strip():
+        hi -= 1
+    spans = spans[lo:hi]
+    if spans:
+        a, b = spans[0]
+        while text[a].isspace():
+            a += 1
+        spans[0] = (a, b)
+        a, b = spans[-1]
+        while text[b - 1].isspace():
+            b -= 1
+        spans[-1] = (a, b)
+    return spans
+
+
+def header_sectionize_spans(text: str, header_rx=HEADER_RX) -> SectionSpans:
+    """header_sectionize() as spans into text."""
+    if not text:
+        return SectionSpans("", {"FULL": [(0, 0)]})
+
+    sections = {"FULL": []}  # type: Dict[str, List[Tuple[int, int]]]
+    body = sections["FULL"]
+    pos = 0
+    for line, raw in zip(text.splitlines(), text.splitlines(True)):
+        a = pos
+        pos += len(raw)
+        m = header_rx.match(line)
+        if m:
+            body = sections.setdefault(m.group(1).strip().upper(), [])
+            continue
+        b = a + len(line)
+        # lines separated by a single "\n" in text stay one span
+        if body and body[-1][1] + 1 == a and text[a - 1] == "\n":
+            body[-1] = (body[-1][0], b)
+        else:
+            body.append((a, b))
+
+    out = {}  # type: Dict[str, List[Tuple[int, int]]]
+    for k, spans in sections.items():
+        spans = _strip_spans(text, spans)
+        if spans:
+            out[k] = spans
+    return SectionSpans(text, out if out else {"FULL": [(0, len(text))]})
+
+
+def header_sectionize(text: str, header_rx=HEADER_RX) -> Dict[str, str]:
+    return dict(header_sectionize_spans(text, header_rx).items())
@@ -0,0 +1,169 @@
+# normalize/section_cache.py
+# Python 3.6.8 compatible
+#
+# Shared, persistent sectionizing service.
+#
+# SectionCache.sections(text) returns the note's sections as SectionSpans,
+# memoized by a hash of the note text. With a path, the section offsets are
+# kept next to the note store ("<note_store>.sections.<scheme>.parquet",
+# see section_cache_path()) so every script reading the same corpus reuses
+# them, and a note is sectionized once per corpus version rather than once
+# per script. Cached offsets are dropped when the sectionizer code changes.
+#
+# Schemes:
+#   header       normalize.header_sectionizer, HEADER_RX
+#   header_wide  normalize.header_sectionizer, HEADER_RX_WIDE
+#   canonical    normalize.sectionizer (HEADER_CANON headings)
+#
+# Parquet needs pyarrow (or fastparquet) in the environment.
+
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from models import SectionSpans
+from normalize import header_sectionizer, sectionizer
+from normalize.header_sectionizer import HEADER_RX, HEADER_RX_WIDE, header_sectionize_spans
+from normalize.sectionizer import sectionize_spans
+
+CACHE_FORMAT_VERSION = 1
+
+SCHEMES = {
+    "header":      (lambda text: header_sectionize_spans(text, HEADER_RX), header_sectionizer),
+    "header_wide": (lambda text: header_sectionize_spans(text, HEADER_RX_WIDE), header_sectionizer),
+    "canonical":   (sectionize_spans, sectionizer),
+}
+
+_MODELS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models.py")
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def section_cache_path(store_path, scheme: str = "header") -> str:
+    return "{0}.sections.{1}.parquet".format(store_path, scheme)
+
+
+def scheme_fingerprint(scheme: str) -> str:
+    """Hash of the code a scheme's offsets come from."""
+    _, module = SCHEMES[scheme]
+    h = hashlib.sha1("{0}:{1}".format(CACHE_FORMAT_VERSION, scheme).encode("ascii"))
+    for fp in (module.__file__, _MODELS_PATH):
+        with open(fp, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def _encode(spans: Dict[str, List[Tuple[int, int]]]) -> str:
+    return json.dumps([[k, a, b] for k, v in spans.items() for a, b in v], separators=(",", ":"))
+
+
+def _decode(payload: str) -> Dict[str, List[Tuple[int, int]]]:
+    spans = {}  # type: Dict[str, List[Tuple[int, int]]]
+    for k, a, b in json.loads(payload):
+        spans.setdefault(k, []).append((a, b))
+    return spans
+
+
+class SectionCache:
+    """
+    cache = SectionCache(section_cache_path(NOTE_STORE))
+    note.sections = cache.sections(note_text)
+    ...
+    cache.save()
+    """
+
+    def __init__(self, path: Optional[str] = None, scheme: str = "header"):
+        if scheme not in SCHEMES:
+            raise ValueError("Unknown section scheme {0!r}; expected one of {1}".format(
+                scheme, sorted(SCHEMES)))
+        self.path = path
+        self.scheme = scheme
+        self.hits = 0
+        self.misses = 0
+        self._sectionize = SCHEMES[scheme][0]
+        self._fingerprint = scheme_fingerprint(scheme)
+        self._spans = {}  # type: Dict[str, Dict[str, List[Tuple[int, int]]]]
+        self._new = set()  # type: set
+        self._dirty = False
+        if path:
+            self._spans = self._read(path)
+
+    def _read(self, path) -> Dict[str, Dict[str, List[Tuple[int, int]]]]:
+        if not os.path.exists(path):
+            return {}
+        try:
+            df = pd.read_parquet(path)
+        except Exception as e:
+            print("[section_cache] Ignoring unreadable {0}: {1}".format(path, e))
+            return {}
+        df = df[df["FINGERPRINT"] == self._fingerprint]
+        return {h: _decode(p) for h, p in zip(df["TEXT_HASH"].tolist(), df["SECTIONS"].tolist())}
+
+    def sections(self, text: Optional[str]) -> SectionSpans:
+        text = text or ""
+        key = text_hash(text)
+        spans = self._spans.get(key)
+        if spans is not None:
+            self.hits += 1
+            return SectionSpans(text, spans)
+        self.misses += 1
+        result = self._sectionize(text)
+        self._spans[key] = result.spans
+        self._new.add(key)
+        self._dirty = True
+        return result
+
+    def new_spans(self) -> Dict[str, Dict[str, List[Tuple[int, int]]]]:
+        """Offsets sectionized by this process, for a parent to absorb()."""
+        return {k: self._spans[k] for k in self._new}
+
+    def absorb(self, spans: Dict[str, Dict[str, List[Tuple[int, int]]]], hits: int = 0, misses: int = 0) -> None:
+        """Take over offsets (and hit counts) a worker process computed."""
+        self.hits += hits
+        self.misses += misses
+        for k, v in spans.items():
+            if k not in self._spans:
+                self._spans[k] = v
+                self._new.add(k)
+                self._dirty = True
+
+    def save(self) -> None:
+        """Write the offsets (merged with what other scripts saved meanwhile)."""
+        if not self.path or not self._dirty:
+            return
+        merged = self._read(self.path)
+        merged.update(self._spans)
+
+        out_dir = os.path.dirname(self.path)
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        df = pd.DataFrame({
+            "TEXT_HASH": list(merged),
+            "SECTIONS": [_encode(v) for v in merged.values()],
+        })
+        df["FINGERPRINT"] = self._fingerprint
+        tmp_path = self.path + ".tmp"
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+    def summary(self) -> str:
+        return "hits={0} misses={1}".format(self.hits, self.misses)
+
+
+_SHARED = {}  # type: Dict[Tuple[str, str], SectionCache]
+
+
+def shared_section_cache(store_path, scheme: str = "header") -> SectionCache:
+    """The process-wide SectionCache for a note store and scheme."""
+    path = section_cache_path(store_path, scheme)
+    cache = _SHARED.get((path, scheme))
+    if cache is None:
+        cache = SectionCache(path, scheme)
+        _SHARED[(path, scheme)] = cache
+    return cache
@@ -1,5 +1,8 @@
 import re
-from typing import Dict, List
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+from models import SectionSpans
 
 # -------------------------------------------------------------------
 # Canonical sections: tuned for Breast RESTORE clinic + inpatient + op notes
@@ -160,8 +163,11 @@ CLINIC_EXAM_CUES_RE = re.compile(
 )
 
 
+_WS_RE = re.compile(r"\s+")
+
+
 def _clean_spaces(s: str) -> str:
-    return re.sub(r"\s+", " ", s).strip()
+    return _WS_RE.sub(" ", s).strip()
 
 
 def _strip_trailing_colon(s: str) -> str:
@@ -248,62 +254,240 @@ def _disambiguate_heading(canon_heading: str, lookahead_text: str) -> str:
     return canon_heading
 
 
-def sectionize(text: str, lookahead_lines: int = 12) -> Dict[str, str]:
+# -------------------------------------------------------------------
+# Fast path: heading trie prefilter + offset-based lookahead
+#
+# sectionize() must give exactly what the per-line _looks_like_heading()
+# scan gives. A line can only be a heading if, after leading whitespace, it
+# starts with a known heading followed by ":" or the end of the line, so a
+# precompiled trie of those headings finds the few candidate lines and only
+# they go through the full _looks_like_heading() / _canon() checks.
+# -------------------------------------------------------------------
+def _heading_trie_pattern(keys, space: str) -> str:
     """
-    Split note text into sections.
-
-    Output keys are canonical headings (see HEADER_CANON), plus "__PREAMBLE__".
+    Regex for a set of headings, factored as a prefix trie so a line is
+    tested against one branch per character. A space in a heading becomes
+    `space`, since _clean_spaces() collapses any whitespace run.
     """
-    lines = text.splitlines()
+    trie = {}  # type: Dict[str, dict]
+    for k in keys:
+        node = trie
+        for ch in k:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        alts = []
+        end = "" in node
+        for ch in sorted(c for c in node if c):
+            alts.append((space if ch == " " else re.escape(ch)) + build(node[ch]))
+        if not alts:
+            return ""
+        if len(alts) == 1 and not end:
+            return alts[0]
+        body = "(?:" + "|".join(alts) + ")"
+        return body + "?" if end else body
+
+    return build(trie)
+
+
+_HEADING_KEYS = set(HEADER_CANON) | STRICT_ALLCAPS_COLON
+
+# One line (from str.splitlines()) at a time
+HEADING_PREFIX_RE = re.compile(
+    r"\s*(?:" + _heading_trie_pattern(_HEADING_KEYS, r"\s+") + r")\s*(?::|$)",
+    re.IGNORECASE,
+)
+
+# Whole note, "\n"-separated lines, searched as "\n" + text: the literal
+# "\n" anchor lets the regex engine skip straight from line to line, and
+# whitespace may not cross a line break.
+HEADING_LINE_RE = re.compile(
+    r"\n[^\S\n]*(?:" + _heading_trie_pattern(_HEADING_KEYS, r"[^\S\n]+") + r")[^\S\n]*(?=[:\n]|\Z)",
+    re.IGNORECASE,
+)
 
-    sections = {}  # type: Dict[str, List[str]]
-    current = "__PREAMBLE__"
-    sections[current] = []
+# Characters whose str.upper() spells ASCII letters that re.IGNORECASE does
+# not fold to ("\u00df" -> "SS", the "fi" ligature -> "FI", ...). Notes with
+# any of them are scanned without the prefilter.
+_UPPER_EXPANDS = ("\u00df", "\u0149", "\u01f0", "\u1e96", "\u1e97", "\u1e98", "\u1e99",
+                  "\u1e9a", "\ufb00", "\ufb01", "\ufb02", "\ufb03", "\ufb04", "\ufb05", "\ufb06")
 
-    i = 0
-    while i < len(lines):
-        ln = lines[i].rstrip("\n")
+# ...and notes with line breaks other than "\n" (str.splitlines() honours
+# all of these) are scanned line by line rather than with HEADING_LINE_RE.
+_OTHER_LINE_BREAKS = ("\r", "\x0b", "\x0c", "\x1c", "\x1d", "\x1e", "\x85", "\u2028", "\u2029")
 
-        if _looks_like_heading(ln):
-            canon = _canon(ln)
 
-            # Lookahead window for ambiguity resolution
-            j_end = min(len(lines), i + 1 + lookahead_lines)
-            lookahead = "\n".join(lines[i + 1 : j_end])
-            canon = _disambiguate_heading(canon, lookahead)
+def _contains_any(text: str, chars) -> bool:
+    # a handful of substring scans beats one regex character-class scan
+    return any(c in text for c in chars)
+
+
+# A maximal run of consecutive non-blank lines ("\n"-separated text)
+_LINE_RUN_RE = re.compile(r"[^\n]*\S[^\n]*(?:\n[^\n]*\S[^\n]*)*")
+
+
+def _lookahead_is_imaging(text: str, a: int, b: int) -> bool:
+    """
+    _disambiguate_heading()'s PHYSICAL EXAM test over text[a:b], searched
+    in place. Line breaks are whitespace to both cue regexes, so this is
+    the same as searching the lookahead lines joined with "\\n".
+    """
+    if a >= b:
+        return False
+    return bool(IMAGING_CUES_RE.search(text, a, b)) and not CLINIC_EXAM_CUES_RE.search(text, a, b)
 
-            current = canon
-            sections.setdefault(current, [])
 
+@lru_cache(maxsize=4096)
+def _heading_info(ln: str):
+    """
+    (canonical heading, inline content span or None) if ln is a heading,
+    else None. The span is relative to ln. Heading lines repeat across
+    notes, so the answers are memoized.
+    """
+    if not _looks_like_heading(ln):
+        return None
+    right = None
+    if ":" in ln:
+        left, rest = ln.split(":", 1)
+        left_key = _clean_spaces(left).upper()
+        if left_key in HEADER_CANON or left_key in {"CC", "HPI"}:
             # If line is "HPI: blah", keep "blah" as the first content line
-            if ":" in ln:
-                left, right = ln.split(":", 1)
-                left_key = _clean_spaces(left).upper()
-                if left_key in HEADER_CANON or left_key in {"CC", "HPI"}:
-                    right = right.strip()
-                    if right:
-                        sections[current].append(right)
-
-            i += 1
+            stripped = rest.strip()
+            if stripped:
+                a = len(left) + 1 + (len(rest) - len(rest.lstrip()))
+                right = (a, a + len(stripped))
+    return _canon(ln), right
+
+
+def _add_span(spans: List[Tuple[int, int]], text: str, a: int, b: int) -> None:
+    # Lines separated by a single "\n" in text are kept as one span
+    if spans and spans[-1][1] + 1 == a and text[a - 1] == "\n":
+        spans[-1] = (spans[-1][0], b)
+    else:
+        spans.append((a, b))
+
+
+def _spans_by_line(text: str, lookahead_lines: int, sections: Dict[str, List[Tuple[int, int]]]) -> None:
+    lines = text.splitlines()
+    starts = []
+    pos = 0
+    for raw in text.splitlines(True):
+        starts.append(pos)
+        pos += len(raw)
+    body = sections["__PREAMBLE__"]
+
+    if _contains_any(text, _UPPER_EXPANDS):
+        candidate = _looks_like_heading
+    else:
+        candidate = HEADING_PREFIX_RE.match
+
+    for i, ln in enumerate(lines):
+        a = starts[i]
+        info = _heading_info(ln) if candidate(ln) else None
+        if info is not None:
+            canon, right = info
+
+            # Lookahead window for ambiguity resolution
+            if canon == "PHYSICAL EXAM":
+                j_end = min(len(lines), i + 1 + lookahead_lines)
+                if j_end > i + 1 and _lookahead_is_imaging(
+                        text, starts[i + 1], starts[j_end - 1] + len(lines[j_end - 1])):
+                    canon = "IMAGING"
+
+            body = sections.setdefault(canon, [])
+            if right:
+                body.append((a + right[0], a + right[1]))
             continue
 
         if ln.strip():
-            sections[current].append(ln)
+            _add_span(body, text, a, a + len(ln))
+
+
+def _spans_by_match(text: str, lookahead_lines: int, sections: Dict[str, List[Tuple[int, int]]]) -> None:
+    n = len(text)
+    body = sections["__PREAMBLE__"]
+    pos = 0  # start of the first line not yet assigned to a section
+
+    for m in HEADING_LINE_RE.finditer("\n" + text):
+        a = m.start()  # the match starts at the "\n" before the line
+        e = text.find("\n", a)
+        if e < 0:
+            e = n
+        info = _heading_info(text[a:e])
+        if info is None:
+            continue
+
+        body.extend(r.span() for r in _LINE_RUN_RE.finditer(text, pos, a))
+        pos = e + 1
+
+        canon, right = info
+
+        # Lookahead window for ambiguity resolution
+        if canon == "PHYSICAL EXAM":
+            b = e
+            for _ in range(lookahead_lines):
+                if b >= n:
+                    break
+                b = text.find("\n", b + 1)
+                if b < 0:
+                    b = n
+            if _lookahead_is_imaging(text, e + 1, b):
+                canon = "IMAGING"
+
+        body = sections.setdefault(canon, [])
+        if right:
+            body.append((a + right[0], a + right[1]))
+
+    body.extend(r.span() for r in _LINE_RUN_RE.finditer(text, pos))
+
 
-        i += 1
+def _strip_spans(text: str, spans: List[Tuple[int, int]]) -> None:
+    """Trim spans in place the way str.strip() trims their joined text."""
+    a, b = spans[0]
+    while text[a].isspace():
+        a += 1
+    spans[0] = (a, b)
+    a, b = spans[-1]
+    while text[b - 1].isspace():
+        b -= 1
+    spans[-1] = (a, b)
 
-    # Join and drop empties
-    out: Dict[str, str] = {}
-    for k, chunk_lines in sections.items():
-        body = "\n".join(chunk_lines).strip()
-        if body:
-            out[k] = body
+
+def sectionize_spans(text: str, lookahead_lines: int = 12) -> SectionSpans:
+    """
+    sectionize() as spans into text: the same sections with the same
+    contents, but nothing is copied until a section is read, and
+    SectionSpans.source_offset() maps offsets in a section back to text.
+    """
+    sections = {"__PREAMBLE__": []}  # type: Dict[str, List[Tuple[int, int]]]
+
+    if _contains_any(text, _OTHER_LINE_BREAKS + _UPPER_EXPANDS):
+        _spans_by_line(text, lookahead_lines, sections)
+    else:
+        _spans_by_match(text, lookahead_lines, sections)
+
+    # Drop empties; every span holds non-whitespace, so only the ends need
+    # trimming to match "\n".join(...).strip()
+    out = {}  # type: Dict[str, List[Tuple[int, int]]]
+    for k, spans in sections.items():
+        if spans:
+            _strip_spans(text, spans)
+            out[k] = spans
 
     # Fallback: if nothing survived but the note has text,
     # treat the whole thing as a single PREAMBLE section.
-    if not out:
-        stripped = text.strip()
-        if stripped:
-            return {"__PREAMBLE__": stripped}
+    if not out and text.strip():
+        out["__PREAMBLE__"] = [(0, len(text))]
+        _strip_spans(text, out["__PREAMBLE__"])
+
+    return SectionSpans(text, out)
+
 
-    return out
+def sectionize(text: str, lookahead_lines: int = 12) -> Dict[str, str]:
+    """
+    Split note text into sections.
+
+    Output keys are canonical headings (see HEADER_CANON), plus "__PREAMBLE__".
+    """
+    return dict(sectionize_spans(text, lookahead_lines).items())
@@ -15,6 +15,7 @@ import os
 import re
 import sys
 import pandas as pd
+from ingest.csv_utils import read_csv_robust as _read_csv_robust
 
 # -------------------------
 # CONFIG: edit paths
@@ -47,19 +48,7 @@ COL_OP_DATE = "OPERATION_DATE"
 # Robust CSV reading (NO file handles; supports chunksize)
 # -------------------------
 def read_csv_robust(path, **kwargs):
-    """
-    Try a small set of encodings to avoid UnicodeDecodeError on EHR exports
-    (0xA0 is common in cp1252/latin1). Works with chunksize.
-    """
-    encodings = ["utf-8", "cp1252", "latin1"]
-    last_err = None
-    for enc in encodings:
-        try:
-            return pd.read_csv(path, encoding=enc, engine="python", **kwargs)
-        except UnicodeDecodeError as e:
-            last_err = e
-            continue
-    raise last_err
+    return _read_csv_robust(path, encodings=("utf-8", "cp1252", "latin-1"), **kwargs)
 
 
 def ensure_cols_exist(df_cols, required):
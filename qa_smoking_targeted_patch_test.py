@@ -18,7 +18,6 @@
 
 import os
 import re
-from glob import glob
 from datetime import datetime
 import pandas as pd
 
@@ -40,47 +39,15 @@ NOTE_GLOBS = [
     "{0}/**/HPI11526*operation notes.csv".format(BASE_DIR),
 ]
 
+NOTE_STORE = "{0}/_outputs/note_store.parquet".format(BASE_DIR)
+
+from ingest.csv_utils import find_files, read_csv_robust  # noqa: E402
+from ingest.note_store import load_notes  # noqa: E402
+
 
 # -----------------------
 # Utilities
 # -----------------------
-def read_csv_robust(path):
-    common_kwargs = dict(dtype=str, engine="python")
-    try:
-        return pd.read_csv(path, **common_kwargs, on_bad_lines="skip")
-    except TypeError:
-        try:
-            return pd.read_csv(
-                path,
-                **common_kwargs,
-                error_bad_lines=False,
-                warn_bad_lines=True
-            )
-        except UnicodeDecodeError:
-            return pd.read_csv(
-                path,
-                **common_kwargs,
-                encoding="latin-1",
-                error_bad_lines=False,
-                warn_bad_lines=True
-            )
-    except UnicodeDecodeError:
-        try:
-            return pd.read_csv(
-                path,
-                **common_kwargs,
-                encoding="latin-1",
-                on_bad_lines="skip"
-            )
-        except TypeError:
-            return pd.read_csv(
-                path,
-                **common_kwargs,
-                encoding="latin-1",
-                error_bad_lines=False,
-                warn_bad_lines=True
-            )
-
 def clean_cols(df):
     df.columns = [str(c).strip().replace("\ufeff", "") for c in df.columns]
     return df
@@ -172,112 +139,7 @@ def note_on_or_before_recon(note_dt, recon_dt):
 # Notes reconstruction
 # -----------------------
 def load_and_reconstruct_notes():
-    note_files = []
-    for g in NOTE_GLOBS:
-        note_files.extend(glob(g, recursive=True))
-    note_files = sorted(set(note_files))
-
-    if not note_files:
-        raise FileNotFoundError("No HPI11526 * Notes.csv files found via NOTE_GLOBS.")
-
-    all_notes_rows = []
-
-    for fp in note_files:
-        df = clean_cols(read_csv_robust(fp))
-        df = normalize_mrn(df)
-
-        note_text_col = pick_col(df, ["NOTE_TEXT", "NOTE TEXT", "NOTE_TEXT_FULL", "TEXT", "NOTE"])
-        note_id_col = pick_col(df, ["NOTE_ID", "NOTE ID"])
-        line_col = pick_col(df, ["LINE"], required=False)
-        note_type_col = pick_col(df, ["NOTE_TYPE", "NOTE TYPE"], required=False)
-        date_col = pick_col(
-            df,
-            ["NOTE_DATE_OF_SERVICE", "NOTE DATE OF SERVICE", "OPERATION_DATE", "ADMIT_DATE", "HOSP_ADMSN_TIME"],
-            required=False
-        )
-
-        df[note_text_col] = df[note_text_col].fillna("").astype(str)
-        df[note_id_col] = df[note_id_col].fillna("").astype(str)
-        if line_col:
-            df[line_col] = df[line_col].fillna("").astype(str)
-        if note_type_col:
-            df[note_type_col] = df[note_type_col].fillna("").astype(str)
-        if date_col:
-            df[date_col] = df[date_col].fillna("").astype(str)
-
-        df["_SOURCE_FILE_"] = os.path.basename(fp)
-
-        keep_cols = [MERGE_KEY, note_id_col, note_text_col, "_SOURCE_FILE_"]
-        if line_col:
-            keep_cols.append(line_col)
-        if note_type_col:
-            keep_cols.append(note_type_col)
-        if date_col:
-            keep_cols.append(date_col)
-
-        tmp = df[keep_cols].copy()
-        tmp = tmp.rename(columns={
-            note_id_col: "NOTE_ID",
-            note_text_col: "NOTE_TEXT",
-        })
-
-        if line_col and line_col != "LINE":
-            tmp = tmp.rename(columns={line_col: "LINE"})
-        if note_type_col and note_type_col != "NOTE_TYPE":
-            tmp = tmp.rename(columns={note_type_col: "NOTE_TYPE"})
-        if date_col and date_col != "NOTE_DATE_OF_SERVICE":
-            tmp = tmp.rename(columns={date_col: "NOTE_DATE_OF_SERVICE"})
-
-        if "LINE" not in tmp.columns:
-            tmp["LINE"] = ""
-        if "NOTE_TYPE" not in tmp.columns:
-            tmp["NOTE_TYPE"] = ""
-        if "NOTE_DATE_OF_SERVICE" not in tmp.columns:
-            tmp["NOTE_DATE_OF_SERVICE"] = ""
-
-        all_notes_rows.append(tmp)
-
-    notes_raw = pd.concat(all_notes_rows, ignore_index=True)
-
-    def join_note(group):
-        tmp = group.copy()
-        tmp["_LINE_NUM_"] = tmp["LINE"].apply(to_int_safe)
-        tmp = tmp.sort_values(by=["_LINE_NUM_"], na_position="last")
-        return "\n".join(tmp["NOTE_TEXT"].tolist()).strip()
-
-    reconstructed = []
-    grouped = notes_raw.groupby([MERGE_KEY, "NOTE_ID"], dropna=False)
-
-    for (mrn, nid), g in grouped:
-        mrn = str(mrn).strip()
-        nid = str(nid).strip()
-        if not nid:
-            continue
-
-        full_text = join_note(g)
-        if not full_text:
-            continue
-
-        if g["NOTE_TYPE"].astype(str).str.strip().any():
-            note_type = g["NOTE_TYPE"].astype(str).iloc[0]
-        else:
-            note_type = g["_SOURCE_FILE_"].astype(str).iloc[0]
-
-        if g["NOTE_DATE_OF_SERVICE"].astype(str).str.strip().any():
-            note_date = g["NOTE_DATE_OF_SERVICE"].astype(str).iloc[0]
-        else:
-            note_date = ""
-
-        reconstructed.append({
-            MERGE_KEY: mrn,
-            "NOTE_ID": nid,
-            "NOTE_TYPE": note_type,
-            "NOTE_DATE": note_date,
-            "SOURCE_FILE": g["_SOURCE_FILE_"].astype(str).iloc[0],
-            "NOTE_TEXT": full_text
-        })
-
-    return pd.DataFrame(reconstructed)
+    return load_notes(find_files(NOTE_GLOBS), store_path=NOTE_STORE)
 
 
 # -----------------------
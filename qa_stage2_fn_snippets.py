@@ -16,6 +16,7 @@ import os
 import re
 import glob
 import pandas as pd
+from ingest.csv_utils import read_csv_robust as _read_csv_robust
 
 MISMATCH_PATH = "./_outputs/validation_mismatches_STAGE2_ANCHOR_FINAL_FINAL.csv"
 NOTES_DIR = "/home/apokol/my_data_Breast/HPI-11526/HPI11256"
@@ -38,12 +39,7 @@ BROAD_RX = re.compile(
 )
 
 def read_csv_robust(path, **kwargs):
-    for enc in ["utf-8", "utf-8-sig", "cp1252", "latin1"]:
-        try:
-            return pd.read_csv(path, encoding=enc, **kwargs)
-        except UnicodeDecodeError:
-            continue
-    raise IOError("Failed to read CSV: {}".format(path))
+    return _read_csv_robust(path, encodings=("utf-8", "cp1252", "latin-1"), **kwargs)
 
 def normalize_cols(df):
     df.columns = [str(c).strip().replace(u"\xa0"," ") for c in df.columns]
@@ -27,13 +27,17 @@ RUN ORDER:
 OUTPUTS:
     _outputs/master_abstraction_rule_FINAL_NO_GOLD.csv
     _outputs/pipeline_evidence.csv
+    _outputs/pipeline_profile.json / .csv   (only with PROFILE_EXTRACTORS)
 """
 
 import os
 import re
+import copy
 import math
+import heapq
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from glob import glob
-from datetime import datetime
 
 import pandas as pd
 
@@ -65,10 +69,55 @@ NOTE_GLOBS = [
     "{0}/**/HPI11526*operation notes.csv".format(BASE_DIR),
 ]
 
+NOTE_STORE = "{0}/_outputs/note_store.parquet".format(BASE_DIR)
+ENCOUNTER_STORE = "{0}/_outputs/encounter_store.parquet".format(BASE_DIR)
+
+# Incremental runs: notes whose content hash is unchanged since the last run
+# reuse their cached extractor results (delete the cache to force a full run)
+NOTE_MANIFEST   = "{0}/_outputs/note_manifest.csv".format(BASE_DIR)
+EXTRACTOR_CACHE = "{0}/_outputs/extractor_cache.pkl".format(BASE_DIR)
+
+# Extractor profiling: per-extractor wall time, calls, notes, candidates and
+# exceptions (and per-regex time with PROFILE_REGEXES), written next to the
+# evidence CSV. Off, the extractors are called unwrapped.
+PROFILE_EXTRACTORS = False
+PROFILE_REGEXES    = False
+OUTPUT_PROFILE_JSON = "{0}/_outputs/pipeline_profile.json".format(BASE_DIR)
+OUTPUT_PROFILE_CSV  = "{0}/_outputs/pipeline_profile.csv".format(BASE_DIR)
+
+# Step 4 worker processes. Notes are sharded by MRN and the shards merged
+# back in note order, so the outputs are those of a serial run. 1 runs
+# in-process; None uses every CPU.
+PIPELINE_WORKERS = 1
+
+# Streaming: read the note store one patient at a time, finalize that
+# patient's master row and append its evidence straight to OUTPUT_EVID, so
+# memory follows the largest patient rather than the cohort. Serial only
+# (PIPELINE_WORKERS is ignored); the outputs are those of a full run.
+PIPELINE_STREAMING = False
+
+# Early exit: stop calling the BMI, smoking and comorbidity extractors for a
+# patient once their master fields can no longer change (the anchor-day
+# notes, op notes first, are read first for BMI and smoking). The master is
+# unchanged; the evidence file loses the rows those calls would have added.
+SKIP_SATURATED = False
+
 # ============================================================
 # IMPORTS FROM REPO
 # ============================================================
+from ingest.csv_utils import clean_cell, find_files, parse_date_safe, read_csv_robust  # noqa: E402
+from ingest.encounter_store import dt_or_none, load_encounters  # noqa: E402
+from ingest.note_store import ensure_note_store, iter_patient_notes, load_notes  # noqa: E402
+from ingest.note_manifest import (  # noqa: E402
+    MANIFEST_COLUMNS, NOTE_HASH, add_note_hashes, changed_notes, format_note_diff,
+    load_changed_notes, update_note_manifest,
+)
+from extractors.result_cache import ExtractorCache                # noqa: E402
+from extractors.profiler import ExtractorProfiler                 # noqa: E402
+from aggregate.master_frame import MasterFrame                    # noqa: E402
+from aggregate.anchor_windows import AnchorWindowIndex            # noqa: E402
 from models import SectionedNote, Candidate                       # noqa: E402
+from normalize.section_cache import shared_section_cache  # noqa: E402
 from extractors.age import extract_age                            # noqa: E402
 from extractors.bmi import extract_bmi                            # noqa: E402
 from extractors.smoking import extract_smoking                    # noqa: E402
@@ -103,24 +152,6 @@ MASTER_COLUMNS = [
 # SHARED UTILITIES
 # ============================================================
 
-def read_csv_robust(path):
-    common_kwargs = dict(dtype=str, engine="python")
-    try:
-        return pd.read_csv(path, **common_kwargs, on_bad_lines="skip")
-    except TypeError:
-        try:
-            return pd.read_csv(path, **common_kwargs, error_bad_lines=False, warn_bad_lines=True)
-        except UnicodeDecodeError:
-            return pd.read_csv(path, **common_kwargs, encoding="latin-1",
-                               error_bad_lines=False, warn_bad_lines=True)
-    except UnicodeDecodeError:
-        try:
-            return pd.read_csv(path, **common_kwargs, encoding="latin-1", on_bad_lines="skip")
-        except TypeError:
-            return pd.read_csv(path, **common_kwargs, encoding="latin-1",
-                               error_bad_lines=False, warn_bad_lines=True)
-
-
 def clean_cols(df):
     df.columns = [str(c).strip().replace("\ufeff", "") for c in df.columns]
     return df
@@ -162,38 +193,6 @@ def to_float_safe(x):
         return None
 
 
-def clean_cell(x):
-    if x is None:
-        return ""
-    s = str(x).strip()
-    if s.lower() in {"", "nan", "none", "null", "na"}:
-        return ""
-    return s
-
-
-def parse_date_safe(x):
-    s = clean_cell(x)
-    if not s:
-        return None
-    fmts = [
-        "%Y-%m-%d", "%Y-%m-%d %H:%M:%S",
-        "%m/%d/%Y", "%m/%d/%Y %H:%M", "%m/%d/%Y %H:%M:%S",
-        "%Y/%m/%d", "%d-%b-%Y", "%d-%b-%Y %H:%M:%S",
-    ]
-    for fmt in fmts:
-        try:
-            return datetime.strptime(s, fmt)
-        except Exception:
-            pass
-    try:
-        ts = pd.to_datetime(s, errors="coerce")
-        if pd.isna(ts):
-            return None
-        return ts.to_pydatetime()
-    except Exception:
-        return None
-
-
 def days_between(dt1, dt2):
     if dt1 is None or dt2 is None:
         return None
@@ -206,36 +205,9 @@ def same_calendar_date(dt1, dt2):
     return dt1.date() == dt2.date()
 
 
-HEADER_RX = re.compile(r"^\s*([A-Z][A-Z0-9 /&\-]{2,60})\s*:\s*$")
-
-
-def sectionize(text):
-    if not text:
-        return {"FULL": ""}
-    lines = text.splitlines()
-    sections = {}
-    current = "FULL"
-    sections[current] = []
-    for line in lines:
-        m = HEADER_RX.match(line)
-        if m:
-            hdr = m.group(1).strip().upper()
-            current = hdr
-            if current not in sections:
-                sections[current] = []
-            continue
-        sections[current].append(line)
-    out = {}
-    for k, v in sections.items():
-        joined = "\n".join(v).strip()
-        if joined:
-            out[k] = joined
-    return out if out else {"FULL": text}
-
-
 def build_sectioned_note(note_text, note_type, note_id, note_date):
     return SectionedNote(
-        sections=sectionize(note_text),
+        sections=shared_section_cache(NOTE_STORE).sections(note_text),
         note_type=note_type or "",
         note_id=note_id or "",
         note_date=note_date or ""
@@ -247,63 +219,7 @@ def build_sectioned_note(note_text, note_type, note_id, note_date):
 # ============================================================
 
 def load_structured_encounters():
-    rows = []
-    struct_files = []
-    for g in STRUCT_GLOBS:
-        struct_files.extend(glob(g, recursive=True))
-
-    for fp in sorted(set(struct_files)):
-        df = clean_cols(read_csv_robust(fp))
-        df = normalize_mrn(df)
-        source_name = os.path.basename(fp).lower()
-
-        if "operation encounters" in source_name:
-            encounter_source = "operation"
-            priority = 1
-        elif "clinic encounters" in source_name:
-            encounter_source = "clinic"
-            priority = 2
-        elif "inpatient encounters" in source_name:
-            encounter_source = "inpatient"
-            priority = 3
-        else:
-            encounter_source = "other"
-            priority = 9
-
-        race_col   = pick_col(df, ["RACE", "Race"], required=False)
-        eth_col    = pick_col(df, ["ETHNICITY", "Ethnicity"], required=False)
-        age_col    = pick_col(df, ["AGE_AT_ENCOUNTER", "Age_at_encounter", "AGE"], required=False)
-        admit_col  = pick_col(df, ["ADMIT_DATE", "Admit_Date"], required=False)
-        recon_col  = pick_col(df, ["RECONSTRUCTION_DATE", "RECONSTRUCTION DATE"], required=False)
-        cpt_col    = pick_col(df, ["CPT_CODE", "CPT CODE", "CPT"], required=False)
-        proc_col   = pick_col(df, ["PROCEDURE", "Procedure"], required=False)
-        reason_col = pick_col(df, ["REASON_FOR_VISIT", "REASON FOR VISIT"], required=False)
-        date_col   = pick_col(df, ["OPERATION_DATE", "CHECKOUT_TIME", "DISCHARGE_DATE_DT"], required=False)
-
-        out = pd.DataFrame()
-        out[MERGE_KEY]                      = df[MERGE_KEY].astype(str).str.strip()
-        out["STRUCT_SOURCE"]                = encounter_source
-        out["STRUCT_PRIORITY"]              = priority
-        out["STRUCT_DATE_RAW"]              = df[date_col].astype(str)   if date_col   else ""
-        out["RACE_STRUCT"]                  = df[race_col].astype(str)   if race_col   else ""
-        out["ETHNICITY_STRUCT"]             = df[eth_col].astype(str)    if eth_col    else ""
-        out["AGE_AT_ENCOUNTER_STRUCT"]      = df[age_col].astype(str)    if age_col    else ""
-        out["ADMIT_DATE_STRUCT"]            = df[admit_col].astype(str)  if admit_col  else ""
-        out["RECONSTRUCTION_DATE_STRUCT"]   = df[recon_col].astype(str)  if recon_col  else ""
-        out["CPT_CODE_STRUCT"]              = df[cpt_col].astype(str)    if cpt_col    else ""
-        out["PROCEDURE_STRUCT"]             = df[proc_col].astype(str)   if proc_col   else ""
-        out["REASON_FOR_VISIT_STRUCT"]      = df[reason_col].astype(str) if reason_col else ""
-        rows.append(out)
-
-    if not rows:
-        return pd.DataFrame(columns=[
-            MERGE_KEY, "STRUCT_SOURCE", "STRUCT_PRIORITY", "STRUCT_DATE_RAW",
-            "RACE_STRUCT", "ETHNICITY_STRUCT", "AGE_AT_ENCOUNTER_STRUCT",
-            "ADMIT_DATE_STRUCT", "RECONSTRUCTION_DATE_STRUCT",
-            "CPT_CODE_STRUCT", "PROCEDURE_STRUCT", "REASON_FOR_VISIT_STRUCT"
-        ])
-
-    return pd.concat(rows, ignore_index=True)
+    return load_encounters(find_files(STRUCT_GLOBS), store_path=ENCOUNTER_STORE)
 
 
 # ============================================================
@@ -311,82 +227,7 @@ def load_structured_encounters():
 # ============================================================
 
 def load_and_reconstruct_notes():
-    note_files = []
-    for g in NOTE_GLOBS:
-        note_files.extend(glob(g, recursive=True))
-    note_files = sorted(set(note_files))
-
-    if not note_files:
-        raise FileNotFoundError("No HPI11526 Notes CSVs found.")
-
-    all_rows = []
-
-    for fp in note_files:
-        df = clean_cols(read_csv_robust(fp))
-        df = normalize_mrn(df)
-
-        text_col = pick_col(df, ["NOTE_TEXT", "NOTE TEXT", "NOTE_TEXT_FULL", "TEXT", "NOTE"])
-        id_col   = pick_col(df, ["NOTE_ID", "NOTE ID"])
-        line_col = pick_col(df, ["LINE"], required=False)
-        type_col = pick_col(df, ["NOTE_TYPE", "NOTE TYPE"], required=False)
-        date_col = pick_col(df, ["NOTE_DATE_OF_SERVICE", "NOTE DATE OF SERVICE",
-                                  "OPERATION_DATE", "ADMIT_DATE", "HOSP_ADMSN_TIME"],
-                             required=False)
-
-        df[text_col] = df[text_col].fillna("").astype(str)
-        df[id_col]   = df[id_col].fillna("").astype(str)
-        if line_col: df[line_col] = df[line_col].fillna("").astype(str)
-        if type_col: df[type_col] = df[type_col].fillna("").astype(str)
-        if date_col: df[date_col] = df[date_col].fillna("").astype(str)
-
-        df["_SOURCE_FILE_"] = os.path.basename(fp)
-
-        keep = [MERGE_KEY, id_col, text_col, "_SOURCE_FILE_"]
-        if line_col: keep.append(line_col)
-        if type_col: keep.append(type_col)
-        if date_col: keep.append(date_col)
-
-        tmp = df[keep].copy().rename(columns={id_col: "NOTE_ID", text_col: "NOTE_TEXT"})
-
-        if line_col and line_col != "LINE":
-            tmp = tmp.rename(columns={line_col: "LINE"})
-        if type_col and type_col != "NOTE_TYPE":
-            tmp = tmp.rename(columns={type_col: "NOTE_TYPE"})
-        if date_col and date_col != "NOTE_DATE_OF_SERVICE":
-            tmp = tmp.rename(columns={date_col: "NOTE_DATE_OF_SERVICE"})
-
-        for col in ["LINE", "NOTE_TYPE", "NOTE_DATE_OF_SERVICE"]:
-            if col not in tmp.columns:
-                tmp[col] = ""
-
-        all_rows.append(tmp)
-
-    notes_raw = pd.concat(all_rows, ignore_index=True)
-
-    def join_note(group):
-        tmp = group.copy()
-        tmp["_LN_"] = tmp["LINE"].apply(to_int_safe)
-        tmp = tmp.sort_values("_LN_", na_position="last")
-        return "\n".join(tmp["NOTE_TEXT"].tolist()).strip()
-
-    reconstructed = []
-    for (mrn, nid), g in notes_raw.groupby([MERGE_KEY, "NOTE_ID"], dropna=False):
-        mrn = str(mrn).strip()
-        nid = str(nid).strip()
-        if not nid:
-            continue
-        full_text = join_note(g)
-        if not full_text:
-            continue
-        note_type = g["NOTE_TYPE"].astype(str).iloc[0] if g["NOTE_TYPE"].astype(str).str.strip().any() else g["_SOURCE_FILE_"].astype(str).iloc[0]
-        note_date = g["NOTE_DATE_OF_SERVICE"].astype(str).iloc[0] if g["NOTE_DATE_OF_SERVICE"].astype(str).str.strip().any() else ""
-        reconstructed.append({
-            MERGE_KEY: mrn, "NOTE_ID": nid, "NOTE_TYPE": note_type,
-            "NOTE_DATE": note_date, "SOURCE_FILE": g["_SOURCE_FILE_"].astype(str).iloc[0],
-            "NOTE_TEXT": full_text
-        })
-
-    return pd.DataFrame(reconstructed)
+    return load_notes(find_files(NOTE_GLOBS), store_path=NOTE_STORE)
 
 
 # ============================================================
@@ -431,7 +272,7 @@ def build_recon_anchor_map(struct_df):
     for mrn, g in eligible.groupby(MERGE_KEY):
         has_pref[mrn] = any(
             clean_cell(v).upper() in PREFERRED_CPTS
-            for v in g["CPT_CODE_STRUCT"].fillna("").astype(str).tolist()
+            for v in g["CPT_CODE_STRUCT"].astype(object).fillna("").tolist()
         )
 
     for _, row in eligible.iterrows():
@@ -440,8 +281,8 @@ def build_recon_anchor_map(struct_df):
         if not mrn or source not in src_prio:
             continue
 
-        admit_dt = parse_date_safe(row.get("ADMIT_DATE_STRUCT", ""))
-        recon_dt = parse_date_safe(row.get("RECONSTRUCTION_DATE_STRUCT", ""))
+        admit_dt = dt_or_none(row.get("ADMIT_DATE_DT"))
+        recon_dt = dt_or_none(row.get("RECONSTRUCTION_DATE_DT"))
 
         if admit_dt is None or recon_dt is None:
             continue
@@ -469,9 +310,9 @@ def build_recon_anchor_map(struct_df):
             continue
         if not _is_recon_row(row, has_pref.get(mrn, False)):
             continue
-        dt = (parse_date_safe(row.get("RECONSTRUCTION_DATE_STRUCT", "")) or
-              parse_date_safe(row.get("ADMIT_DATE_STRUCT", "")) or
-              parse_date_safe(row.get("STRUCT_DATE_RAW", "")))
+        dt = (dt_or_none(row.get("RECONSTRUCTION_DATE_DT")) or
+              dt_or_none(row.get("ADMIT_DATE_DT")) or
+              dt_or_none(row.get("STRUCT_DATE_DT")))
         if dt is None:
             continue
         best[mrn] = {
@@ -569,7 +410,7 @@ def build_age_map(struct_df, anchor_map):
     for mrn, g in eligible.groupby(MERGE_KEY):
         has_pref[mrn] = any(
             clean_cell(v).upper() in PREFERRED_CPTS
-            for v in g["CPT_CODE_STRUCT"].fillna("").astype(str).tolist()
+            for v in g["CPT_CODE_STRUCT"].astype(object).fillna("").tolist()
         )
 
     for _, row in eligible.iterrows():
@@ -580,8 +421,8 @@ def build_age_map(struct_df, anchor_map):
 
         age_raw  = clean_cell(row.get("AGE_AT_ENCOUNTER_STRUCT", ""))
         age_base = to_float_safe(age_raw)
-        admit_dt = parse_date_safe(row.get("ADMIT_DATE_STRUCT", ""))
-        recon_dt = parse_date_safe(row.get("RECONSTRUCTION_DATE_STRUCT", ""))
+        admit_dt = dt_or_none(row.get("ADMIT_DATE_DT"))
+        recon_dt = dt_or_none(row.get("RECONSTRUCTION_DATE_DT"))
         cpt      = clean_cell(row.get("CPT_CODE_STRUCT", "")).upper()
 
         if age_base is None or admit_dt is None or recon_dt is None:
@@ -678,6 +519,11 @@ def choose_best_bmi(existing, new, recon_dt):
     return new if bmi_candidate_rank(new, recon_dt) < bmi_candidate_rank(existing, recon_dt) else existing
 
 
+def bmi_saturated(best, recon_dt):
+    # rank classes 0-1 (anchor-day op / clinic notes) beat any other day's note
+    return best is not None and bmi_candidate_rank(best, recon_dt)[0] <= 1
+
+
 def bmi_in_window(note_dt, recon_dt):
     dd = days_between(note_dt, recon_dt)
     if dd is None:
@@ -723,6 +569,12 @@ def choose_best_smoking(existing, new, recon_dt):
     return existing
 
 
+def smoking_saturated(best, recon_dt):
+    # an anchor-day candidate beats any other day's note
+    rank = smoking_candidate_rank(best, recon_dt) if best is not None else None
+    return rank is not None and rank[0] == 0
+
+
 def note_on_or_before(note_dt, recon_dt):
     dd = days_between(note_dt, recon_dt)
     return dd is not None and dd <= 0
@@ -961,7 +813,7 @@ def build_recon_structured_map(struct_df):
     for mrn, g in struct_df.groupby(MERGE_KEY):
         has_pref[mrn] = any(
             clean_cell(v).upper() in PREFERRED_CPTS
-            for v in g["CPT_CODE_STRUCT"].fillna("").astype(str).tolist()
+            for v in g["CPT_CODE_STRUCT"].astype(object).fillna("").tolist()
         )
 
     for _, row in struct_df.iterrows():
@@ -971,7 +823,7 @@ def build_recon_structured_map(struct_df):
             continue
         if not _is_recon_row(row, has_pref.get(mrn, False)):
             continue
-        recon_dt = parse_date_safe(row.get("RECONSTRUCTION_DATE_STRUCT", ""))
+        recon_dt = dt_or_none(row.get("RECONSTRUCTION_DATE_DT"))
         if recon_dt is None:
             continue
         proc = clean_cell(row.get("PROCEDURE_STRUCT", ""))
@@ -998,8 +850,8 @@ def build_mastectomy_events(struct_df):
         proc = clean_cell(row.get("PROCEDURE_STRUCT", ""))
         if not mrn or not proc or not MASTECTOMY_RX.search(proc):
             continue
-        ev_dt = parse_date_safe(row.get("STRUCT_DATE_RAW", "")) or \
-                parse_date_safe(row.get("RECONSTRUCTION_DATE_STRUCT", ""))
+        ev_dt = dt_or_none(row.get("STRUCT_DATE_DT")) or \
+                dt_or_none(row.get("RECONSTRUCTION_DATE_DT"))
         lat   = _infer_lat(proc)
         out.setdefault(mrn, []).append({"date": ev_dt, "laterality": lat, "procedure": proc})
     return out
@@ -1221,6 +1073,11 @@ def extract_comorbidities_inline(note):
     return cands
 
 
+def comorb_saturated(fields):
+    # merge_boolean never turns a positive back into a negative
+    return all(bool(getattr(fields.get(f), "value", False)) for f in COMORB_CONCEPTS)
+
+
 # ============================================================
 # MASTER SEEDING
 # ============================================================
@@ -1253,158 +1110,201 @@ def seed_master(struct_df):
 
 
 # ============================================================
-# MAIN
+# STEP 4: EXTRACTION (serial or patient-sharded)
 # ============================================================
 
-def main():
-    print("=" * 60)
-    print("run_full_pipeline.py")
-    print("=" * 60)
-
-    # ----------------------------------------------------------
-    # 1. Load structured encounters (once)
-    # ----------------------------------------------------------
-    print("\n[1/6] Loading structured encounters...")
-    struct_df = load_structured_encounters()
-    print("      Encounter rows: {0}".format(len(struct_df)))
-
-    recon_anchor_map   = build_recon_anchor_map(struct_df)
-    recon_struct_map   = build_recon_structured_map(struct_df)
-    mastectomy_evt_map = build_mastectomy_events(struct_df)
-    race_map           = build_race_map(struct_df)
-    eth_map            = build_ethnicity_map(struct_df)
-    age_map            = build_age_map(struct_df, recon_anchor_map)
-
-    print("      Recon anchors: {0}".format(len(recon_anchor_map)))
-    print("      Race entries:  {0}".format(len(race_map)))
-
-    # ----------------------------------------------------------
-    # 2. Seed master
-    # ----------------------------------------------------------
-    print("\n[2/6] Seeding master...")
-    master = seed_master(struct_df)
-    master = normalize_mrn(master)
-    print("      MRNs: {0}".format(len(master)))
-
-    # Fill structured demographics
-    for mrn in master[MERGE_KEY].astype(str).str.strip().tolist():
-        mask = master[MERGE_KEY].astype(str).str.strip() == mrn
-        if race_map.get(mrn):
-            master.loc[mask, "Race"] = race_map[mrn]
-        if eth_map.get(mrn):
-            master.loc[mask, "Ethnicity"] = eth_map[mrn]
-        if age_map.get(mrn) is not None:
-            master.loc[mask, "Age"] = age_map[mrn]
-
-    # Fill structured recon fields
-    for mrn, info in recon_struct_map.items():
-        mask = master[MERGE_KEY].astype(str).str.strip() == mrn
-        if not mask.any():
-            continue
-        if info.get("laterality"):
-            master.loc[mask, "Recon_Laterality"] = info["laterality"]
-        if info.get("recon_type"):
-            master.loc[mask, "Recon_Type"] = info["recon_type"]
-        if info.get("recon_class"):
-            master.loc[mask, "Recon_Classification"] = info["recon_class"]
-
-    # ----------------------------------------------------------
-    # 3. Load notes (once)
-    # ----------------------------------------------------------
-    print("\n[3/6] Loading and reconstructing notes...")
-    notes_df = load_and_reconstruct_notes()
-    print("      Reconstructed notes: {0}".format(len(notes_df)))
+# Days from the recon anchor each anchored extractor reads (bmi_in_window,
+# note_on_or_before). PBS takes any dated note; pbs_accept() judges the
+# offset itself. Notes outside a window never reach that extractor.
+ANCHOR_WINDOWS = {
+    "bmi":     (-45, 14),
+    "smoking": (None, 0),
+    "pbs":     (None, None),
+}
 
-    # ----------------------------------------------------------
-    # 4. Run all extractors in one pass
-    # ----------------------------------------------------------
-    print("\n[4/6] Running extractors...")
 
-    evidence_rows = []
+class ExtractionState:
+    """
+    Step 4 accumulators for a set of patients: the whole cohort, one
+    worker's shard or, when streaming, one patient. Everything but the
+    evidence rows is keyed by MRN, so shards with disjoint MRNs merge by
+    dict updates. Each evidence row's note position in notes_df is kept in
+    evidence_notes, so merged rows come back in serial order.
+    """
 
-    # Accumulators
-    best_bmi       = {}   # mrn -> best BMI candidate
-    best_smoking   = {}   # mrn -> best smoking candidate
-    best_pbs       = {}   # mrn -> {field -> best candidate}
-    best_comorb    = {}   # mrn -> {field -> best candidate}
-    best_cancer    = {}   # mrn -> {field -> best candidate}
-    therapy_dates  = {}   # mrn -> {"Radiation": [dt,...], "Chemo": [dt,...], "Mastectomy_Date": [dt,...]}
-    lymphnode_cands = {}  # mrn -> [candidates]
+    def __init__(self):
+        self.evidence_rows   = []
+        self.evidence_notes  = []   # position in notes_df of each evidence row's note
+        self.best_bmi        = {}   # mrn -> best BMI candidate
+        self.best_smoking    = {}   # mrn -> best smoking candidate
+        self.best_pbs        = {}   # mrn -> {field -> best candidate}
+        self.best_comorb     = {}   # mrn -> {field -> best candidate}
+        self.best_cancer     = {}   # mrn -> {field -> best candidate}
+        self.therapy_dates   = {}   # mrn -> {"Radiation": [dt,...], "Chemo": [dt,...], "Mastectomy_Date": [dt,...]}
+        self.lymphnode_cands = {}   # mrn -> [candidates]
+        self.saturated       = {}   # mrn -> {extractors whose fields can no longer change}
+        self.note_count      = 0
+        self.skipped_calls   = 0    # extractor calls saved by saturation
+
+
+def extract_notes(notes_df, ordinals, patients, recon_anchor_map, cache, profiler, progress=False,
+                  skip_saturated=False):
+    """
+    Run the extractors over notes_df (ordinals: each row's position in the
+    full notes_df) for the MRNs in patients (mrn -> Recon_Laterality from
+    step 2) and return the ExtractionState. With skip_saturated, an
+    extractor is no longer called for a patient once none of the fields it
+    feeds can change.
+    """
+    state = ExtractionState()
+    evidence_rows   = state.evidence_rows
+    best_bmi        = state.best_bmi
+    best_smoking    = state.best_smoking
+    best_pbs        = state.best_pbs
+    best_comorb     = state.best_comorb
+    best_cancer     = state.best_cancer
+    therapy_dates   = state.therapy_dates
+    lymphnode_cands = state.lymphnode_cands
+    saturated       = state.saturated
+
+    run_bmi     = profiler.wrap("bmi", extract_bmi)
+    run_smoking = profiler.wrap("smoking", extract_smoking)
+    run_pbs     = profiler.wrap("pbs", extract_pbs)
+    run_comorb  = profiler.wrap("comorbidities", extract_comorbidities_inline)
+    run_cancer  = profiler.wrap("breast_cancer_recon", extract_breast_cancer_recon)
 
     note_count = 0
 
-    for _, row in notes_df.iterrows():
+    # day offsets from each patient's anchor, every date string parsed once
+    empty = [""] * len(notes_df)
+    windows = AnchorWindowIndex(
+        notes_df[MERGE_KEY].tolist() if MERGE_KEY in notes_df.columns else empty,
+        notes_df["NOTE_DATE"].tolist() if "NOTE_DATE" in notes_df.columns else empty,
+        recon_anchor_map, dict(ANCHOR_WINDOWS, anchor_day=(0, 0)))
+    in_bmi     = windows.positions("bmi")
+    in_smoking = windows.positions("smoking")
+    in_pbs     = windows.positions("pbs")
+
+    def lazy_snote(row, note_text):
+        box = []
+
+        def snote():
+            # built only when some extractor misses the cache
+            if not box:
+                box.append(build_sectioned_note(
+                    note_text=note_text,
+                    note_type=row.get("NOTE_TYPE", ""),
+                    note_id=row.get("NOTE_ID", ""),
+                    note_date=row.get("NOTE_DATE", "")
+                ))
+            return box[0]
+
+        return snote
+
+    def take_bmi(row, mrn, recon_dt, note_hash, snote):
+        try:
+            for c in cache.run("bmi", note_hash, run_bmi, snote):
+                best_bmi[mrn] = choose_best_bmi(best_bmi.get(mrn), c, recon_dt)
+                evidence_rows.append({
+                    MERGE_KEY: mrn, "NOTE_ID": row["NOTE_ID"],
+                    "NOTE_DATE": row["NOTE_DATE"], "NOTE_TYPE": row["NOTE_TYPE"],
+                    "FIELD": "BMI", "VALUE": getattr(c, "value", ""),
+                    "STATUS": getattr(c, "status", ""),
+                    "CONFIDENCE": getattr(c, "confidence", ""),
+                    "SECTION": getattr(c, "section", ""), "EVIDENCE": getattr(c, "evidence", "")
+                })
+        except Exception as e:
+            evidence_rows.append({MERGE_KEY: mrn, "NOTE_ID": row["NOTE_ID"],
+                                  "NOTE_DATE": row["NOTE_DATE"], "NOTE_TYPE": row["NOTE_TYPE"],
+                                  "FIELD": "EXTRACTOR_ERROR", "VALUE": "", "STATUS": "",
+                                  "CONFIDENCE": "", "SECTION": "", "EVIDENCE": "extract_bmi: " + repr(e)})
+
+    def take_smoking(row, mrn, recon_dt, note_hash, snote):
+        try:
+            for c in cache.run("smoking", note_hash, run_smoking, snote):
+                val = clean_cell(getattr(c, "value", ""))
+                if val in {"Current", "Former", "Never"}:
+                    best_smoking[mrn] = choose_best_smoking(best_smoking.get(mrn), c, recon_dt)
+                    evidence_rows.append({
+                        MERGE_KEY: mrn, "NOTE_ID": row["NOTE_ID"],
+                        "NOTE_DATE": row["NOTE_DATE"], "NOTE_TYPE": row["NOTE_TYPE"],
+                        "FIELD": "SmokingStatus", "VALUE": val,
+                        "STATUS": getattr(c, "status", ""),
+                        "CONFIDENCE": getattr(c, "confidence", ""),
+                        "SECTION": getattr(c, "section", ""), "EVIDENCE": getattr(c, "evidence", "")
+                    })
+        except Exception as e:
+            evidence_rows.append({MERGE_KEY: mrn, "NOTE_ID": row["NOTE_ID"],
+                                  "NOTE_DATE": row["NOTE_DATE"], "NOTE_TYPE": row["NOTE_TYPE"],
+                                  "FIELD": "EXTRACTOR_ERROR", "VALUE": "", "STATUS": "",
+                                  "CONFIDENCE": "", "SECTION": "", "EVIDENCE": "extract_smoking: " + repr(e)})
+
+    # Saturation pass: every patient's anchor-day notes, op notes first, go
+    # through the ranked BMI / smoking reducers before the main loop. Only
+    # anchor-day notes reach the top ranks (bmi_saturated,
+    # smoking_saturated), so a patient saturated here skips those
+    # extractors for the rest of their notes.
+    early = set()
+    if skip_saturated:
+        types = notes_df["NOTE_TYPE"].tolist() if "NOTE_TYPE" in notes_df.columns else empty
+        order = sorted(windows.positions("anchor_day"), key=lambda p: (not _is_op_note(types[p]), p))
+        for pos in order:
+            row       = notes_df.iloc[pos]
+            mrn       = clean_cell(row.get(MERGE_KEY, ""))
+            note_text = clean_cell(row.get("NOTE_TEXT", ""))
+            if not mrn or not note_text or mrn not in patients:
+                continue
+            first_row = len(evidence_rows)
+            snote = lazy_snote(row, note_text)
+            take_bmi(row, mrn, windows.anchor(mrn), row[NOTE_HASH], snote)
+            take_smoking(row, mrn, windows.anchor(mrn), row[NOTE_HASH], snote)
+            state.evidence_notes.extend([ordinals[pos]] * (len(evidence_rows) - first_row))
+            early.add(pos)
+        for mrn, best in best_bmi.items():
+            if bmi_saturated(best, windows.anchor(mrn)):
+                saturated.setdefault(mrn, set()).add("bmi")
+        for mrn, best in best_smoking.items():
+            if smoking_saturated(best, windows.anchor(mrn)):
+                saturated.setdefault(mrn, set()).add("smoking")
+
+    for pos, (_, row) in enumerate(notes_df.iterrows()):
         mrn       = clean_cell(row.get(MERGE_KEY, ""))
         note_text = clean_cell(row.get("NOTE_TEXT", ""))
-        note_dt   = parse_date_safe(row.get("NOTE_DATE", ""))
         if not mrn or not note_text:
             continue
 
-        mask = master[MERGE_KEY].astype(str).str.strip() == mrn
-        if not mask.any():
+        if mrn not in patients:
             continue
+        ordinal   = ordinals[pos]
+        first_row = len(evidence_rows)
 
-        anchor   = recon_anchor_map.get(mrn)
-        recon_dt = parse_date_safe((anchor or {}).get("recon_date", ""))
+        recon_dt = windows.anchor(mrn)
+        sat      = saturated.get(mrn, ())
 
-        snote = build_sectioned_note(
-            note_text=note_text,
-            note_type=row.get("NOTE_TYPE", ""),
-            note_id=row.get("NOTE_ID", ""),
-            note_date=row.get("NOTE_DATE", "")
-        )
+        note_hash = row[NOTE_HASH]
+        snote     = lazy_snote(row, note_text)
 
         # ---------- BMI ----------
-        if anchor is not None and recon_dt is not None and note_dt is not None:
-            if bmi_in_window(note_dt, recon_dt):
-                try:
-                    for c in extract_bmi(snote):
-                        best_bmi[mrn] = choose_best_bmi(best_bmi.get(mrn), c, recon_dt)
-                        evidence_rows.append({
-                            MERGE_KEY: mrn, "NOTE_ID": row["NOTE_ID"],
-                            "NOTE_DATE": row["NOTE_DATE"], "NOTE_TYPE": row["NOTE_TYPE"],
-                            "FIELD": "BMI", "VALUE": getattr(c, "value", ""),
-                            "STATUS": getattr(c, "status", ""),
-                            "CONFIDENCE": getattr(c, "confidence", ""),
-                            "SECTION": getattr(c, "section", ""), "EVIDENCE": getattr(c, "evidence", "")
-                        })
-                except Exception as e:
-                    evidence_rows.append({MERGE_KEY: mrn, "NOTE_ID": row["NOTE_ID"],
-                                          "NOTE_DATE": row["NOTE_DATE"], "NOTE_TYPE": row["NOTE_TYPE"],
-                                          "FIELD": "EXTRACTOR_ERROR", "VALUE": "", "STATUS": "",
-                                          "CONFIDENCE": "", "SECTION": "", "EVIDENCE": "extract_bmi: " + repr(e)})
+        if pos in in_bmi and pos not in early:
+            if "bmi" in sat:
+                state.skipped_calls += 1
+            else:
+                take_bmi(row, mrn, recon_dt, note_hash, snote)
 
         # ---------- Smoking ----------
-        if anchor is not None and recon_dt is not None and note_dt is not None:
-            if note_on_or_before(note_dt, recon_dt):
-                try:
-                    for c in extract_smoking(snote):
-                        val = clean_cell(getattr(c, "value", ""))
-                        if val in {"Current", "Former", "Never"}:
-                            best_smoking[mrn] = choose_best_smoking(best_smoking.get(mrn), c, recon_dt)
-                            evidence_rows.append({
-                                MERGE_KEY: mrn, "NOTE_ID": row["NOTE_ID"],
-                                "NOTE_DATE": row["NOTE_DATE"], "NOTE_TYPE": row["NOTE_TYPE"],
-                                "FIELD": "SmokingStatus", "VALUE": val,
-                                "STATUS": getattr(c, "status", ""),
-                                "CONFIDENCE": getattr(c, "confidence", ""),
-                                "SECTION": getattr(c, "section", ""), "EVIDENCE": getattr(c, "evidence", "")
-                            })
-                except Exception as e:
-                    evidence_rows.append({MERGE_KEY: mrn, "NOTE_ID": row["NOTE_ID"],
-                                          "NOTE_DATE": row["NOTE_DATE"], "NOTE_TYPE": row["NOTE_TYPE"],
-                                          "FIELD": "EXTRACTOR_ERROR", "VALUE": "", "STATUS": "",
-                                          "CONFIDENCE": "", "SECTION": "", "EVIDENCE": "extract_smoking: " + repr(e)})
+        if pos in in_smoking and pos not in early:
+            if "smoking" in sat:
+                state.skipped_calls += 1
+            else:
+                take_smoking(row, mrn, recon_dt, note_hash, snote)
 
         # ---------- PBS ----------
-        if anchor is not None and recon_dt is not None and note_dt is not None:
+        if pos in in_pbs:
             try:
-                recon_lat = ""
-                if "Recon_Laterality" in master.columns:
-                    recon_lat = clean_cell(master.loc[mask, "Recon_Laterality"].iloc[0])
+                recon_lat = clean_cell(patients[mrn])
 
                 full_text = clean_cell(row.get("NOTE_TEXT", ""))
-                for c in extract_pbs(snote):
+                for c in cache.run("pbs", note_hash, run_pbs, snote):
                     field = clean_cell(getattr(c, "field", ""))
                     if field not in {"PBS_Lumpectomy", "PBS_Breast Reduction",
                                      "PBS_Mastopexy", "PBS_Augmentation", "PBS_Other"}:
@@ -1414,7 +1314,7 @@ def main():
                         continue
                     combined = evid + "\n" + full_text
                     proc_lat = _extract_lat(combined)
-                    day_diff = days_between(note_dt, recon_dt)
+                    day_diff = windows.offset(pos)
                     accept, reason = pbs_accept(field, evid, day_diff, recon_lat, proc_lat, combined)
 
                     evidence_rows.append({
@@ -1426,6 +1326,8 @@ def main():
                     })
 
                     if accept:
+                        # a copy: c may be the cache's own object, shared with other runs
+                        c = copy.copy(c)
                         setattr(c, "_source_file", row.get("SOURCE_FILE", ""))
                         setattr(c, "_accepted_post_hist", bool(day_diff is not None and day_diff >= 0 and _pbs_history_ok(field, combined)))
                         best_pbs.setdefault(mrn, {})
@@ -1437,9 +1339,11 @@ def main():
                                        "CONFIDENCE": "", "SECTION": "", "EVIDENCE": "extract_pbs: " + repr(e)})
 
         # ---------- Comorbidities ----------
-        if COMORB_PREFILTER.search(note_text):
+        if "comorbidities" in sat:
+            state.skipped_calls += 1
+        elif COMORB_PREFILTER.search(note_text):
             try:
-                for c in extract_comorbidities_inline(snote):
+                for c in cache.run("comorbidities", note_hash, run_comorb, snote):
                     field = clean_cell(getattr(c, "field", ""))
                     evid  = clean_cell(getattr(c, "evidence", ""))
                     if not evid: continue
@@ -1462,11 +1366,13 @@ def main():
                                        "NOTE_DATE": row["NOTE_DATE"], "NOTE_TYPE": row["NOTE_TYPE"],
                                        "FIELD": "EXTRACTOR_ERROR", "VALUE": "", "STATUS": "",
                                        "CONFIDENCE": "", "SECTION": "", "EVIDENCE": "extract_comorbidities: " + repr(e)})
+            if skip_saturated and comorb_saturated(best_comorb.get(mrn, {})):
+                saturated.setdefault(mrn, set()).add("comorbidities")
 
         # ---------- Cancer / Recon / LymphNode ----------
         if CANCER_KEYWORD_RX.search(note_text):
             try:
-                for c in extract_breast_cancer_recon(snote):
+                for c in cache.run("breast_cancer_recon", note_hash, run_cancer, snote):
                     field = clean_cell(str(getattr(c, "field", "")))
 
                     evidence_rows.append({
@@ -1506,144 +1412,435 @@ def main():
                                        "FIELD": "EXTRACTOR_ERROR", "VALUE": "", "STATUS": "",
                                        "CONFIDENCE": "", "SECTION": "", "EVIDENCE": "extract_breast_cancer_recon: " + repr(e)})
 
+        state.evidence_notes.extend([ordinal] * (len(evidence_rows) - first_row))
         note_count += 1
-        if note_count % 5000 == 0:
+        if progress and note_count % 5000 == 0:
             print("      Processed {0} notes...".format(note_count))
 
-    print("      Done. Notes processed: {0}".format(note_count))
+    if early:
+        # the saturation pass emitted its rows first; back into note order
+        tagged = sorted(zip(state.evidence_notes, evidence_rows), key=lambda t: t[0])
+        state.evidence_notes = [t[0] for t in tagged]
+        state.evidence_rows = [t[1] for t in tagged]
+    state.note_count = note_count
+    return state
 
-    # ----------------------------------------------------------
-    # 5. Write results to master
-    # ----------------------------------------------------------
-    print("\n[5/6] Writing results to master...")
 
-    for mrn in master[MERGE_KEY].astype(str).str.strip().tolist():
-        mask = master[MERGE_KEY].astype(str).str.strip() == mrn
-        if not mask.any():
-            continue
+def shard_notes_by_mrn(notes_df, n_shards):
+    """
+    Split notes_df into at most n_shards (ordinals, shard_df, mrns) with all
+    of a patient's notes in one shard, in notes_df order, and shards
+    balanced by note count.
+    """
+    if MERGE_KEY in notes_df.columns:
+        keys = [clean_cell(x) for x in notes_df[MERGE_KEY].tolist()]
+    else:
+        keys = [""] * len(notes_df)
+    counts = Counter(keys)
+    loads = [(0, i) for i in range(max(1, min(n_shards, len(counts))))]
+    heapq.heapify(loads)
+    shard_of = {}
+    for mrn, n in sorted(counts.items(), key=lambda kv: (-kv[1], kv[0])):
+        load, i = heapq.heappop(loads)
+        shard_of[mrn] = i
+        heapq.heappush(loads, (load + n, i))
+
+    positions = [[] for _ in loads]
+    mrns = [[] for _ in loads]
+    for pos, mrn in enumerate(keys):
+        positions[shard_of[mrn]].append(pos)
+    for mrn, i in shard_of.items():
+        mrns[i].append(mrn)
+    return [(positions[i], notes_df.iloc[positions[i]], mrns[i])
+            for i in range(len(loads)) if positions[i]]
+
+
+def _extract_shard(job):
+    notes_df, ordinals, patients, anchors, cache, profile, profile_regexes, skip_saturated = job
+    sections = shared_section_cache(NOTE_STORE)
+    hits, misses = sections.hits, sections.misses
+    profiler = ExtractorProfiler(enabled=profile, regexes=profile_regexes)
+    state = extract_notes(notes_df, ordinals, patients, anchors, cache, profiler,
+                          skip_saturated=skip_saturated)
+    profiler.restore()
+    return (state, cache, profiler, sections.new_spans(),
+            sections.hits - hits, sections.misses - misses)
+
+
+def merge_extraction_states(parts):
+    """One ExtractionState from shards with disjoint MRNs, rows in note order."""
+    out = ExtractionState()
+    tagged = []
+    for part in parts:
+        for name in ["best_bmi", "best_smoking", "best_pbs", "best_comorb",
+                     "best_cancer", "therapy_dates", "lymphnode_cands", "saturated"]:
+            getattr(out, name).update(getattr(part, name))
+        out.note_count += part.note_count
+        out.skipped_calls += part.skipped_calls
+        tagged.extend(zip(part.evidence_notes, part.evidence_rows))
+    # stable: a note's rows stay in the order its shard emitted them
+    tagged.sort(key=lambda t: t[0])
+    out.evidence_notes = [t[0] for t in tagged]
+    out.evidence_rows = [t[1] for t in tagged]
+    return out
+
+
+def run_extraction(notes_df, patients, recon_anchor_map, cache, profiler, workers=1,
+                   skip_saturated=False):
+    """
+    Step 4 in-process (workers <= 1), or with notes sharded by MRN over a
+    process pool (workers None: the CPU count). Both give the same state;
+    the shards' cache results, section offsets and profiles are merged
+    into cache, the shared section cache and profiler.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        return extract_notes(notes_df, range(len(notes_df)), patients, recon_anchor_map,
+                             cache, profiler, progress=True, skip_saturated=skip_saturated)
+
+    # a few shards per worker, so one large patient does not idle the rest
+    shards = shard_notes_by_mrn(notes_df, workers * 4)
+    if not shards:
+        return ExtractionState()
+    # loaded before the pool starts, so forked workers share it
+    sections = shared_section_cache(NOTE_STORE)
+    jobs = []
+    for ordinals, shard_df, mrns in shards:
+        jobs.append((
+            shard_df, ordinals,
+            {m: patients[m] for m in mrns if m in patients},
+            {m: recon_anchor_map[m] for m in mrns if m in recon_anchor_map},
+            cache.shard(shard_df[NOTE_HASH].tolist()),
+            profiler.enabled, profiler.regexes, skip_saturated,
+        ))
+
+    parts = []
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+        for state, part_cache, part_profiler, spans, hits, misses in pool.map(_extract_shard, jobs):
+            parts.append(state)
+            cache.absorb(part_cache)
+            profiler.absorb(part_profiler)
+            sections.absorb(spans, hits, misses)
+    print("      Workers: {0}; shards: {1}".format(min(workers, len(jobs)), len(jobs)))
+    return merge_extraction_states(parts)
+
+
+# ============================================================
+# STEP 5: MASTER FINALIZATION
+# ============================================================
 
-        anchor   = recon_anchor_map.get(mrn)
-        recon_dt = parse_date_safe((anchor or {}).get("recon_date", ""))
+def finalize_patient(frame, mrn, state, recon_anchor_map, mastectomy_evt_map):
+    """
+    Step 5 for one patient: write mrn's best step-4 candidates from state,
+    and the timing fields derived from them, to mrn's master rows.
+    """
+    columns  = frame.frame.columns
+    anchor   = recon_anchor_map.get(mrn)
+    recon_dt = parse_date_safe((anchor or {}).get("recon_date", ""))
 
-        # BMI
-        bmi_cand = best_bmi.get(mrn)
-        if bmi_cand is not None:
+    # BMI
+    bmi_cand = state.best_bmi.get(mrn)
+    if bmi_cand is not None:
+        try:
+            bmi_val = round(float(getattr(bmi_cand, "value", 0)), 1)
+            frame.set(mrn, "BMI", bmi_val)
+            frame.set(mrn, "Obesity", 1 if bmi_val >= 30.0 else 0)
+        except Exception:
+            pass
+
+    # Smoking
+    smoke_cand = state.best_smoking.get(mrn)
+    if smoke_cand is not None:
+        val = clean_cell(getattr(smoke_cand, "value", ""))
+        if val:
+            frame.set(mrn, "SmokingStatus", val)
+
+    # PBS
+    pbs_fields = state.best_pbs.get(mrn, {})
+    any_pbs = False
+    for field in ["PBS_Lumpectomy", "PBS_Breast Reduction", "PBS_Mastopexy",
+                   "PBS_Augmentation", "PBS_Other"]:
+        cand = pbs_fields.get(field)
+        if cand is not None:
+            frame.set(mrn, field, 1)
+            any_pbs = True
+    frame.set(mrn, "PastBreastSurgery", 1 if any_pbs else 0)
+
+    # Comorbidities
+    for field, cand in state.best_comorb.get(mrn, {}).items():
+        if field in columns:
+            frame.set(mrn, field, 1 if bool(getattr(cand, "value", False)) else 0)
+
+    # Cancer / Recon fields
+    for field, cand in state.best_cancer.get(mrn, {}).items():
+        if field == "Mastectomy_Date":
+            continue
+        val = getattr(cand, "value", pd.NA)
+        if field in {"Radiation", "Chemo"}:
             try:
-                bmi_val = round(float(getattr(bmi_cand, "value", 0)), 1)
-                master.loc[mask, "BMI"]     = bmi_val
-                master.loc[mask, "Obesity"] = 1 if bmi_val >= 30.0 else 0
+                val = 1 if bool(val) else 0
             except Exception:
-                pass
-
-        # Smoking
-        smoke_cand = best_smoking.get(mrn)
-        if smoke_cand is not None:
-            val = clean_cell(getattr(smoke_cand, "value", ""))
-            if val:
-                master.loc[mask, "SmokingStatus"] = val
-
-        # PBS
-        pbs_fields = best_pbs.get(mrn, {})
-        any_pbs = False
-        for field in ["PBS_Lumpectomy", "PBS_Breast Reduction", "PBS_Mastopexy",
-                       "PBS_Augmentation", "PBS_Other"]:
-            cand = pbs_fields.get(field)
-            if cand is not None:
-                master.loc[mask, field] = 1
-                any_pbs = True
-        master.loc[mask, "PastBreastSurgery"] = 1 if any_pbs else 0
-
-        # Comorbidities
-        for field, cand in best_comorb.get(mrn, {}).items():
-            if field in master.columns:
-                master.loc[mask, field] = 1 if bool(getattr(cand, "value", False)) else 0
-
-        # Cancer / Recon fields
-        for field, cand in best_cancer.get(mrn, {}).items():
-            if field == "Mastectomy_Date":
-                continue
-            val = getattr(cand, "value", pd.NA)
-            if field in {"Radiation", "Chemo"}:
-                try:
-                    val = 1 if bool(val) else 0
-                except Exception:
-                    val = pd.NA
-            if field in master.columns:
-                master.loc[mask, field] = val
-
-        # LymphNode — simple best score (full episode logic omitted for cleanliness;
-        # can be enhanced if LymphNode accuracy needs improvement)
-        ln_cands = lymphnode_cands.get(mrn, [])
-        if ln_cands:
-            best_ln = None
-            for c in ln_cands:
-                val = clean_cell(getattr(c, "value", ""))
-                if val in {"ALND", "SLNB"}:
-                    best_ln = choose_best(best_ln, c)
-            if best_ln is not None:
-                master.loc[mask, "LymphNode"] = getattr(best_ln, "value", "")
-        # Default to "none" if still empty
-        if clean_cell(master.loc[mask, "LymphNode"].iloc[0]) == "":
-            master.loc[mask, "LymphNode"] = "none"
-
-        # Recon timing + radiation/chemo before/after
-        if recon_dt is not None:
-            # Timing
-            timing_val = clean_cell(master.loc[mask, "Recon_Timing"].iloc[0])
-            if not timing_val:
-                immediate = False
-                delayed   = False
-                for ev in mastectomy_evt_map.get(mrn, []):
-                    ev_dt = ev.get("date")
-                    if ev_dt is None: continue
+                val = pd.NA
+        if field in columns:
+            frame.set(mrn, field, val)
+
+    # LymphNode — simple best score (full episode logic omitted for cleanliness;
+    # can be enhanced if LymphNode accuracy needs improvement)
+    ln_cands = state.lymphnode_cands.get(mrn, [])
+    if ln_cands:
+        best_ln = None
+        for c in ln_cands:
+            val = clean_cell(getattr(c, "value", ""))
+            if val in {"ALND", "SLNB"}:
+                best_ln = choose_best(best_ln, c)
+        if best_ln is not None:
+            frame.set(mrn, "LymphNode", getattr(best_ln, "value", ""))
+    # Default to "none" if still empty
+    if clean_cell(frame.get(mrn, "LymphNode")) == "":
+        frame.set(mrn, "LymphNode", "none")
+
+    # Recon timing + radiation/chemo before/after
+    if recon_dt is not None:
+        # Timing
+        timing_val = clean_cell(frame.get(mrn, "Recon_Timing"))
+        if not timing_val:
+            immediate = False
+            delayed   = False
+            for ev in mastectomy_evt_map.get(mrn, []):
+                ev_dt = ev.get("date")
+                if ev_dt is None: continue
+                if same_calendar_date(ev_dt, recon_dt): immediate = True; break
+                if ev_dt.date() < recon_dt.date(): delayed = True
+            if not immediate:
+                for ev_dt in state.therapy_dates.get(mrn, {}).get("Mastectomy_Date", []):
                     if same_calendar_date(ev_dt, recon_dt): immediate = True; break
                     if ev_dt.date() < recon_dt.date(): delayed = True
-                if not immediate:
-                    for ev_dt in therapy_dates.get(mrn, {}).get("Mastectomy_Date", []):
-                        if same_calendar_date(ev_dt, recon_dt): immediate = True; break
-                        if ev_dt.date() < recon_dt.date(): delayed = True
-                if immediate:   master.loc[mask, "Recon_Timing"] = "Immediate"
-                elif delayed:   master.loc[mask, "Recon_Timing"] = "Delayed"
-
-            # Mastectomy laterality
-            mast_lat = clean_cell(master.loc[mask, "Mastectomy_Laterality"].iloc[0])
-            if not mast_lat:
-                best_mev = choose_best_mastectomy(mastectomy_evt_map.get(mrn, []), recon_dt)
-                if best_mev and clean_cell(best_mev.get("laterality", "")):
-                    master.loc[mask, "Mastectomy_Laterality"] = best_mev["laterality"]
-
-            # Radiation/Chemo timing
-            rad_dates   = therapy_dates.get(mrn, {}).get("Radiation", [])
-            chemo_dates = therapy_dates.get(mrn, {}).get("Chemo", [])
-
-            rad_before = rad_after = chemo_before = chemo_after = 0
-            for dt in rad_dates:
-                dd = days_between(dt, recon_dt)
-                if dd is None: continue
-                if dd < 0: rad_before = 1
-                elif dd > 0: rad_after = 1
-            for dt in chemo_dates:
-                dd = days_between(dt, recon_dt)
-                if dd is None: continue
-                if dd < 0: chemo_before = 1
-                elif dd > 0: chemo_after = 1
-
-            master.loc[mask, "Radiation_Before"] = rad_before
-            master.loc[mask, "Radiation_After"]  = rad_after
-            master.loc[mask, "Chemo_Before"]      = chemo_before
-            master.loc[mask, "Chemo_After"]       = chemo_after
-
-            cur_rad = clean_cell(master.loc[mask, "Radiation"].iloc[0])
-            if rad_before or rad_after:
-                master.loc[mask, "Radiation"] = 1
-            elif cur_rad not in {"1", "True", "true"}:
-                master.loc[mask, "Radiation"] = 0
-
-            cur_chemo = clean_cell(master.loc[mask, "Chemo"].iloc[0])
-            if chemo_before or chemo_after:
-                master.loc[mask, "Chemo"] = 1
-            elif cur_chemo not in {"1", "True", "true"}:
-                master.loc[mask, "Chemo"] = 0
+            if immediate:   frame.set(mrn, "Recon_Timing", "Immediate")
+            elif delayed:   frame.set(mrn, "Recon_Timing", "Delayed")
+
+        # Mastectomy laterality
+        mast_lat = clean_cell(frame.get(mrn, "Mastectomy_Laterality"))
+        if not mast_lat:
+            best_mev = choose_best_mastectomy(mastectomy_evt_map.get(mrn, []), recon_dt)
+            if best_mev and clean_cell(best_mev.get("laterality", "")):
+                frame.set(mrn, "Mastectomy_Laterality", best_mev["laterality"])
+
+        # Radiation/Chemo timing
+        rad_dates   = state.therapy_dates.get(mrn, {}).get("Radiation", [])
+        chemo_dates = state.therapy_dates.get(mrn, {}).get("Chemo", [])
+
+        rad_before = rad_after = chemo_before = chemo_after = 0
+        for dt in rad_dates:
+            dd = days_between(dt, recon_dt)
+            if dd is None: continue
+            if dd < 0: rad_before = 1
+            elif dd > 0: rad_after = 1
+        for dt in chemo_dates:
+            dd = days_between(dt, recon_dt)
+            if dd is None: continue
+            if dd < 0: chemo_before = 1
+            elif dd > 0: chemo_after = 1
+
+        frame.set(mrn, "Radiation_Before", rad_before)
+        frame.set(mrn, "Radiation_After",  rad_after)
+        frame.set(mrn, "Chemo_Before",     chemo_before)
+        frame.set(mrn, "Chemo_After",      chemo_after)
+
+        cur_rad = clean_cell(frame.get(mrn, "Radiation"))
+        if rad_before or rad_after:
+            frame.set(mrn, "Radiation", 1)
+        elif cur_rad not in {"1", "True", "true"}:
+            frame.set(mrn, "Radiation", 0)
+
+        cur_chemo = clean_cell(frame.get(mrn, "Chemo"))
+        if chemo_before or chemo_after:
+            frame.set(mrn, "Chemo", 1)
+        elif cur_chemo not in {"1", "True", "true"}:
+            frame.set(mrn, "Chemo", 0)
+
+
+# ============================================================
+# STREAMING (one patient at a time)
+# ============================================================
+
+EVIDENCE_COLUMNS = [MERGE_KEY, "NOTE_ID", "NOTE_DATE", "NOTE_TYPE", "FIELD", "VALUE",
+                    "STATUS", "CONFIDENCE", "SECTION", "EVIDENCE"]
+
+
+def append_evidence(rows, path):
+    # object columns, so a patient's values print as they would in the full frame
+    pd.DataFrame(rows, columns=EVIDENCE_COLUMNS, dtype=object).to_csv(
+        path, mode="a", header=False, index=False)
+
+
+def stream_patients(frame, patients, recon_anchor_map, mastectomy_evt_map, cache, profiler, evid_path,
+                    skip_saturated=False):
+    """
+    Steps 4 and 5 over the note store one patient at a time: hash and
+    extract the patient's notes, finalize their master rows, append their
+    evidence to evid_path, then let them go. The store holds the notes step
+    3 loads, in the same order, so the evidence file is the one a full run
+    writes.
+
+    Returns (manifest rows of every note, notes processed, MRNs finalized).
+    """
+    out_dir = os.path.dirname(evid_path)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    tmp_path = evid_path + ".tmp"
+    pd.DataFrame(columns=EVIDENCE_COLUMNS).to_csv(tmp_path, index=False)
+
+    manifest_rows = []
+    finalized = set()
+    note_count = 0
+    skipped = 0
+    for mrn, notes in iter_patient_notes(NOTE_STORE):
+        notes = add_note_hashes(notes)
+        manifest_rows.extend(zip(*[notes[c].tolist() for c in MANIFEST_COLUMNS]))
+
+        state = extract_notes(notes, range(len(notes)), patients, recon_anchor_map, cache, profiler,
+                              skip_saturated=skip_saturated)
+        note_count += state.note_count
+        skipped += state.skipped_calls
+        if state.evidence_rows:
+            append_evidence(state.evidence_rows, tmp_path)
+        mrn = clean_cell(mrn)
+        if mrn in frame:
+            finalize_patient(frame, mrn, state, recon_anchor_map, mastectomy_evt_map)
+            finalized.add(mrn)
+            if len(finalized) % 1000 == 0:
+                print("      Finalized {0} patients ({1} notes)...".format(len(finalized), note_count))
+
+    os.replace(tmp_path, evid_path)
+    if skip_saturated:
+        print("      Saturated extractor calls skipped: {0}".format(skipped))
+    return pd.DataFrame(manifest_rows, columns=MANIFEST_COLUMNS), note_count, finalized
+
+
+# ============================================================
+# MAIN
+# ============================================================
+
+def main():
+    print("=" * 60)
+    print("run_full_pipeline.py")
+    print("=" * 60)
+
+    # ----------------------------------------------------------
+    # 1. Load structured encounters (once)
+    # ----------------------------------------------------------
+    print("\n[1/6] Loading structured encounters...")
+    struct_df = load_structured_encounters()
+    print("      Encounter rows: {0}".format(len(struct_df)))
+
+    recon_anchor_map   = build_recon_anchor_map(struct_df)
+    recon_struct_map   = build_recon_structured_map(struct_df)
+    mastectomy_evt_map = build_mastectomy_events(struct_df)
+    race_map           = build_race_map(struct_df)
+    eth_map            = build_ethnicity_map(struct_df)
+    age_map            = build_age_map(struct_df, recon_anchor_map)
+
+    print("      Recon anchors: {0}".format(len(recon_anchor_map)))
+    print("      Race entries:  {0}".format(len(race_map)))
+
+    # ----------------------------------------------------------
+    # 2. Seed master
+    # ----------------------------------------------------------
+    print("\n[2/6] Seeding master...")
+    master = seed_master(struct_df)
+    master = normalize_mrn(master)
+    print("      MRNs: {0}".format(len(master)))
+
+    # MRN -> row index; writes are buffered and flushed before step 6
+    frame = MasterFrame(master, MERGE_KEY)
+
+    # Fill structured demographics
+    for mrn in frame.keys:
+        if race_map.get(mrn):
+            frame.set(mrn, "Race", race_map[mrn])
+        if eth_map.get(mrn):
+            frame.set(mrn, "Ethnicity", eth_map[mrn])
+        if age_map.get(mrn) is not None:
+            frame.set(mrn, "Age", age_map[mrn])
+
+    # Fill structured recon fields
+    for mrn, info in recon_struct_map.items():
+        if mrn not in frame:
+            continue
+        if info.get("laterality"):
+            frame.set(mrn, "Recon_Laterality", info["laterality"])
+        if info.get("recon_type"):
+            frame.set(mrn, "Recon_Type", info["recon_type"])
+        if info.get("recon_class"):
+            frame.set(mrn, "Recon_Classification", info["recon_class"])
+
+    # ----------------------------------------------------------
+    # 3. Load notes (once)
+    # ----------------------------------------------------------
+    print("\n[3/6] Loading and reconstructing notes...")
+    if PIPELINE_STREAMING:
+        ensure_note_store(find_files(NOTE_GLOBS), NOTE_STORE)
+        print("      Streaming: notes are read per patient in step 4")
+    else:
+        notes_df = load_and_reconstruct_notes()
+        print("      Reconstructed notes: {0}".format(len(notes_df)))
+
+        notes_df, changed, note_diff = load_changed_notes(notes_df, NOTE_MANIFEST)
+        print("      Since last run: {0}".format(format_note_diff(note_diff)))
+        print("      To extract: {0} new/changed notes (cached results for the rest)".format(len(changed)))
+    cache = ExtractorCache(EXTRACTOR_CACHE)
+    profiler = ExtractorProfiler(enabled=PROFILE_EXTRACTORS, regexes=PROFILE_REGEXES)
+
+    # ----------------------------------------------------------
+    # 4. Run all extractors in one pass
+    # ----------------------------------------------------------
+    print("\n[4/6] Running extractors...")
+
+    # MRN -> Recon_Laterality as step 2 left it (read-only during step 4)
+    patients = {mrn: frame.get(mrn, "Recon_Laterality") for mrn in frame.keys}
+    if PIPELINE_STREAMING:
+        # patients with notes are finalized (step 5) as they stream past
+        note_manifest, note_count, finalized = stream_patients(
+            frame, patients, recon_anchor_map, mastectomy_evt_map, cache, profiler, OUTPUT_EVID,
+            SKIP_SATURATED)
+        note_diff = update_note_manifest(note_manifest, NOTE_MANIFEST)
+        print("      Since last run: {0}".format(format_note_diff(note_diff)))
+        print("      Extracted: {0} new/changed notes (cached results for the rest)".format(
+            len(changed_notes(note_diff))))
+        note_hashes = note_manifest[NOTE_HASH].tolist()
+        del note_manifest
+        state = ExtractionState()
+    else:
+        state = run_extraction(notes_df, patients, recon_anchor_map, cache, profiler, PIPELINE_WORKERS,
+                               SKIP_SATURATED)
+        note_count = state.note_count
+        if SKIP_SATURATED:
+            print("      Saturated extractor calls skipped: {0}".format(state.skipped_calls))
+        note_hashes = notes_df[NOTE_HASH].tolist()
+        finalized = set()
+
+    print("      Done. Notes processed: {0}".format(note_count))
+    print("      Extractor cache: {0}".format(cache.summary()))
+    if PROFILE_EXTRACTORS:
+        print("      Extractor profile: {0}".format(profiler.summary()))
+        profiler.save(OUTPUT_PROFILE_JSON, OUTPUT_PROFILE_CSV)
+        profiler.restore()
+    cache.save(keep_hashes=note_hashes)
+    sections = shared_section_cache(NOTE_STORE)
+    print("      Section cache: {0}".format(sections.summary()))
+    sections.save()
+
+    # ----------------------------------------------------------
+    # 5. Write results to master
+    # ----------------------------------------------------------
+    print("\n[5/6] Writing results to master...")
+
+    for mrn in frame.keys:
+        if mrn not in finalized:
+            finalize_patient(frame, mrn, state, recon_anchor_map, mastectomy_evt_map)
+
+    master = frame.flush()
 
     # Zero-out Stage outcome columns (filled by complications patch later)
     stage_cols = [
@@ -1662,12 +1859,15 @@ def main():
     print("\n[6/6] Writing outputs...")
     os.makedirs(os.path.dirname(OUTPUT_MASTER), exist_ok=True)
     master.to_csv(OUTPUT_MASTER, index=False)
-    pd.DataFrame(evidence_rows).to_csv(OUTPUT_EVID, index=False)
+    if not PIPELINE_STREAMING:
+        pd.DataFrame(state.evidence_rows).to_csv(OUTPUT_EVID, index=False)
 
     print("\n" + "=" * 60)
     print("DONE.")
     print("Master: {0}".format(OUTPUT_MASTER))
     print("Evidence: {0}".format(OUTPUT_EVID))
+    if PROFILE_EXTRACTORS:
+        print("Profile: {0}".format(OUTPUT_PROFILE_CSV))
     print("\nNext steps:")
     print("  1. Run stage2 chain (unchanged)")
     print("  2. python build_master_rule_COMPLICATIONS_PATCH.py")
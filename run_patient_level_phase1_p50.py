@@ -2,9 +2,9 @@
 import argparse
 import pandas as pd
 
-from normalize.sectionizer import sectionize
+from normalize.sectionizer import sectionize_spans
 from models import SectionedNote
-from extractors import extract_all
+from extractors import DISPATCHER, extract_all
 from aggregate.rules import aggregate_patient
 from config import PHASE1_FIELDS
 
@@ -65,7 +65,7 @@ def main():
                 continue
             text = str(text)
 
-            sections = sectionize(text)
+            sections = sectionize_spans(text)
             sec = SectionedNote(
                 note_id=note_id,
                 note_type=note_type,
@@ -110,6 +110,7 @@ def main():
 
     print("Wrote {}_{}.csv (rows={})".format(args.out_prefix, suffix, out_df.shape[0]))
     print("Wrote evidence_log_phase1_{}.csv (rows={})".format(suffix, ev_df.shape[0]))
+    print("Extractor dispatch: {}".format(DISPATCHER.summary()))
 
 
 if __name__ == "__main__":
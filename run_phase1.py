@@ -10,13 +10,14 @@ if root_str not in sys.path:
 
 import argparse
 import csv
+import itertools
 from typing import List, Dict
 
-from ingest.csv_notes import load_notes_from_csv
-from normalize.sectionizer import sectionize
+from ingest.csv_notes import iter_notes_from_csv, load_notes_from_csv
+from normalize.sectionizer import sectionize_spans
 from normalize.note_type import guess_note_type
 from models import SectionedNote, Candidate
-from extractors import extract_all
+from extractors import DISPATCHER, extract_all
 
 
 def build_sectioned_note(doc):
@@ -24,7 +25,7 @@ def build_sectioned_note(doc):
     Convert a NoteDocument (from ingest) into a SectionedNote
     using the sectionizer and note-type guesser.
     """
-    sections = sectionize(doc.text)
+    sections = sectionize_spans(doc.text)
 
     raw_type = doc.metadata.get("note_type_raw", "") or ""
     guessed_type = guess_note_type(raw_type, doc.text)
@@ -38,6 +39,35 @@ def build_sectioned_note(doc):
     )
 
 
+CANDIDATE_FIELDNAMES = [
+    "patient_id",
+    "note_id",
+    "note_type",
+    "note_date",
+    "field",
+    "value",
+    "status",
+    "section",
+    "confidence",
+    "evidence",
+]
+
+
+def _candidate_row(c, patient_id):
+    return {
+        "patient_id": patient_id,
+        "note_id": c.note_id,
+        "note_type": c.note_type,
+        "note_date": c.note_date,
+        "field": c.field,
+        "value": c.value,
+        "status": c.status,
+        "section": c.section,
+        "confidence": c.confidence,
+        "evidence": c.evidence,
+    }
+
+
 def write_candidates_to_csv(candidates, out_path, note_to_patient_id):
     """
     Write candidates to CSV.
@@ -47,37 +77,37 @@ def write_candidates_to_csv(candidates, out_path, note_to_patient_id):
     - Includes patient_id (encrypted) derived from ingest metadata.
     - No full note text or MRN is written.
     """
-    fieldnames = [
-        "patient_id",
-        "note_id",
-        "note_type",
-        "note_date",
-        "field",
-        "value",
-        "status",
-        "section",
-        "confidence",
-        "evidence",
-    ]
-
     with out_path.open("w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer = csv.DictWriter(f, fieldnames=CANDIDATE_FIELDNAMES)
         writer.writeheader()
         for c in candidates:  # type: Candidate
-            writer.writerow(
-                {
-                    "patient_id": note_to_patient_id.get(c.note_id, ""),
-                    "note_id": c.note_id,
-                    "note_type": c.note_type,
-                    "note_date": c.note_date,
-                    "field": c.field,
-                    "value": c.value,
-                    "status": c.status,
-                    "section": c.section,
-                    "confidence": c.confidence,
-                    "evidence": c.evidence,
-                }
-            )
+            writer.writerow(_candidate_row(c, note_to_patient_id.get(c.note_id, "")))
+
+
+def run_streaming(csv_path, note_source, limit, out_path):
+    """
+    Extract while ingest is still reading: each note is sectionized and
+    extracted as soon as the streaming reader completes it, and its
+    candidates are written immediately. Same output columns as the batch path.
+    """
+    docs = iter_notes_from_csv(csv_path, note_source=note_source, min_short_chars=10)
+    if limit and limit > 0:
+        docs = itertools.islice(docs, limit)
+
+    n_notes = 0
+    n_cands = 0
+    with out_path.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=CANDIDATE_FIELDNAMES)
+        writer.writeheader()
+        for doc in docs:
+            pid = doc.metadata.get("patient_id")
+            pid = str(pid) if pid is not None else ""
+            for c in extract_all(build_sectioned_note(doc)):
+                writer.writerow(_candidate_row(c, pid))
+                n_cands += 1
+            n_notes += 1
+
+    return n_notes, n_cands
 
 
 def main():
@@ -108,10 +138,31 @@ def main():
         help="Output CSV file path (default: phase1_candidates.csv).",
     )
 
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help=(
+            "Stream notes from the CSV in chunks and extract as they arrive "
+            "(bounded memory; notes are processed in file order)."
+        ),
+    )
+
     args = parser.parse_args()
 
     csv_path = Path(args.csv_path)
 
+    if args.stream:
+        n_notes, n_cands = run_streaming(
+            csv_path, args.note_source, args.limit, Path(args.output)
+        )
+        print(
+            "Phase 1 (stream): wrote {} candidates from {} notes to {}".format(
+                n_cands, n_notes, args.output
+            )
+        )
+        print("Extractor dispatch: {}".format(DISPATCHER.summary()))
+        return
+
     notes = load_notes_from_csv(
         csv_path,
         note_source=args.note_source,
@@ -143,6 +194,7 @@ def main():
             len(all_candidates), len(notes), out_path
         )
     )
+    print("Extractor dispatch: {}".format(DISPATCHER.summary()))
 
 
 if __name__ == "__main__":
@@ -1,13 +1,26 @@
 import argparse
 import os
+import sys
 from pathlib import Path
 from typing import Dict
 
 import pandas as pd
-import re
 
+ROOT = Path(__file__).resolve().parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
 
-HEX_TOKEN_RE = re.compile(r"<[0-9A-Fa-f]{2}>")
+# Same token table the note cleaner uses, so the report shows exactly
+# which tokens clean_encoding_artifacts() will fix and which it leaves.
+from ingest.csv_notes import ENCODING_ARTIFACTS, HEX_TOKEN_RE  # noqa: E402
+
+
+def _token_line(token: str, count: int) -> str:
+    if token in ENCODING_ARTIFACTS:
+        status = "-> {!r}".format(ENCODING_ARTIFACTS[token])
+    else:
+        status = "(not in ENCODING_ARTIFACTS)"
+    return "{:<8} {:<10} {}\n".format(token, count, status)
 
 
 def scan_csv_for_artifacts(csv_path: Path, text_column: str = "NOTE_TEXT") -> Dict[str, int]:
@@ -98,7 +111,7 @@ def write_report(
             f.write("(No hex-like tokens <XX> found.)\n\n")
         else:
             for token, count in sorted(total.items(), key=lambda kv: (-kv[1], kv[0])):
-                f.write("{:<8} {}\n".format(token, count))
+                f.write(_token_line(token, count))
             f.write("\n")
 
         # Per-file breakdown
@@ -110,7 +123,7 @@ def write_report(
                 f.write("(No hex-like tokens found.)\n\n")
                 continue
             for token, count in sorted(counts.items(), key=lambda kv: (-kv[1], kv[0])):
-                f.write("{:<8} {}\n".format(token, count))
+                f.write(_token_line(token, count))
             f.write("\n")
 
     print("[scan] Wrote report to {}".format(out_file))
@@ -0,0 +1,86 @@
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from ingest.csv_notes import HEADINGS, insert_heading_newlines  # noqa: E402
+
+
+def insert_heading_newlines_legacy(text: str) -> str:
+    """The original implementation: one re.sub per heading."""
+    if not text:
+        return text
+    for h in HEADINGS:
+        pattern = r"\s*" + re.escape(h)
+        replacement = "\n" + h + "\n"
+        text = re.sub(pattern, replacement, text)
+    return text
+
+
+FILLER = (
+    "Patient is a 52 year old female seen today for follow up after bilateral "
+    "mastectomy with tissue expander placement. Denies fever or chills. "
+    "BMI 31.2. Former smoker, quit 2010. Incisions healing well, no erythema. "
+)
+
+
+def make_flat_note(rng: random.Random, n_chars: int) -> str:
+    """
+    A synthetic flattened Epic note: filler prose with headings inlined on
+    one line (no newlines), like the exports this function exists to fix.
+    """
+    parts = []
+    size = 0
+    while size < n_chars:
+        if rng.random() < 0.35:
+            part = rng.choice(HEADINGS) + " "
+        else:
+            part = FILLER[: rng.randint(40, len(FILLER))]
+        parts.append(part)
+        size += len(part)
+    return "".join(parts)
+
+
+def bench(fn, notes, repeat):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for t in notes:
+            fn(t)
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Micro-benchmark insert_heading_newlines against the per-heading re.sub loop."
+    )
+    parser.add_argument("--notes", type=int, default=200, help="Synthetic notes per size.")
+    parser.add_argument("--sizes", default="2000,20000,100000", help="Note lengths in chars.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=11526)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print("{:>9} {:>12} {:>12} {:>8}".format("chars", "legacy_s", "single_s", "speedup"))
+    for size in [int(x) for x in args.sizes.split(",")]:
+        notes = [make_flat_note(rng, size) for _ in range(args.notes)]
+
+        for t in notes:
+            if insert_heading_newlines(t) != insert_heading_newlines_legacy(t):
+                raise SystemExit("Output mismatch at size {}".format(size))
+
+        legacy = bench(insert_heading_newlines_legacy, notes, args.repeat)
+        single = bench(insert_heading_newlines, notes, args.repeat)
+        print("{:>9} {:>12.4f} {:>12.4f} {:>7.1f}x".format(size, legacy, single, legacy / single))
+
+
+if __name__ == "__main__":
+    main()
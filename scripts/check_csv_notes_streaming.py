@@ -0,0 +1,103 @@
+import argparse
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import pandas as pd  # noqa: E402
+
+from ingest.csv_notes import iter_notes_from_csv, load_notes_from_csv  # noqa: E402
+
+
+FRAGMENTS = [
+    "Patient seen for follow up after mastectomy.",
+    "HISTORY OF PRESENT ILLNESS: doing well.",
+    "BMI 31.2. Former smoker, quit 2010.",
+    "PLAN: continue expansion.",
+    "Incisions healing well, no erythema.",
+]
+
+
+def make_rows(rng: random.Random, n_notes: int, blank_ids: int):
+    """
+    LINE-level rows for n_notes notes, plus rows with a blank NOTE_ID (which
+    make pandas read the id column as float in any chunk they land in).
+    """
+    rows = []
+    for nid in range(1, n_notes + 1):
+        for line in range(1, rng.randint(1, 6) + 1):
+            rows.append({
+                "NOTE_ID": str(nid),
+                "ENCRYPTED_PAT_ID": "P{}".format(nid % 7),
+                "NOTE_TYPE": "Progress Notes",
+                "NOTE_DATE_OF_SERVICE": "2021-05-01",
+                "LINE": line,
+                "NOTE_TEXT": rng.choice(FRAGMENTS),
+            })
+    for _ in range(blank_ids):
+        rows.append(dict(rows[0], NOTE_ID="", NOTE_TEXT="orphan line"))
+    return rows
+
+
+def by_id(docs):
+    """note_id -> (text, metadata but source_path); duplicate ids are an error."""
+    out = {}
+    for d in docs:
+        if d.note_id in out:
+            raise SystemExit("Duplicate note_id {!r}".format(d.note_id))
+        meta = {k: v for k, v in d.metadata.items() if k != "source_path"}
+        out[d.note_id] = (d.text, meta)
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Check that iter_notes_from_csv (grouped and spill modes) "
+                    "yields the notes load_notes_from_csv does."
+    )
+    parser.add_argument("--notes", type=int, default=40)
+    parser.add_argument("--blank-ids", type=int, default=3)
+    parser.add_argument("--chunksize", type=int, default=20)
+    parser.add_argument("--buckets", type=int, default=4)
+    parser.add_argument("--trials", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=11526)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        for trial in range(args.trials):
+            rows = make_rows(rng, args.notes, args.blank_ids)
+            sorted_csv = Path(tmp) / "sorted.csv"
+            shuffled_csv = Path(tmp) / "shuffled.csv"
+            pd.DataFrame(rows).to_csv(sorted_csv, index=False, encoding="cp1252")
+            rng.shuffle(rows)
+            pd.DataFrame(rows).to_csv(shuffled_csv, index=False, encoding="cp1252")
+
+            expected = by_id(load_notes_from_csv(shuffled_csv))
+            if len(expected) != args.notes:
+                raise SystemExit("load_notes_from_csv: {} notes, expected {}".format(
+                    len(expected), args.notes))
+
+            runs = [
+                ("spill", shuffled_csv, False),
+                ("grouped", sorted_csv, True),
+                ("auto", shuffled_csv, None),
+            ]
+            for label, path, assume_sorted in runs:
+                got = by_id(iter_notes_from_csv(
+                    path, chunksize=args.chunksize, assume_sorted=assume_sorted,
+                    n_buckets=args.buckets,
+                ))
+                if got != expected:
+                    raise SystemExit("Trial {}: {} output differs from load_notes_from_csv".format(
+                        trial, label))
+
+    print("OK: {} trials, spill and grouped output match load_notes_from_csv".format(args.trials))
+
+
+if __name__ == "__main__":
+    main()
@@ -23,6 +23,7 @@ import os
 import re
 import glob
 import pandas as pd
+from ingest.csv_utils import read_csv_robust as _read_csv_robust
 
 # -----------------------------
 # CONFIG
@@ -58,12 +59,7 @@ KEY_REGEXES = [(pat, re.compile(pat, re.I)) for pat in KEY_PATTERNS]
 # HELPERS
 # -----------------------------
 def read_csv_robust(path, **kwargs):
-    for enc in ["utf-8", "utf-8-sig", "cp1252", "latin1"]:
-        try:
-            return pd.read_csv(path, encoding=enc, **kwargs)
-        except UnicodeDecodeError:
-            continue
-    raise IOError("Failed to read CSV with common encodings: {}".format(path))
+    return _read_csv_robust(path, encodings=("utf-8", "cp1252", "latin-1"), **kwargs)
 
 def normalize_cols(df):
     df.columns = [str(c).replace(u"\xa0", " ").strip() for c in df.columns]
@@ -6,6 +6,7 @@ from __future__ import print_function
 import os
 import re
 import pandas as pd
+from ingest.csv_utils import read_csv_robust
 
 BREAST_RESTORE_DIR = "/home/apokol/Breast_Restore"
 ENCOUNTER_DIR = "/home/apokol/my_data_Breast/HPI-11526/HPI11256"
@@ -20,12 +21,6 @@ OUT_DIR = os.path.join(BREAST_RESTORE_DIR, "STAGE2_TEXT_IMPLANT")
 if not os.path.exists(OUT_DIR):
     os.makedirs(OUT_DIR)
 
-def read_csv_robust(path):
-    try:
-        return pd.read_csv(path, dtype=object, engine="python", encoding="utf-8")
-    except Exception:
-        return pd.read_csv(path, dtype=object, engine="python", encoding="latin1")
-
 def norm(s):
     if s is None:
         return ""
@@ -19,6 +19,7 @@ from __future__ import print_function
 import os
 import re
 import pandas as pd
+from ingest.csv_utils import read_csv_robust
 
 
 # ----------------------------
@@ -63,12 +64,6 @@ def _safe_str(x):
     except Exception:
         return ""
 
-def read_csv_robust(path):
-    try:
-        return pd.read_csv(path, dtype=object, engine="python", encoding="utf-8")
-    except Exception:
-        return pd.read_csv(path, dtype=object, engine="python", encoding="latin1")
-
 def normalize_colname(c):
     return re.sub(r"\s+", "_", _safe_str(c).strip()).upper()
 
@@ -29,7 +29,7 @@ Outputs:
 
 from __future__ import print_function
 import os
-import pandas as pd
+from ingest.csv_utils import read_csv_robust
 
 # ----------------------------
 # HARD-CODED PATHS
@@ -57,12 +57,6 @@ PIPE_STAGE2_COL = "has_stage2_definitive"
 # ----------------------------
 # Helpers
 # ----------------------------
-def read_csv_robust(path):
-    try:
-        return pd.read_csv(path, dtype=object, engine="python", encoding="utf-8")
-    except Exception:
-        return pd.read_csv(path, dtype=object, engine="python", encoding="latin1")
-
 def norm_str(series):
     """Normalize to stripped string series (keeps NaN as 'nan' after astype(str))."""
     return series.astype(str).str.strip()
@@ -7,7 +7,7 @@ import os
 import json
 import math
 import datetime
-import pandas as pd
+from ingest.csv_utils import read_csv_robust
 
 # =========================
 # CONFIG (EDIT PATHS)
@@ -33,14 +33,6 @@ KEY_CANDIDATES = ["ENCRYPTED_PAT_ID", "MRN", "PatientID", "PATIENT_ID", "PAT_ID"
 # =========================
 # IO helpers
 # =========================
-def read_csv_robust(path):
-    common_kwargs = dict(dtype=str, engine="python")
-    try:
-        return pd.read_csv(path, **common_kwargs, on_bad_lines="skip")
-    except TypeError:
-        # older pandas
-        return pd.read_csv(path, **common_kwargs, error_bad_lines=False, warn_bad_lines=True)
-
 def clean_cols(df):
     df.columns = [str(c).strip().replace("\ufeff", "") for c in df.columns]
     return df